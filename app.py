@@ -6,12 +6,11 @@ Interactive detective game powered by AI agents
 import streamlit as st
 from dotenv import load_dotenv
 
-from src.utils.llm_config import initialize_llm, build_graphs
 from ui.components.game_setup import setup_game, display_main_header
-from ui.components.investigation import display_investigation_phase
 from ui.components.game_end import display_game_end
 from ui.styles import load_custom_css
-from config.settings import initialize_session_state
+from src.utils.metrics import set_metrics_tags, timed_section
+from config.settings import initialize_session_state, SCENARIO_POOL_ENABLED
 
 # Load environment variables
 load_dotenv()
@@ -25,28 +24,61 @@ st.set_page_config(
 )
 
 
+def load_llm_stack():
+    """Initialize the LLM and graphs, and start the scenario pool.
+
+    Called after the page is drawn, with imports deferred to here, so the
+    header and setup form are on screen before LangChain, LangGraph and the
+    model client are loaded.
+    """
+    from src.utils.llm_config import initialize_llm, build_graphs
+    from src.utils.scenario_pool import get_scenario_pool
+
+    initialize_llm()
+    build_graphs()
+    if SCENARIO_POOL_ENABLED:
+        # Start pre-generating scenarios before the first game is requested
+        get_scenario_pool()
+
+
 def main():
     """Main application function"""
     # Load custom styling
     load_custom_css()
 
-    # Initialize session state and LLM
+    # Initialize session state
     initialize_session_state()
-    initialize_llm()
-    build_graphs()
+
+    # Tag metrics recorded during this run with the player's session and game
+    game_state = st.session_state.game_state
+    set_metrics_tags(
+        session_id=st.session_state.session_id,
+        game_id=game_state.get("game_id") if game_state else None,
+    )
 
     # Display main header
     display_main_header()
 
     # Main game flow based on current phase
-    if st.session_state.current_phase == "setup":
-        setup_game()
+    with timed_section("render", st.session_state.current_phase):
+        if st.session_state.current_phase == "setup":
+            setup_game()
+
+        elif st.session_state.current_phase in ["investigation", "guessing"]:
+            from ui.components.investigation import display_investigation_phase
+
+            display_investigation_phase()
+
+        elif st.session_state.current_phase == "ended":
+            display_game_end()
+
+    load_llm_stack()
 
-    elif st.session_state.current_phase in ["investigation", "guessing"]:
-        display_investigation_phase()
+    if st.session_state.current_phase in ["investigation", "guessing"]:
+        from ui.components.investigation import poll_interview_jobs
 
-    elif st.session_state.current_phase == "ended":
-        display_game_end()
+        # Last, so the whole page is drawn before waiting on interview jobs
+        poll_interview_jobs()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,189 @@
+"""
+Thread-based versus async throughput against the deterministic fake model.
+
+Runs the same number of concurrent interview turns (answer_question) and
+full game generations (main graph) once on a thread per request and once as
+coroutines on a single event loop, and reports throughput and the peak
+number of OS threads each adds to those already running.
+
+Usage: python -m benchmarks.bench_async [--concurrency 50 200 1000] [--games 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import sample_characters, sample_story, sample_transcript
+
+
+class ThreadSampler:
+    """Records the peak number of live threads while in use.
+
+    ``added`` is the peak less the threads alive on entry, so threads left
+    idle by an earlier run (e.g. pooled workers) are not counted again.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        # Taken with the sampler's own thread running, so it is not counted
+        self.baseline = self.peak = threading.active_count()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    @property
+    def added(self):
+        return self.peak - self.baseline
+
+
+def conv_states(count):
+    """Interview states part-way through an interview, one per request"""
+    from langchain_core.messages import HumanMessage
+
+    character = sample_characters()[1]
+    story = sample_story()
+    transcript = sample_transcript(4)
+    return [
+        {
+            "character": character,
+            "story_details": story,
+            "messages": [HumanMessage(content=entry.content) for entry in transcript]
+            + [HumanMessage(content=f"Question {index}?")],
+            "conversation_summary": "",
+        }
+        for index in range(count)
+    ]
+
+
+def measure(run, count):
+    """Wall time, throughput and peak number of threads added by ``run()``"""
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+    return {
+        "requests": count,
+        "wall_s": round(elapsed, 3),
+        "per_second": round(count / elapsed, 1),
+        "threads_added": sampler.added,
+    }
+
+
+def bench_turns(llm, concurrency):
+    from src.agents.conversation_handler import aanswer_question, answer_question
+    from src.utils.llm_context import use_llm
+
+    states = conv_states(concurrency)
+
+    def answer(state):
+        with use_llm(llm):
+            return answer_question(state)
+
+    def threaded():
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(answer, states))
+
+    async def gathered():
+        with use_llm(llm):
+            await asyncio.gather(*(aanswer_question(state) for state in states))
+
+    return {
+        "threads": measure(threaded, concurrency),
+        "async": measure(lambda: asyncio.run(gathered()), concurrency),
+    }
+
+
+def bench_games(llm, count, max_characters):
+    from src.utils.llm_context import use_llm
+    from src.workflows.game_graph import build_game_input, build_main_graph
+
+    graph = build_main_graph()
+    inputs = [
+        build_game_input(f"Benchmark office #{index}", max_characters, 3)
+        for index in range(count)
+    ]
+
+    def generate(game_input):
+        with use_llm(llm):
+            return graph.invoke(game_input)
+
+    def threaded():
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            list(executor.map(generate, inputs))
+
+    async def gathered():
+        with use_llm(llm):
+            await asyncio.gather(*(graph.ainvoke(game_input) for game_input in inputs))
+
+    return {
+        "threads": measure(threaded, count),
+        "async": measure(lambda: asyncio.run(gathered()), count),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--max-characters", type=int, default=5)
+    parser.add_argument("--latency-median", type=float, default=0.2)
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure the backend first. The
+    # request scheduler is opened up so both modes run every request at once.
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["FAKE_LLM_LATENCY_MEDIAN"] = str(args.latency_median)
+    os.environ["FAKE_LLM_LATENCY_SIGMA"] = str(args.latency_sigma)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(max(*args.concurrency, args.games))
+    # Repeated runs would otherwise be served from the persistent cache
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+
+    from src.utils.llm_context import create_llm
+
+    llm = create_llm()
+    results = {
+        "turns": {
+            str(concurrency): bench_turns(llm, concurrency)
+            for concurrency in args.concurrency
+        },
+    }
+    if args.games:
+        results["games"] = bench_games(llm, args.games, args.max_characters)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'workload':<20} {'mode':<8} {'req/s':>8} {'wall s':>8} {'+threads':>8}")
+    rows = [(f"turns x{c}", r) for c, r in results["turns"].items()]
+    if "games" in results:
+        rows.append((f"games x{args.games}", results["games"]))
+    for workload, modes in rows:
+        for mode, row in modes.items():
+            print(
+                f"{workload:<20} {mode:<8} {row['per_second']:>8} "
+                f"{row['wall_s']:>8} {row['threads_added']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Cold-start import benchmark for app.py with a time budget.
+
+Imports app.py in fresh interpreters under ``python -X importtime``, reports
+the median cumulative import time and the heaviest direct imports, and exits
+non-zero when the budget is exceeded or when a module of the LLM stack is
+loaded before the first page render.
+
+Usage: python -m benchmarks.bench_cold_start [--runs 5] [--budget-ms 1500]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+# Modules the setup page must not need; they load after the first render
+DEFERRED_MODULES = (
+    "langchain_core",
+    "langgraph",
+    "databricks_langchain",
+    "src.utils.llm_config",
+    "src.agents.conversation_handler",
+    "src.engine",
+)
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_app():
+    """Import app.py in a new interpreter and return its -X importtime rows"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            depth = (len(indent) - 1) // 2
+            rows.append((module, depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def direct_imports(rows, module="app"):
+    """Cumulative time of each module imported directly by ``module``.
+
+    -X importtime prints children before their parent, so the direct
+    imports are the depth-1 rows between ``module`` and the previous
+    top-level row.
+    """
+    index = next(i for i, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    children = {}
+    for name, depth, _, cumulative in reversed(rows[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children[name] = cumulative
+    return children
+
+
+def run(runs):
+    totals = []
+    children = {}
+    loaded = set()
+    for _ in range(runs):
+        rows = import_app()
+        totals.append(next(row[3] for row in rows if row[0] == "app") / 1000)
+        for name, cumulative in direct_imports(rows).items():
+            children.setdefault(name, []).append(cumulative / 1000)
+        loaded.update(
+            prefix
+            for name, *_ in rows
+            for prefix in DEFERRED_MODULES
+            if name == prefix or name.startswith(prefix + ".")
+        )
+    heaviest = sorted(
+        ((name, statistics.median(ms)) for name, ms in children.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return {
+        "runs": runs,
+        "median_ms": statistics.median(totals),
+        "min_ms": min(totals),
+        "max_ms": max(totals),
+        "heaviest_imports_ms": dict(heaviest[:10]),
+        "deferred_modules_loaded": sorted(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    over_budget = results["median_ms"] > args.budget_ms
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"import app: median {results['median_ms']:.0f} ms "
+            f"(min {results['min_ms']:.0f}, max {results['max_ms']:.0f}, "
+            f"budget {args.budget_ms:.0f})"
+        )
+        for name, ms in results["heaviest_imports_ms"].items():
+            print(f"  {name:<40} {ms:8.1f} ms")
+
+    failures = []
+    if over_budget:
+        failures.append(f"cold start over budget ({args.budget_ms:.0f} ms)")
+    if results["deferred_modules_loaded"]:
+        failures.append(
+            "loaded before first render: "
+            + ", ".join(results["deferred_modules_loaded"])
+        )
+    if failures:
+        print("FAIL: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
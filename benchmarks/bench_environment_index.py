@@ -0,0 +1,149 @@
+"""
+Lookup latency and match quality of the fuzzy environment index.
+
+Indexes a synthetic set of stored environments and times searches for
+reordered, reworded and misspelled settings, reporting how many are served
+the environment they were derived from. Settings differing only in the city
+are counted too; those should not be served any stored environment.
+
+Usage: python -m benchmarks.bench_environment_index [--environments 200]
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+from collections import defaultdict
+
+PLACES = [
+    "office",
+    "castle",
+    "manor house",
+    "cruise ship",
+    "opera house",
+    "train station",
+    "bakery",
+    "vineyard",
+    "museum",
+    "university library",
+    "ski lodge",
+    "hospital",
+    "lighthouse",
+    "casino",
+    "research lab",
+    "theatre",
+]
+OWNERS = [
+    "Mistral",
+    "Acme",
+    "Royal",
+    "Grand",
+    "Old Harbour",
+    "Northwind",
+    "Bellevue",
+    "Silver Pine",
+    "Blackwood",
+    "Crescent",
+]
+CITIES = [
+    "Paris",
+    "London",
+    "Edinburgh",
+    "Venice",
+    "Kyoto",
+    "Lisbon",
+    "Prague",
+    "Oslo",
+    "Cairo",
+    "Montreal",
+    "Seville",
+    "Vienna",
+]
+
+
+def environments(count, rng):
+    """Distinct "<owner> <place> in <city>" settings"""
+    combos = list(itertools.product(OWNERS, PLACES, CITIES))
+    rng.shuffle(combos)
+    return [f"{owner} {place} in {city}" for owner, place, city in combos[:count]]
+
+
+def misspell(word, rng):
+    """Drop one inner letter of a word"""
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1 :]
+
+
+def variants(environment, stored, rng):
+    """Ways a player might type the same setting, and one different setting.
+
+    Returns ``{kind: query}``; the "other city" query names a setting that is
+    not stored and should not match.
+    """
+    owner_place, city = environment.rsplit(" in ", 1)
+    words = environment.split()
+    typo = rng.randrange(len(words))
+    words[typo] = misspell(words[typo], rng)
+    queries = {
+        "reordered": f"the {city} {owner_place}s",
+        "punctuated": f"{owner_place}, {city}",
+        "misspelled": " ".join(words),
+    }
+    other_cities = [c for c in CITIES if f"{owner_place} in {c}" not in stored]
+    if other_cities:
+        queries["other city"] = f"{owner_place} in {rng.choice(other_cities)}"
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--environments", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from config.settings import SCENARIO_MATCH_THRESHOLD
+    from src.utils.environment_index import EnvironmentIndex
+    from src.utils.scenario_library import scenario_key
+
+    rng = random.Random(args.seed)
+    stored = environments(args.environments, rng)
+    index = EnvironmentIndex()
+    start = time.perf_counter()
+    for environment in stored:
+        index.add(scenario_key(environment, 0)[0])
+    index.search("warm up")
+    build_s = time.perf_counter() - start
+
+    samples = []
+    outcomes = defaultdict(lambda: [0, 0])
+    for environment in rng.sample(stored, min(args.queries, len(stored))):
+        expected = scenario_key(environment, 0)[0]
+        for kind, query in variants(environment, set(stored), rng).items():
+            query = scenario_key(query, 0)[0]
+            start = time.perf_counter()
+            matches = index.search(query, SCENARIO_MATCH_THRESHOLD, limit=1)
+            samples.append(time.perf_counter() - start)
+            if kind == "other city":
+                outcomes[kind][0] += bool(matches)
+            else:
+                outcomes[kind][0] += bool(matches) and matches[0][0] == expected
+            outcomes[kind][1] += 1
+
+    samples.sort()
+    print(f"{len(index)} environments indexed in {build_s * 1000:.0f} ms")
+    print(
+        f"search: median {statistics.median(samples) * 1000:.2f} ms, "
+        f"p95 {samples[int(len(samples) * 0.95)] * 1000:.2f} ms, "
+        f"max {samples[-1] * 1000:.2f} ms over {len(samples)} queries"
+    )
+    print(f"served a stored setting (threshold {SCENARIO_MATCH_THRESHOLD}):")
+    for kind, (served, total) in outcomes.items():
+        print(f"  {kind:<12} {served:>5}/{total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark interview prompt construction and prefix stability.
+
+Compares the previous layout (system prompt formatted and a ChatPromptTemplate
+compiled on every call, with the question inside the system message) against
+the precomputed per-character prefix with a compiled template.
+
+Usage: python -m benchmarks.bench_prompts [--turns 12] [--repeat 200]
+"""
+
+import argparse
+import json
+import os
+import timeit
+
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from benchmarks.fixtures import sample_characters, sample_story, sample_transcript
+from src.agents.conversation_handler import (
+    INTERVIEW_PROMPT,
+    _interview_input,
+    answer_system_prefix,
+)
+
+# The answer prompt as it was laid out before prefixes were made stable
+LEGACY_ANSWER_PROMPT = """You are playing the role of a character with the below persona:
+{subject_persona}
+You are being interviewed by Sherlock Holmes in relationship to the below crime:
+Crime Scene Details:
+    Victim: {victim}
+    Time: {time}
+    Location: {location}
+    Weapon: {weapon}
+    Cause of Death: {cause}
+
+    Scene Description:
+    {scene}
+
+    All Characters and their relationships:
+    {npc_brief}
+
+Based on the message history, answer the question as the character would, based on:
+1. Your character's personality and background
+2. Your knowledge of the crime
+3. Your relationships with other characters
+4. Your potential motives or alibis
+
+Important:
+- Stay in character
+- Only reveal information this character would know
+- Maintain consistency with the story details
+- You can lie if your character would have a reason to do so
+
+Question to answer:
+{question}
+"""
+
+
+def legacy_messages(state):
+    """Build answer_question messages the way it was done per call before"""
+    character = state["character"]
+    story = state["story_details"]
+    messages = state["messages"]
+
+    system_message = LEGACY_ANSWER_PROMPT.format(
+        subject_persona=character.persona,
+        victim=story.victim_name,
+        time=story.time_of_death,
+        location=story.location_found,
+        weapon=story.murder_weapon,
+        cause=story.cause_of_death,
+        scene=story.crime_scene_details,
+        npc_brief=story.npc_brief,
+        question=messages[-1].content,
+    )
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_message),
+            MessagesPlaceholder(variable_name="messages"),
+        ]
+    )
+    return prompt.invoke(messages).to_messages()
+
+
+def current_messages(state):
+    """Build answer_question messages with the precomputed prefix"""
+    prefix = answer_system_prefix(state["character"], state["story_details"])
+    return INTERVIEW_PROMPT.invoke(_interview_input(prefix, state)).to_messages()
+
+
+def serialize(messages):
+    """Flatten a prompt the way a provider sees it for prefix matching"""
+    return "".join(f"<{message.type}>{message.content}" for message in messages)
+
+
+def common_prefix_length(a, b):
+    return len(os.path.commonprefix([a, b]))
+
+
+def interview_states(turns):
+    """One answer_question state per turn of a growing interview"""
+    character = sample_characters()[1]
+    story = sample_story()
+    transcript = sample_transcript(turns)
+    states = []
+    for question in range(0, len(transcript), 2):
+        states.append(
+            {
+                "character": character,
+                "story_details": story,
+                "messages": [
+                    HumanMessage(content=entry.content)
+                    for entry in transcript[: question + 1]
+                ],
+                "conversation_summary": "",
+            }
+        )
+    return states
+
+
+def prefix_reuse(build, states):
+    """Share of each turn's prompt that repeats the previous turn's prompt"""
+    rendered = [serialize(build(state)) for state in states]
+    ratios = [
+        common_prefix_length(previous, current) / len(current)
+        for previous, current in zip(rendered, rendered[1:])
+    ]
+    stable_system = all(
+        build(state)[0].content == build(states[0])[0].content for state in states
+    )
+    return {
+        "mean_reused_prefix": sum(ratios) / len(ratios),
+        "system_prompt_stable": stable_system,
+    }
+
+
+def run(turns, repeat):
+    states = interview_states(turns)
+    results = {}
+    for name, build in [("legacy", legacy_messages), ("current", current_messages)]:
+        seconds = timeit.timeit(lambda: [build(s) for s in states], number=repeat)
+        results[name] = {
+            "us_per_prompt": seconds / (repeat * len(states)) * 1e6,
+            **prefix_reuse(build, states),
+        }
+    results["speedup"] = (
+        results["legacy"]["us_per_prompt"] / results["current"]["us_per_prompt"]
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args()
+
+    results = run(args.turns, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name in ("legacy", "current"):
+        r = results[name]
+        print(
+            f"{name:<8} {r['us_per_prompt']:8.1f} us/prompt  "
+            f"reused prefix {r['mean_reused_prefix']:6.1%}  "
+            f"stable system prompt: {r['system_prompt_stable']}"
+        )
+    print(f"construction speedup: {results['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
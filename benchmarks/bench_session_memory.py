@@ -0,0 +1,167 @@
+"""
+Per-session memory benchmark for the compact session model.
+
+Generates a game with the deterministic fake chat model, builds the session
+data a player accumulates after interviewing every suspect, and reports its
+deep size in bytes in the previous representation (pydantic models, message
+objects and dict transcript entries) and in the compact one. Also checks that
+converting the compact game back gives the original data.
+
+Usage: python -m benchmarks.bench_session_memory [--turns 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.fixtures import sample_transcript
+
+# Session state keys holding per-game data
+SESSION_KEYS = (
+    "game_state",
+    "selected_character",
+    "conversation_history",
+    "conversation_summaries",
+)
+
+
+def deep_sizeof(obj, seen=None):
+    """Bytes of ``obj`` and everything it references, each object counted once"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, type):
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            deep_sizeof(key, seen) + deep_sizeof(value, seen)
+            for key, value in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        if hasattr(obj, "__dict__"):
+            size += deep_sizeof(obj.__dict__, seen)
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name != "__dict__" and hasattr(obj, name):
+                    size += deep_sizeof(getattr(obj, name), seen)
+    return size
+
+
+def legacy_session(game_state, turns):
+    """Session data as stored before the compact model"""
+    suspects = [c for c in game_state["characters"] if c.role.lower() != "victim"]
+    return {
+        "game_state": game_state,
+        "selected_character": suspects[0],
+        "conversation_history": {
+            c.name: [entry.to_dict() for entry in sample_transcript(turns)]
+            for c in suspects
+        },
+        "conversation_summaries": {
+            c.name: {"text": "Notes on the interview so far. " * 8, "covered": turns}
+            for c in suspects
+        },
+    }
+
+
+def compact_session(game_state, turns):
+    """The same session data in the compact model"""
+    from src.models.compact import TranscriptEntry, compact_game_state
+
+    compact = compact_game_state(game_state)
+    suspects = [c for c in compact["characters"] if c.role.lower() != "victim"]
+    return {
+        "game_state": compact,
+        "selected_character": suspects[0],
+        "conversation_history": {
+            c.name: [
+                TranscriptEntry.from_dict(entry.to_dict())
+                for entry in sample_transcript(turns)
+            ]
+            for c in suspects
+        },
+        "conversation_summaries": {
+            c.name: {"text": "Notes on the interview so far. " * 8, "covered": turns}
+            for c in suspects
+        },
+    }
+
+
+def round_trips(game_state):
+    """Whether the compact game converts back to the generated one"""
+    from src.models.compact import compact_game_state, expand_game_state
+
+    expanded = expand_game_state(compact_game_state(game_state))
+    return (
+        expanded["characters"] == list(game_state["characters"])
+        and expanded["story_details"] == game_state["story_details"]
+        and expanded["messages"][0].content == game_state["messages"][0].content
+    )
+
+
+def measure(session):
+    """Deep size of each session key and of the whole session"""
+    sizes = {key: deep_sizeof(session[key]) for key in SESSION_KEYS}
+    sizes["total"] = deep_sizeof(session)
+    return sizes
+
+
+def run(environment, max_characters, turns):
+    from src.utils.llm_context import create_llm, use_llm
+    from src.workflows.game_graph import build_game_input, build_main_graph
+
+    with use_llm(create_llm()):
+        game_state = build_main_graph().invoke(
+            build_game_input(environment, max_characters, 3)
+        )
+
+    before = measure(legacy_session(game_state, turns))
+    after = measure(compact_session(game_state, turns))
+    return {
+        "turns_per_suspect": turns,
+        "max_characters": max_characters,
+        "before_bytes": before,
+        "after_bytes": after,
+        "reduction": 1 - after["total"] / before["total"],
+        "round_trips": round_trips(game_state),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--environment", default="Mistral office in Paris")
+    parser.add_argument("--max-characters", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=20, help="Turns per suspect")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure the backend first
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["FAKE_LLM_LATENCY_MEDIAN"] = "0"
+
+    results = run(args.environment, args.max_characters, args.turns)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'':<24} {'before':>10} {'after':>10}")
+        for key in (*SESSION_KEYS, "total"):
+            print(
+                f"{key:<24} {results['before_bytes'][key]:>10,} "
+                f"{results['after_bytes'][key]:>10,}"
+            )
+        print(f"bytes per session reduced by {results['reduction']:.0%}")
+
+    if not results["round_trips"]:
+        print("FAIL: compact game does not convert back", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Sample game data shared by the benchmarks
+"""
+
+from src.models.character import Character
+from src.models.compact import TranscriptEntry
+from src.models.story import StoryDetails
+
+
+def sample_characters():
+    """A small cast with one victim and one killer"""
+    return [
+        Character(
+            role="victim",
+            name="Claire Dubois",
+            backstory="Head of research, about to announce a rival's plagiarism.",
+        ),
+        Character(
+            role="killer",
+            name="Henri Lambert",
+            backstory="Soft-spoken engineer who quietly resented Claire for years.",
+        ),
+        Character(
+            role="intern",
+            name="Sophie Martin",
+            backstory="Argued loudly with Claire the morning of the murder.",
+        ),
+        Character(
+            role="office manager",
+            name="Luc Bernard",
+            backstory="Knows every badge swipe in the building and some secrets.",
+        ),
+    ]
+
+
+def sample_story():
+    """Story details with realistically sized fields"""
+    return StoryDetails(
+        victim_name="Claire Dubois",
+        time_of_death="Between 21:00 and 22:00",
+        location_found="The third-floor server room",
+        murder_weapon="A heavy bronze award statuette",
+        cause_of_death="Blunt force trauma to the back of the head",
+        crime_scene_details=(
+            "The server room door was propped open with a chair. A cold cup of "
+            "coffee sat beside the keyboard and the badge log shows three "
+            "entries after 20:30. The statuette was found wiped clean behind "
+            "the cooling unit. "
+        )
+        * 3,
+        witnesses="The night guard saw a figure in a grey hoodie at 21:40.",
+        initial_clues=(
+            "A torn conference lanyard, a smudged fingerprint on the door "
+            "handle and a deleted calendar entry named 'final warning'. "
+        )
+        * 2,
+        npc_brief=(
+            "Claire led research; Henri worked under her for six years; Sophie "
+            "was her intern and publicly clashed with her; Luc runs the office "
+            "and manages building access. "
+        )
+        * 3,
+        killer_motive="Henri feared Claire would expose his falsified results.",
+        murder_method_details="Henri struck Claire with the statuette.",
+        key_evidence="The badge log and the fingerprint on the door handle.",
+        red_herrings_explanation="Sophie's argument was about a deadline.",
+        complete_timeline="20:30 Claire enters; 21:30 Henri follows; 21:45 exit.",
+    )
+
+
+def sample_transcript(turns):
+    """Alternating question/answer transcript entries"""
+    entries = []
+    for turn in range(turns):
+        entries.append(
+            TranscriptEntry.now(
+                "player", f"Where were you at {20 + turn % 4}:15 on that night?"
+            )
+        )
+        entries.append(
+            TranscriptEntry.now(
+                "character", "I was at my desk finishing a report, Mr Holmes. " * 3
+            )
+        )
+    return entries
@@ -0,0 +1,491 @@
+"""
+Prompt-size profile: input tokens per template field, call site and turn.
+
+Plays games through the headless engine against the deterministic fake
+model and renders every prompt the agents send, attributing its tokens to
+the template fields (persona, npc_brief, crime_scene_details, ...), the
+structured output schema, the conversation summary and history, and the
+fixed template text. Games come from the scenario library when it has any,
+otherwise they are generated first.
+
+Tokens are counted with tiktoken's cl100k_base encoding when it is
+installed, otherwise estimated at four characters per token. The repair
+prompts only run for faulty generations and are not profiled.
+
+Usage: python -m benchmarks.profile_prompts [--games 5] [--turns 12]
+       [--output prompt_profile.json] [--baseline prompt_profile.json]
+       [--max-increase 0.05]
+"""
+
+import argparse
+import json
+import os
+import string
+import sys
+from collections import Counter, defaultdict
+
+# Template placeholders named after the story field or character data they
+# carry, so one field is reported under one name across call sites
+FIELD_NAMES = {
+    "subject_persona": "persona",
+    "victim": "victim_name",
+    "time": "time_of_death",
+    "location": "location_found",
+    "weapon": "murder_weapon",
+    "cause": "cause_of_death",
+    "scene": "crime_scene_details",
+}
+
+# Interview call sites repeated on every turn
+TURN_CALL_SITES = ("get_question", "answer_question", "summarize_conversation")
+
+
+def token_counter(name):
+    """A ``count(text)`` function for the requested tokenizer"""
+    from src.utils.context_window import estimate_tokens
+
+    if name in ("auto", "tiktoken"):
+        try:
+            import tiktoken
+        except ImportError:
+            if name == "tiktoken":
+                raise
+        else:
+            encoding = tiktoken.get_encoding("cl100k_base")
+            return "tiktoken/cl100k_base", lambda text: len(encoding.encode(text))
+    return "estimate", estimate_tokens
+
+
+class PromptProfile:
+    """Token counts per call site, field and interview turn"""
+
+    def __init__(self, count):
+        self.count = count
+        self.calls = Counter()
+        self.fields = defaultdict(Counter)
+        self.turns = defaultdict(Counter)
+        self.interviews = Counter()
+
+    def template(self, template, values, content):
+        """Tokens of each placeholder's value and of the fixed text.
+
+        ``content`` is the text the agent actually sent, which must match the
+        template rendered with ``values``.
+        """
+        rendered = template.format(**values)
+        if rendered != content:
+            raise ValueError(
+                f"Template no longer matches the prompt sent: {content[:60]!r}"
+            )
+
+        parts = Counter()
+        for _, field, _, _ in string.Formatter().parse(template):
+            if field:
+                parts[FIELD_NAMES.get(field, field)] += self.count(str(values[field]))
+        parts["template text"] += self.count(rendered) - sum(parts.values())
+        return parts
+
+    def add(self, call_site, parts, turn=None):
+        self.calls[call_site] += 1
+        self.fields[call_site].update(parts)
+        if turn is not None:
+            self.turns[turn][call_site] += sum(parts.values())
+
+    def report(self):
+        """Summary per call site, per field and per turn"""
+        total = sum(sum(parts.values()) for parts in self.fields.values())
+        call_sites = {}
+        for call_site, parts in self.fields.items():
+            tokens = sum(parts.values())
+            call_sites[call_site] = {
+                "calls": self.calls[call_site],
+                "tokens": tokens,
+                "mean_tokens": round(tokens / self.calls[call_site], 1),
+                "share": round(tokens / total, 4),
+                "fields": dict(parts.most_common()),
+            }
+
+        fields = Counter()
+        for parts in self.fields.values():
+            fields.update(parts)
+        contributors = Counter(
+            {
+                (call_site, field): tokens
+                for call_site, parts in self.fields.items()
+                for field, tokens in parts.items()
+            }
+        )
+
+        turns = {}
+        for turn in sorted(self.turns):
+            interviews = self.interviews[turn]
+            per_site = {
+                call_site: round(tokens / interviews, 1)
+                for call_site, tokens in self.turns[turn].items()
+            }
+            turns[str(turn)] = {**per_site, "total": round(sum(per_site.values()), 1)}
+
+        return {
+            "total_tokens": total,
+            "call_sites": call_sites,
+            "fields": {
+                field: {"tokens": tokens, "share": round(tokens / total, 4)}
+                for field, tokens in fields.most_common()
+            },
+            "top_contributors": [
+                {
+                    "call_site": call_site,
+                    "field": field,
+                    "tokens": tokens,
+                    "share": round(tokens / total, 4),
+                }
+                for (call_site, field), tokens in contributors.most_common(15)
+            ],
+            "turns": turns,
+        }
+
+
+def profile_game(profile, state):
+    """Prompts of generating a game: cast, story and narration"""
+    from src.agents.story_generator import (
+        _character_messages,
+        _narrator_messages,
+        _story_messages,
+    )
+    from src.models.character import NPC
+    from src.models.story import StoryDetails
+    from src.utils.prompts import (
+        CHARACTER_CREATION_PROMPT,
+        NARRATOR_PROMPT,
+        STORY_CREATION_PROMPT,
+    )
+
+    def structured(call_site, template, values, messages, schema):
+        parts = profile.template(template, values, messages[0].content)
+        parts["instruction message"] += profile.count(messages[1].content)
+        # Structured output sends the schema as a function definition
+        parts["output schema"] += profile.count(json.dumps(schema.model_json_schema()))
+        profile.add(call_site, parts)
+
+    structured(
+        "create_characters",
+        CHARACTER_CREATION_PROMPT,
+        {
+            "environment": state["environment"],
+            "max_characters": state["max_characters"],
+        },
+        _character_messages(state),
+        NPC,
+    )
+    structured(
+        "create_story",
+        STORY_CREATION_PROMPT,
+        {
+            "environment": state["environment"],
+            "characters": "\n".join(c.persona for c in state["characters"]),
+        },
+        _story_messages(state),
+        StoryDetails,
+    )
+
+    story = state["story_details"]
+    messages = _narrator_messages(state)
+    parts = profile.template(
+        NARRATOR_PROMPT,
+        {
+            "victim": story.victim_name,
+            "time": story.time_of_death,
+            "location": story.location_found,
+            "weapon": story.murder_weapon,
+            "cause": story.cause_of_death,
+            "scene": story.crime_scene_details,
+        },
+        messages[0].content,
+    )
+    parts["instruction message"] += profile.count(messages[1].content)
+    profile.add("narrator", parts)
+
+
+def interview_parts(profile, template, values, messages, last_is_question):
+    """Parts of an interview prompt: system prefix, summary and history"""
+    from src.utils.prompts import CONVERSATION_SUMMARY_MESSAGE
+
+    system, summary, *history = messages
+    parts = profile.template(template, values, system.content)
+    parts.update(
+        profile.template(
+            CONVERSATION_SUMMARY_MESSAGE,
+            {"conversation_summary": values["conversation_summary"]},
+            summary.content,
+        )
+    )
+    if last_is_question:
+        *history, question = history
+        parts["question"] += profile.count(question.content)
+    parts["history"] += sum(profile.count(m.content) for m in history)
+    return parts
+
+
+def profile_interview(profile, llm, session, name, turns):
+    """Prompts of an interview where Sherlock AI asks every question"""
+    from src.agents.conversation_handler import (
+        INTERVIEW_PROMPT,
+        _conversation_summary,
+        _interview_input,
+        _introduction_messages,
+        _summary_messages,
+        answer_system_prefix,
+        sherlock_messages,
+    )
+    from src.engine import (
+        answer,
+        interview_state,
+        introduce,
+        next_question,
+        with_question,
+    )
+    from src.utils.context_window import empty_summary, format_entry
+    from src.utils.prompts import (
+        ANSWER_QUESTION_PROMPT,
+        CHARACTER_INTRODUCTION_PROMPT,
+        CONVERSATION_SUMMARY_PROMPT,
+        SHERLOCK_ASK_PROMPT,
+    )
+
+    character = session.character(name)
+    story = session.story
+
+    messages = _introduction_messages(
+        {"character": character.to_model(), "story_details": story.to_model()}
+    )
+    parts = profile.template(
+        CHARACTER_INTRODUCTION_PROMPT,
+        {
+            "subject_persona": character.persona,
+            "victim": story.victim_name,
+            "time": story.time_of_death,
+            "location": story.location_found,
+        },
+        messages[0].content,
+    )
+    parts["instruction message"] += profile.count(messages[1].content)
+    profile.add("character_introduction", parts)
+    introduce(llm, session, name)
+
+    for turn in range(1, turns + 1):
+        profile.interviews[turn] += 1
+        summary = dict(session.summaries.get(name, empty_summary()))
+        conv_state = interview_state(llm, session, name)
+
+        folded = session.transcript(name)[
+            summary["covered"] : session.summaries[name]["covered"]
+        ]
+        if folded:
+            new_exchanges = [format_entry(entry, name) for entry in folded]
+            messages = _summary_messages(character, summary["text"], new_exchanges)
+            parts = profile.template(
+                CONVERSATION_SUMMARY_PROMPT,
+                {
+                    "character_name": character.name,
+                    "previous_summary": summary["text"] or "No notes yet.",
+                    "new_exchanges": "\n".join(new_exchanges),
+                },
+                messages[0].content,
+            )
+            parts["instruction message"] += profile.count(messages[1].content)
+            profile.add("summarize_conversation", parts, turn)
+
+        sherlock_values = {
+            "character_name": character.name,
+            **{
+                field: getattr(story, field)
+                for field in (
+                    "victim_name",
+                    "time_of_death",
+                    "location_found",
+                    "murder_weapon",
+                    "cause_of_death",
+                    "crime_scene_details",
+                    "initial_clues",
+                )
+            },
+            "conversation_summary": _conversation_summary(conv_state),
+        }
+        profile.add(
+            "get_question",
+            interview_parts(
+                profile,
+                SHERLOCK_ASK_PROMPT,
+                sherlock_values,
+                sherlock_messages(conv_state),
+                last_is_question=False,
+            ),
+            turn,
+        )
+
+        question = next_question(llm, conv_state)
+        question_state = with_question(conv_state, question)
+        answer_values = {
+            "subject_persona": character.persona,
+            "victim": story.victim_name,
+            "time": story.time_of_death,
+            "location": story.location_found,
+            "weapon": story.murder_weapon,
+            "cause": story.cause_of_death,
+            "scene": story.crime_scene_details,
+            "npc_brief": story.npc_brief,
+            "conversation_summary": _conversation_summary(question_state),
+        }
+        prompt_input = _interview_input(
+            answer_system_prefix(character, story.to_model()), question_state
+        )
+        profile.add(
+            "answer_question",
+            interview_parts(
+                profile,
+                ANSWER_QUESTION_PROMPT,
+                answer_values,
+                INTERVIEW_PROMPT.invoke(prompt_input).to_messages(),
+                last_is_question=True,
+            ),
+            turn,
+        )
+
+        text = answer(llm, question_state)
+        session.record(name, "sherlock_ai", question)
+        session.record(name, "character", text)
+
+
+def load_games(path, limit):
+    """Game states from the scenario library, up to ``limit``"""
+    from src.utils.scenario_library import scenario_state
+
+    states = []
+    if not os.path.exists(path):
+        return states
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if len(states) >= limit:
+                break
+            try:
+                states.append(scenario_state(json.loads(line), 3))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return states
+
+
+def print_report(report, tokenizer):
+    total = report["total_tokens"]
+    print(f"Input tokens ({tokenizer}): {total}")
+
+    print(f"\n{'call site':<24} {'calls':>6} {'mean':>8} {'tokens':>9} {'share':>7}")
+    for call_site, row in sorted(
+        report["call_sites"].items(), key=lambda item: -item[1]["tokens"]
+    ):
+        print(
+            f"{call_site:<24} {row['calls']:>6} {row['mean_tokens']:>8} "
+            f"{row['tokens']:>9} {row['share']:>7.1%}"
+        )
+
+    print(f"\n{'top contributors':<48} {'tokens':>9} {'share':>7}")
+    for row in report["top_contributors"]:
+        name = f"{row['call_site']} / {row['field']}"
+        print(f"{name:<48} {row['tokens']:>9} {row['share']:>7.1%}")
+
+    print(f"\n{'turn':<6}" + "".join(f"{site:>24}" for site in TURN_CALL_SITES))
+    for turn, row in report["turns"].items():
+        print(
+            f"{turn:<6}"
+            + "".join(f"{row.get(site, 0):>24}" for site in TURN_CALL_SITES)
+        )
+
+
+def regressions(report, baseline, max_increase):
+    """Call sites whose mean prompt grew by more than ``max_increase``"""
+    found = []
+    for call_site, row in report["call_sites"].items():
+        before = baseline["call_sites"].get(call_site)
+        if before and row["mean_tokens"] > before["mean_tokens"] * (1 + max_increase):
+            found.append(
+                f"{call_site}: {before['mean_tokens']} -> {row['mean_tokens']} "
+                f"mean tokens (+{row['mean_tokens'] / before['mean_tokens'] - 1:.1%})"
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=12, help="Turns per interview")
+    parser.add_argument("--interviews", type=int, default=2, help="Suspects per game")
+    parser.add_argument("--library", help="Scenario library to read games from")
+    parser.add_argument("--environment", default="Mistral office in Paris")
+    parser.add_argument("--max-characters", type=int, default=5)
+    parser.add_argument(
+        "--tokenizer", choices=["auto", "tiktoken", "estimate"], default="auto"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare with")
+    parser.add_argument(
+        "--max-increase",
+        type=float,
+        default=0.05,
+        help="Allowed growth of any call site's mean prompt over the baseline",
+    )
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure the backend first
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["FAKE_LLM_LATENCY_MEDIAN"] = "0"
+
+    from config.settings import SCENARIO_LIBRARY_PATH
+    from src.engine import GameSession, main_graph
+    from src.utils.llm_context import create_llm, use_llm
+    from src.workflows.game_graph import build_game_input
+
+    tokenizer, count = token_counter(args.tokenizer)
+    llm = create_llm()
+    states = load_games(args.library or SCENARIO_LIBRARY_PATH, args.games)
+    with use_llm(llm):
+        while len(states) < args.games:
+            environment = f"{args.environment} #{len(states)}"
+            states.append(
+                main_graph().invoke(
+                    build_game_input(environment, args.max_characters, 3)
+                )
+            )
+
+    profile = PromptProfile(count)
+    for state in states:
+        profile_game(profile, state)
+        session = GameSession.from_game_state(state)
+        for suspect in session.suspects[: args.interviews]:
+            profile_interview(profile, llm, session, suspect.name, args.turns)
+
+    report = profile.report()
+    report["tokenizer"] = tokenizer
+    report["games"] = len(states)
+    print_report(report, tokenizer)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("tokenizer") != tokenizer:
+            print(f"\nBaseline was counted with {baseline.get('tokenizer')}")
+        found = regressions(report, baseline, args.max_increase)
+        if found:
+            print(f"\nPrompt size regressions (over +{args.max_increase:.0%}):")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo call site grew by more than {args.max_increase:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+End-to-end latency benchmarks against the deterministic fake chat model.
+
+Times full game generation, single interview turns, Sherlock AI turns and a
+scripted run of the Streamlit app through AppTest, then writes the results as
+JSON so runs can be compared for regressions.
+
+Usage: python -m benchmarks.run_benchmarks [--runs 5] [--output bench_results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fixtures import sample_transcript
+
+
+def summarize(samples):
+    """Summary statistics in seconds for a list of timings"""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean_s": statistics.fmean(ordered),
+        "p50_s": ordered[len(ordered) // 2],
+        "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min_s": ordered[0],
+        "max_s": ordered[-1],
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_main_graph(runs, environment, max_characters):
+    """Full create_characters -> create_story -> narrator runs"""
+    from src.workflows.game_graph import build_main_graph, build_game_input
+
+    graph = build_main_graph()
+    samples = []
+    game_state = None
+    for run in range(runs):
+        game_input = build_game_input(f"{environment} #{run}", max_characters, 3)
+        elapsed, game_state = timed(graph.invoke, game_input)
+        samples.append(elapsed)
+    return summarize(samples), game_state
+
+
+def interview_state(game_state, turns):
+    """Conversation state for a suspect part-way through an interview"""
+    from langchain_core.messages import HumanMessage
+
+    suspect = next(c for c in game_state["characters"] if c.role.lower() != "victim")
+    return {
+        "character": suspect,
+        "story_details": game_state["story_details"],
+        "messages": [
+            HumanMessage(content=entry.content)
+            for entry in sample_transcript(turns)[:-1]
+        ],
+        "conversation_summary": "",
+    }
+
+
+def bench_interview_turn(runs, game_state):
+    """answer_question, blocking and time to first streamed token"""
+    from src.agents.conversation_handler import (
+        answer_question,
+        stream_answer_question,
+    )
+
+    blocking = []
+    first_token = []
+    for turns in range(1, runs + 1):
+        conv_state = interview_state(game_state, turns)
+        blocking.append(timed(answer_question, conv_state)[0])
+
+        start = time.perf_counter()
+        next(stream_answer_question(conv_state))
+        first_token.append(time.perf_counter() - start)
+    return {"blocking": summarize(blocking), "first_token": summarize(first_token)}
+
+
+def bench_sherlock_turn(runs, game_state):
+    """get_question followed by answer_question"""
+    from langchain_core.messages import HumanMessage
+    from src.agents.conversation_handler import answer_question, get_question
+
+    def turn(conv_state):
+        question = get_question(conv_state)
+        conv_state["messages"] = list(conv_state["messages"]) + [
+            HumanMessage(content=question)
+        ]
+        return answer_question(conv_state)
+
+    samples = [
+        timed(turn, interview_state(game_state, turns))[0]
+        for turns in range(1, runs + 1)
+    ]
+    return summarize(samples)
+
+
+def bench_app_script(runs):
+    """Setup page render and a full 'Start New Game' script run"""
+    from streamlit.testing.v1 import AppTest
+
+    first_render = []
+    start_game = []
+    for _ in range(runs):
+        app = AppTest.from_file("app.py", default_timeout=120)
+        elapsed, _ = timed(app.run)
+        first_render.append(elapsed)
+
+        button = next(b for b in app.button if "Start New Game" in b.label)
+        elapsed, _ = timed(button.click().run)
+        start_game.append(elapsed)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+    return {
+        "first_render": summarize(first_render),
+        "start_game": summarize(start_game),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--environment", default="Mistral office in Paris")
+    parser.add_argument("--max-characters", type=int, default=5)
+    parser.add_argument("--latency-median", type=float, default=0.2)
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--invalid-rate",
+        type=float,
+        default=0.0,
+        help="Share of broken casts and stories, to include repair cost",
+    )
+    parser.add_argument("--skip-app", action="store_true", help="Skip AppTest run")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure the backend first
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["FAKE_LLM_LATENCY_MEDIAN"] = str(args.latency_median)
+    os.environ["FAKE_LLM_LATENCY_SIGMA"] = str(args.latency_sigma)
+    os.environ["FAKE_LLM_INVALID_RATE"] = str(args.invalid_rate)
+    # Repeated runs would otherwise be served from the persistent cache
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+
+    from src.utils.llm_context import create_llm, use_llm
+
+    results = {}
+    with use_llm(create_llm()):
+        results["main_graph"], game_state = bench_main_graph(
+            args.runs, args.environment, args.max_characters
+        )
+        results["interview_turn"] = bench_interview_turn(args.runs, game_state)
+        results["sherlock_turn"] = bench_sherlock_turn(args.runs, game_state)
+    if not args.skip_app:
+        results["app_script"] = bench_app_script(args.runs)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "fake_llm": {
+            "seed": args.seed,
+            "latency_median": args.latency_median,
+            "latency_sigma": args.latency_sigma,
+            "invalid_rate": args.invalid_rate,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,17 @@
 Configuration and session state initialization
 """
 
-import streamlit as st
+import os
+import uuid
 
 
 def initialize_session_state():
     """Initialize all session state variables"""
+    # Imported here so the game engine can read settings without Streamlit
+    import streamlit as st
+
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     if "game_state" not in st.session_state:
         st.session_state.game_state = None
     if "current_phase" not in st.session_state:
@@ -23,6 +29,22 @@ def initialize_session_state():
         st.session_state.clues_discovered = []
     if "current_page" not in st.session_state:
         st.session_state.current_page = "crime_scene"
+    if "intro_prefetch" not in st.session_state:
+        st.session_state.intro_prefetch = {}
+    if "conversation_summaries" not in st.session_state:
+        st.session_state.conversation_summaries = {}
+    if "transcript_window" not in st.session_state:
+        st.session_state.transcript_window = {}
+    if "interview_jobs" not in st.session_state:
+        st.session_state.interview_jobs = {}
+    if "interview_queue" not in st.session_state:
+        st.session_state.interview_queue = {}
+    if "question_submissions" not in st.session_state:
+        st.session_state.question_submissions = 0
+    if "sherlock_speculation" not in st.session_state:
+        st.session_state.sherlock_speculation = {}
+    if "new_game_job" not in st.session_state:
+        st.session_state.new_game_job = None
 
 
 # Game constants
@@ -37,3 +59,166 @@ MIN_CHARACTERS = 3
 MAX_CHARACTERS = 8
 MIN_GUESSES = 1
 MAX_GUESSES = 5
+
+# Stream LLM replies into the transcript as they are generated.
+# Set to False to fall back to blocking calls.
+STREAM_RESPONSES = True
+
+# Scenario pool: pre-generated games served on "Start New Game"
+SCENARIO_POOL_ENABLED = True
+SCENARIO_POOL_KEYS = [(DEFAULT_ENVIRONMENT, DEFAULT_MAX_CHARACTERS)]
+SCENARIO_POOL_TARGET_DEPTH = 2
+SCENARIO_POOL_REFILL_THRESHOLD = 1
+SCENARIO_POOL_WORKERS = 2
+SCENARIO_POOL_PROMOTE_AFTER_MISSES = 3
+SCENARIO_POOL_MAX_KEYS = 8
+
+# Library of scenarios generated offline (python -m src.utils.scenario_batch);
+# a stored game for the requested configuration is served before the pool
+SCENARIO_LIBRARY_ENABLED = True
+SCENARIO_LIBRARY_PATH = os.getenv("SCENARIO_LIBRARY_PATH", "scenarios/library.jsonl")
+# A setting with no stored games is served one generated for a similar setting
+# (character n-gram TF-IDF cosine similarity); None only serves exact matches
+SCENARIO_MATCH_THRESHOLD = 0.85
+
+# Generate every suspect's introduction in the background once a game starts
+PREFETCH_INTRODUCTIONS = True
+INTRO_PREFETCH_WORKERS = 8
+
+# Persistent LLM response cache, opted into per call site. Call sites that
+# should produce varied output (e.g. answer_question) stay uncached. Entries
+# are kept per call site route, whichever of its tiers answered.
+# Benchmarks turn it off (LLM_CACHE_ENABLED=0) so every run calls the model.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = ".cache/llm_responses.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+LLM_CACHE_CALL_SITES = {"character_introduction", "narrator"}
+
+# Interview context sent to the model: the latest messages verbatim, older
+# ones folded into a rolling summary in batches, within a token budget
+CONTEXT_TOKEN_BUDGET = 2000
+CONTEXT_RECENT_MESSAGES = 6
+CONTEXT_SUMMARY_BATCH = 4
+
+# Interview transcript rendering: only the latest messages are drawn on each
+# rerun, with earlier ones loaded a page at a time on request
+TRANSCRIPT_PAGE_SIZE = 12
+TRANSCRIPT_HTML_CACHE_SIZE = 4096
+
+# Interview turns run as background jobs so the UI stays responsive; the page
+# polls for results every JOB_POLL_INTERVAL seconds while any are in flight.
+# Each job kind has its own workers, so no kind waits behind another. Interview
+# turns get one per request the scheduler runs at once (LLM_MAX_CONCURRENCY),
+# leaving the scheduler to decide which model request goes first
+JOB_WORKERS = {"new_game": 4, "speculative_question": 2}
+JOB_DEFAULT_WORKERS = 4
+JOB_POLL_INTERVAL = 0.5
+JOB_RETENTION_SECONDS = 600
+
+# Generate Sherlock AI's next question in the background after every answer,
+# so using it only costs the answer call. A question generated for an older
+# transcript is discarded.
+SPECULATIVE_SHERLOCK_QUESTIONS = True
+
+# Chat model backend: "databricks", or "fake" for the deterministic local
+# stand-in used by benchmarks (latency in seconds, log-normal)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "databricks")
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+FAKE_LLM_LATENCY_MEDIAN = float(os.getenv("FAKE_LLM_LATENCY_MEDIAN", "0.5"))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.3"))
+# Share of fake casts and stories generated broken, to exercise repair
+FAKE_LLM_INVALID_RATE = float(os.getenv("FAKE_LLM_INVALID_RATE", "0"))
+
+# Model tiers: a serving endpoint, its sampling temperature, a per-call
+# timeout in seconds (for streamed calls, until the first chunk) and the tier
+# a call moves to when it times out or the endpoint is throttled or
+# overloaded. Each call site is served by a tier; others use the default.
+LLM_TIERS = {
+    "large": {
+        "endpoint": os.getenv("LLM_LARGE_ENDPOINT", "databricks-llama-4-maverick"),
+        "temperature": 0.1,
+        "timeout": 60.0,
+        "fallback": "small",
+    },
+    "small": {
+        "endpoint": os.getenv(
+            "LLM_SMALL_ENDPOINT", "databricks-meta-llama-3-1-8b-instruct"
+        ),
+        "temperature": 0.1,
+        "timeout": 10.0,
+        "fallback": "large",
+    },
+}
+LLM_DEFAULT_TIER = "large"
+LLM_CALL_SITE_TIERS = {
+    "create_characters": "large",
+    "repair_characters": "large",
+    "create_story": "large",
+    "repair_story": "large",
+    "narrator": "large",
+    "answer_question": "large",
+    "summarize_conversation": "small",
+    "character_introduction": "small",
+    "get_question": "small",
+    "speculative_question": "small",
+}
+
+# Hedged requests (opt-in): a call from one of LLM_HEDGE_CALL_SITES that has
+# not produced its first chunk, or its response, within the
+# LLM_HEDGE_PERCENTILE of recent latencies for its call site and tier is sent
+# again. The first response wins and the other request is cancelled. Hedging
+# starts once LLM_HEDGE_MIN_SAMPLES latencies have been seen and adds at most
+# LLM_HEDGE_MAX_EXTRA_LOAD extra requests per request.
+LLM_HEDGE_ENABLED = False
+LLM_HEDGE_CALL_SITES = {"answer_question", "get_question", "character_introduction"}
+LLM_HEDGE_PERCENTILE = 95
+LLM_HEDGE_MIN_SAMPLES = 20
+LLM_HEDGE_MAX_EXTRA_LOAD = 0.05
+
+# Generated casts and stories are validated after each step; faulty characters
+# or story fields are regenerated at most this many times before giving up
+GENERATION_REPAIR_ATTEMPTS = 2
+
+# Model requests from all sessions of this process go through one scheduler.
+# At most LLM_MAX_CONCURRENCY are in flight; the limit is lowered (down to
+# LLM_MIN_CONCURRENCY) when the endpoint throttles or responses take
+# LLM_CONGESTION_LATENCY_FACTOR times longer than usual, and raised again
+# while it keeps up. Requests and estimated tokens (prompt plus
+# LLM_EXPECTED_OUTPUT_TOKENS) per minute are capped too; 0 means no cap.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MIN_CONCURRENCY = 2
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_EXPECTED_OUTPUT_TOKENS = 300
+LLM_CONGESTION_LATENCY_FACTOR = 3.0
+
+# Queued requests are started by priority class: "interactive", then
+# "creation", then "background". Prefetching and pre-generation always run as
+# background; other call sites default to "creation".
+LLM_CALL_SITE_PRIORITIES = {
+    "answer_question": "interactive",
+    "get_question": "interactive",
+    "character_introduction": "interactive",
+    "summarize_conversation": "interactive",
+    "create_characters": "creation",
+    "repair_characters": "creation",
+    "create_story": "creation",
+    "repair_story": "creation",
+    "narrator": "creation",
+    "speculative_question": "background",
+}
+
+# A model request repeated for the same session while an identical one is
+# still running (a rerun or a double click) waits for the first one's
+# response instead of calling the endpoint again. Only requests tagged with
+# the same session and game are coalesced.
+LLM_COALESCE_ENABLED = True
+
+# Timing and token metrics for LLM calls, graph nodes and script runs,
+# appended to a rotating JSONL file
+METRICS_ENABLED = True
+METRICS_LOG_PATH = "logs/metrics.jsonl"
+METRICS_LOG_MAX_BYTES = 10 * 1024 * 1024
+METRICS_LOG_BACKUPS = 5
+METRICS_SESSION_HISTORY = 500
@@ -2,20 +2,83 @@
 Conversation handling agents for character interactions
 """
 
-import streamlit as st
+from functools import lru_cache
+
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from src.models.state import ConversationState
+from src.utils.llm_context import get_llm
 from src.utils.prompts import (
     CHARACTER_INTRODUCTION_PROMPT,
     SHERLOCK_ASK_PROMPT,
+    CONVERSATION_SUMMARY_PROMPT,
     ANSWER_QUESTION_PROMPT,
+    CONVERSATION_SUMMARY_MESSAGE,
 )
 
+# Compiled once. The system prefix is substituted as a value, so it is never
+# re-parsed as a template and stays byte-identical across turns.
+INTERVIEW_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", "{system_prefix}"),
+        ("human", CONVERSATION_SUMMARY_MESSAGE),
+        MessagesPlaceholder(variable_name="messages"),
+    ]
+)
 
-def character_introduction(state: ConversationState):
-    """Generate character introduction"""
+
+@lru_cache(maxsize=256)
+def _sherlock_prefix(character_name, story_items):
+    story = dict(story_items)
+    return SHERLOCK_ASK_PROMPT.format(
+        character_name=character_name,
+        victim_name=story["victim_name"],
+        time_of_death=story["time_of_death"],
+        location_found=story["location_found"],
+        murder_weapon=story["murder_weapon"],
+        cause_of_death=story["cause_of_death"],
+        crime_scene_details=story["crime_scene_details"],
+        initial_clues=story["initial_clues"],
+    )
+
+
+@lru_cache(maxsize=256)
+def _answer_prefix(persona, story_items):
+    story = dict(story_items)
+    return ANSWER_QUESTION_PROMPT.format(
+        subject_persona=persona,
+        victim=story["victim_name"],
+        time=story["time_of_death"],
+        location=story["location_found"],
+        weapon=story["murder_weapon"],
+        cause=story["cause_of_death"],
+        scene=story["crime_scene_details"],
+        npc_brief=story["npc_brief"],
+    )
+
+
+def sherlock_system_prefix(character, story):
+    """Stable system prompt for Sherlock interviewing this character"""
+    return _sherlock_prefix(character.name, tuple(story.model_dump().items()))
+
+
+def answer_system_prefix(character, story):
+    """Stable system prompt for this character answering questions"""
+    return _answer_prefix(character.persona, tuple(story.model_dump().items()))
+
+
+def _interview_input(system_prefix, state: ConversationState):
+    """Prompt input with the stable prefix first and per-turn parts after it"""
+    return {
+        "system_prefix": system_prefix,
+        "conversation_summary": _conversation_summary(state),
+        "messages": state["messages"],
+    }
+
+
+def _introduction_messages(state: ConversationState):
+    """Build the message list for a character introduction"""
     character = state["character"]
     story = state["story_details"]
 
@@ -26,46 +89,98 @@ def character_introduction(state: ConversationState):
         location=story.location_found,
     )
 
-    narration = st.session_state.llm.invoke(
-        [
-            SystemMessage(content=system_message),
-            HumanMessage(content="Introduce yourself to Sherlock Holmes"),
-        ]
+    return [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Introduce yourself to Sherlock Holmes"),
+    ]
+
+
+def character_introduction(state: ConversationState):
+    """Generate character introduction"""
+    narration = get_llm("character_introduction").invoke(_introduction_messages(state))
+
+    return {"messages": [narration]}
+
+
+def stream_character_introduction(state: ConversationState):
+    """Stream the character introduction as text chunks"""
+    for chunk in get_llm("character_introduction").stream(
+        _introduction_messages(state)
+    ):
+        if chunk.content:
+            yield chunk.content
+
+
+async def acharacter_introduction(state: ConversationState):
+    """Generate character introduction without blocking the event loop"""
+    narration = await get_llm("character_introduction").ainvoke(
+        _introduction_messages(state)
     )
 
     return {"messages": [narration]}
 
 
-def get_question(state: ConversationState):
-    """Generate Sherlock Holmes question"""
-    messages = state["messages"]
-    character = state["character"]
-    story = state["story_details"]
+async def astream_character_introduction(state: ConversationState):
+    """Stream the character introduction as text chunks, asynchronously"""
+    async for chunk in get_llm("character_introduction").astream(
+        _introduction_messages(state)
+    ):
+        if chunk.content:
+            yield chunk.content
 
-    system_message = SHERLOCK_ASK_PROMPT.format(
+
+def _conversation_summary(state: ConversationState):
+    """Summary of the turns no longer sent verbatim"""
+    return state.get("conversation_summary") or "No earlier conversation."
+
+
+def _summary_messages(character, previous_summary, new_exchanges):
+    """Build the message list for updating the interview summary"""
+    system_message = CONVERSATION_SUMMARY_PROMPT.format(
         character_name=character.name,
-        victim_name=story.victim_name,
-        time_of_death=story.time_of_death,
-        location_found=story.location_found,
-        murder_weapon=story.murder_weapon,
-        cause_of_death=story.cause_of_death,
-        crime_scene_details=story.crime_scene_details,
-        initial_clues=story.initial_clues,
-        conversation_history="\n".join(
-            [f"{msg.type}: {msg.content}" for msg in messages]
-        ),
+        previous_summary=previous_summary or "No notes yet.",
+        new_exchanges="\n".join(new_exchanges),
     )
 
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_message),
-            MessagesPlaceholder(variable_name="messages"),
-        ]
+    return [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Write the updated notes"),
+    ]
+
+
+def summarize_conversation(character, previous_summary, new_exchanges):
+    """Fold new transcript lines into the running interview summary"""
+    summary = get_llm("summarize_conversation").invoke(
+        _summary_messages(character, previous_summary, new_exchanges)
+    )
+
+    return summary.content
+
+
+async def asummarize_conversation(character, previous_summary, new_exchanges):
+    """Fold new transcript lines into the summary without blocking"""
+    summary = await get_llm("summarize_conversation").ainvoke(
+        _summary_messages(character, previous_summary, new_exchanges)
     )
 
-    chain = prompt | st.session_state.llm
-    question = chain.invoke(messages)
+    return summary.content
 
+
+def sherlock_messages(state: ConversationState):
+    """Build the message list for Sherlock Holmes' next question"""
+    prefix = sherlock_system_prefix(state["character"], state["story_details"])
+    return INTERVIEW_PROMPT.invoke(_interview_input(prefix, state)).to_messages()
+
+
+def get_question(state: ConversationState, call_site="get_question"):
+    """Generate Sherlock Holmes question"""
+    question = get_llm(call_site).invoke(sherlock_messages(state))
+    return question.content
+
+
+async def aget_question(state: ConversationState, call_site="get_question"):
+    """Generate Sherlock Holmes question without blocking the event loop"""
+    question = await get_llm(call_site).ainvoke(sherlock_messages(state))
     return question.content
 
 
@@ -74,38 +189,52 @@ def ask_question(state: ConversationState):
     return {"messages": []}
 
 
-def answer_question(state: ConversationState):
-    """Generate character's answer"""
-    messages = state["messages"]
+async def aask_question(state: ConversationState):
+    """Async counterpart of ask_question for async graph runs"""
+    return ask_question(state)
+
+
+def _answer_chain(state: ConversationState):
+    """Build the prompt chain and input used to answer the last question"""
     character = state["character"]
-    last_message = messages[-1]
     story = state["story_details"]
 
-    system_message = ANSWER_QUESTION_PROMPT.format(
-        subject_persona=character.persona,
-        victim=story.victim_name,
-        time=story.time_of_death,
-        location=story.location_found,
-        weapon=story.murder_weapon,
-        cause=story.cause_of_death,
-        scene=story.crime_scene_details,
-        npc_brief=story.npc_brief,
-        question=last_message.content,
-    )
+    chain = INTERVIEW_PROMPT | get_llm("answer_question")
+    return chain, _interview_input(answer_system_prefix(character, story), state)
 
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", system_message),
-            MessagesPlaceholder(variable_name="messages"),
-        ]
-    )
 
-    chain = prompt | st.session_state.llm
-    answer = chain.invoke(messages)
+def answer_question(state: ConversationState):
+    """Generate character's answer"""
+    chain, prompt_input = _answer_chain(state)
+    answer = chain.invoke(prompt_input)
 
     return {"messages": [answer]}
 
 
+def stream_answer_question(state: ConversationState):
+    """Stream the character's answer as text chunks"""
+    chain, prompt_input = _answer_chain(state)
+    for chunk in chain.stream(prompt_input):
+        if chunk.content:
+            yield chunk.content
+
+
+async def aanswer_question(state: ConversationState):
+    """Generate character's answer without blocking the event loop"""
+    chain, prompt_input = _answer_chain(state)
+    answer = await chain.ainvoke(prompt_input)
+
+    return {"messages": [answer]}
+
+
+async def astream_answer_question(state: ConversationState):
+    """Stream the character's answer as text chunks, asynchronously"""
+    chain, prompt_input = _answer_chain(state)
+    async for chunk in chain.astream(prompt_input):
+        if chunk.content:
+            yield chunk.content
+
+
 def where_to_go(state: ConversationState):
     """Determine conversation flow"""
     messages = state["messages"]
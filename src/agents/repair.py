@@ -0,0 +1,317 @@
+"""
+Validation and targeted repair of generated casts and stories
+"""
+
+import random
+import time
+
+from langchain_core.messages import SystemMessage, HumanMessage
+from pydantic import Field, create_model
+
+from config.settings import (
+    KILLER_ROLE,
+    VICTIM_ROLE,
+    GENERATION_REPAIR_ATTEMPTS,
+    METRICS_ENABLED,
+)
+from src.models.state import GenerateGameState
+from src.models.character import NPC
+from src.models.story import StoryDetails
+from src.utils.llm_context import get_llm
+from src.utils.metrics import current_tags, get_metrics_recorder
+from src.utils.prompts import CHARACTER_REPAIR_PROMPT, STORY_REPAIR_PROMPT
+
+SUPPORTING_ROLE = "suspect"
+
+
+def split_cast(characters, max_characters):
+    """Split a cast into the characters to keep and the roles still missing.
+
+    Keeps, in their original order, the first killer, the first victim and
+    up to ``max_characters - 2`` other characters with a unique name and a
+    backstory. Returns ``(kept, missing_roles, problems)``.
+    """
+    kept = []
+    problems = []
+    names = set()
+    roles = {KILLER_ROLE: 0, VICTIM_ROLE: 0}
+    supporting_slots = max_characters - len(roles)
+    supporting = 0
+
+    for character in characters:
+        role = character.role.strip().lower()
+        name = character.name.strip()
+        if not name or not character.backstory.strip():
+            problems.append(f"blank name or backstory ({character.role})")
+            continue
+        if name.lower() in names:
+            problems.append(f"duplicate name {name}")
+            continue
+
+        if role in roles:
+            if roles[role]:
+                problems.append(f"extra {role} {name}")
+                continue
+            roles[role] += 1
+            character = character.model_copy(update={"role": role})
+        elif supporting < supporting_slots:
+            supporting += 1
+        else:
+            problems.append(f"extra character {name}")
+            continue
+
+        names.add(name.lower())
+        kept.append(character)
+
+    missing_roles = [role for role, count in roles.items() if not count]
+    missing_roles += [SUPPORTING_ROLE] * (supporting_slots - supporting)
+    if missing_roles:
+        problems.append(f"missing {', '.join(missing_roles)}")
+    return kept, missing_roles, problems
+
+
+def find_victim(characters):
+    """The first character whose role is the victim's, in any case"""
+    return next((c for c in characters if c.role.strip().lower() == VICTIM_ROLE), None)
+
+
+def story_problems(story, characters):
+    """Names of blank StoryDetails fields and whether the victim is misnamed"""
+    blank = [name for name, value in story.model_dump().items() if not value.strip()]
+    victim = find_victim(characters)
+    misnamed = victim is not None and story.victim_name.strip() != victim.name
+    return blank, misnamed
+
+
+def record_repair(stage, problems, attempts, repaired, started):
+    """Record one repair of a generation step"""
+    if METRICS_ENABLED:
+        get_metrics_recorder().record(
+            "repair",
+            stage,
+            time.perf_counter() - started,
+            tags=current_tags(),
+            problems=problems,
+            attempts=attempts,
+            repaired=repaired,
+        )
+
+
+def _character_request(environment, existing, roles, problems):
+    """Structured model and messages asking for characters with these roles"""
+    structured_llm = get_llm("repair_characters").with_structured_output(
+        schema=NPC, method="function_calling"
+    )
+
+    system_message = CHARACTER_REPAIR_PROMPT.format(
+        environment=environment,
+        existing_characters="\n".join(char.persona for char in existing),
+        problems="\n".join(f"- {problem}" for problem in problems),
+        count=len(roles),
+        roles=", ".join(roles),
+    )
+
+    messages = [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Generate the missing characters"),
+    ]
+    return structured_llm, messages
+
+
+def _generate_characters(environment, existing, roles, problems):
+    """Ask the model for new characters with the given roles only"""
+    structured_llm, messages = _character_request(
+        environment, existing, roles, problems
+    )
+    return structured_llm.invoke(messages).characters
+
+
+async def _agenerate_characters(environment, existing, roles, problems):
+    """Ask the model for new characters with the given roles only"""
+    structured_llm, messages = _character_request(
+        environment, existing, roles, problems
+    )
+    return (await structured_llm.ainvoke(messages)).characters
+
+
+def _story_request(environment, characters, story, fields, problems):
+    """Structured model and messages asking for these StoryDetails fields"""
+    schema = create_model(
+        "StoryDetailsRepair",
+        **{
+            name: (str, Field(description=StoryDetails.model_fields[name].description))
+            for name in fields
+        },
+    )
+    structured_llm = get_llm("repair_story").with_structured_output(
+        schema=schema, method="function_calling"
+    )
+
+    existing = story.model_dump(exclude=set(fields))
+    system_message = STORY_REPAIR_PROMPT.format(
+        environment=environment,
+        characters="\n".join(char.persona for char in characters),
+        story_details="\n".join(f"{k}: {v}" for k, v in existing.items()),
+        problems="\n".join(f"- {problem}" for problem in problems),
+        missing_fields="\n".join(
+            f"- {name}: {StoryDetails.model_fields[name].description}"
+            for name in fields
+        ),
+    )
+
+    messages = [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Generate the missing scenario details"),
+    ]
+    return structured_llm, messages
+
+
+def _generate_story_fields(environment, characters, story, fields, problems):
+    """Ask the model for the given StoryDetails fields only"""
+    structured_llm, messages = _story_request(
+        environment, characters, story, fields, problems
+    )
+    return structured_llm.invoke(messages).model_dump()
+
+
+async def _agenerate_story_fields(environment, characters, story, fields, problems):
+    """Ask the model for the given StoryDetails fields only"""
+    structured_llm, messages = _story_request(
+        environment, characters, story, fields, problems
+    )
+    return (await structured_llm.ainvoke(messages)).model_dump()
+
+
+def repair_characters(state: GenerateGameState):
+    """Validate the cast and regenerate only the characters it lacks"""
+    started = time.perf_counter()
+    characters, missing_roles, problems = split_cast(
+        state["characters"], state["max_characters"]
+    )
+    if not problems:
+        return _normalized_cast(state["characters"], characters)
+
+    # Each attempt is told what was wrong with the previous one
+    attempts = 0
+    latest_problems = problems
+    while missing_roles and attempts < GENERATION_REPAIR_ATTEMPTS:
+        attempts += 1
+        new_characters = _generate_characters(
+            state["environment"], characters, missing_roles, latest_problems
+        )
+        characters, missing_roles, latest_problems = split_cast(
+            characters + new_characters, state["max_characters"]
+        )
+
+    return _repaired_cast(characters, missing_roles, problems, attempts, started)
+
+
+async def arepair_characters(state: GenerateGameState):
+    """Validate the cast and regenerate only the characters it lacks"""
+    started = time.perf_counter()
+    characters, missing_roles, problems = split_cast(
+        state["characters"], state["max_characters"]
+    )
+    if not problems:
+        return _normalized_cast(state["characters"], characters)
+
+    attempts = 0
+    latest_problems = problems
+    while missing_roles and attempts < GENERATION_REPAIR_ATTEMPTS:
+        attempts += 1
+        new_characters = await _agenerate_characters(
+            state["environment"], characters, missing_roles, latest_problems
+        )
+        characters, missing_roles, latest_problems = split_cast(
+            characters + new_characters, state["max_characters"]
+        )
+
+    return _repaired_cast(characters, missing_roles, problems, attempts, started)
+
+
+def _normalized_cast(characters, kept):
+    """A valid cast with roles in split_cast's lower case, if that changed any"""
+    if kept == characters:
+        return {}
+    return {"characters": kept}
+
+
+def _repaired_cast(characters, missing_roles, problems, attempts, started):
+    record_repair("characters", problems, attempts, not missing_roles, started)
+    if missing_roles:
+        raise ValueError(
+            f"Could not repair the cast after {attempts} attempts: "
+            f"missing {', '.join(missing_roles)}"
+        )
+
+    random.shuffle(characters)
+    return {"characters": characters}
+
+
+def _story_to_repair(state: GenerateGameState):
+    """The story with a misnamed victim fixed, its blank fields and problems"""
+    story = state["story_details"]
+    characters = state["characters"]
+    blank, misnamed = story_problems(story, characters)
+
+    problems = [f"blank {name}" for name in blank]
+    if misnamed:
+        problems.append("victim_name does not match the cast")
+        victim = find_victim(characters)
+        story = story.model_copy(update={"victim_name": victim.name})
+    return story, blank, problems
+
+
+def repair_story(state: GenerateGameState):
+    """Validate the story and regenerate only its blank fields"""
+    started = time.perf_counter()
+    story, blank, problems = _story_to_repair(state)
+    if not problems:
+        return {}
+
+    characters = state["characters"]
+    attempts = 0
+    latest_problems = problems
+    while blank and attempts < GENERATION_REPAIR_ATTEMPTS:
+        attempts += 1
+        fields = _generate_story_fields(
+            state["environment"], characters, story, blank, latest_problems
+        )
+        story = story.model_copy(update=fields)
+        blank, _ = story_problems(story, characters)
+        latest_problems = [f"still blank {name}" for name in blank]
+
+    return _repaired_story(story, blank, problems, attempts, started)
+
+
+async def arepair_story(state: GenerateGameState):
+    """Validate the story and regenerate only its blank fields"""
+    started = time.perf_counter()
+    story, blank, problems = _story_to_repair(state)
+    if not problems:
+        return {}
+
+    characters = state["characters"]
+    attempts = 0
+    latest_problems = problems
+    while blank and attempts < GENERATION_REPAIR_ATTEMPTS:
+        attempts += 1
+        fields = await _agenerate_story_fields(
+            state["environment"], characters, story, blank, latest_problems
+        )
+        story = story.model_copy(update=fields)
+        blank, _ = story_problems(story, characters)
+        latest_problems = [f"still blank {name}" for name in blank]
+
+    return _repaired_story(story, blank, problems, attempts, started)
+
+
+def _repaired_story(story, blank, problems, attempts, started):
+    record_repair("story", problems, attempts, not blank, started)
+    if blank:
+        raise ValueError(
+            f"Could not repair the story after {attempts} attempts: "
+            f"blank {', '.join(blank)}"
+        )
+
+    return {"story_details": story}
@@ -2,13 +2,13 @@
 Story and character generation agents
 """
 
-import streamlit as st
 import random
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from src.models.state import GenerateGameState
 from src.models.character import NPC
 from src.models.story import StoryDetails
+from src.utils.llm_context import get_llm
 from src.utils.prompts import (
     CHARACTER_CREATION_PROMPT,
     STORY_CREATION_PROMPT,
@@ -16,59 +16,81 @@ from src.utils.prompts import (
 )
 
 
-def create_characters(state: GenerateGameState):
-    """Create game characters"""
-    environment = state["environment"]
-    max_characters = state["max_characters"]
-
-    structured_llm = st.session_state.llm.with_structured_output(
-        schema=NPC, method="function_calling"
-    )
-
+def _character_messages(state: GenerateGameState):
+    """Build the message list for creating the cast"""
     system_message = CHARACTER_CREATION_PROMPT.format(
-        environment=environment, max_characters=max_characters
+        environment=state["environment"], max_characters=state["max_characters"]
     )
 
-    result = structured_llm.invoke(
-        [
-            SystemMessage(content=system_message),
-            HumanMessage(content="Generate the set of characters"),
-        ]
-    )
+    return [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Generate the set of characters"),
+    ]
+
 
+def _shuffled_characters(result):
     characters = result.characters.copy()
     random.shuffle(characters)
 
     return {"characters": characters}
 
 
-def create_story(state: GenerateGameState):
-    """Create murder mystery story"""
-    environment = state["environment"]
-    characters = state["characters"]
+def create_characters(state: GenerateGameState):
+    """Create game characters"""
+    structured_llm = get_llm("create_characters").with_structured_output(
+        schema=NPC, method="function_calling"
+    )
 
-    character_list = "\n".join([char.persona for char in characters])
+    result = structured_llm.invoke(_character_messages(state))
+    return _shuffled_characters(result)
 
-    structured_llm = st.session_state.llm.with_structured_output(
-        schema=StoryDetails, method="function_calling"
+
+async def acreate_characters(state: GenerateGameState):
+    """Create game characters without blocking the event loop"""
+    structured_llm = get_llm("create_characters").with_structured_output(
+        schema=NPC, method="function_calling"
     )
 
+    result = await structured_llm.ainvoke(_character_messages(state))
+    return _shuffled_characters(result)
+
+
+def _story_messages(state: GenerateGameState):
+    """Build the message list for creating the story"""
+    character_list = "\n".join([char.persona for char in state["characters"]])
+
     system_message = STORY_CREATION_PROMPT.format(
-        environment=environment, characters=character_list
+        environment=state["environment"], characters=character_list
+    )
+
+    return [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Generate the murder mystery scenario"),
+    ]
+
+
+def create_story(state: GenerateGameState):
+    """Create murder mystery story"""
+    structured_llm = get_llm("create_story").with_structured_output(
+        schema=StoryDetails, method="function_calling"
     )
 
-    result = structured_llm.invoke(
-        [
-            SystemMessage(content=system_message),
-            HumanMessage(content="Generate the murder mystery scenario"),
-        ]
+    result = structured_llm.invoke(_story_messages(state))
+    return {"story_details": result}
+
+
+async def acreate_story(state: GenerateGameState):
+    """Create murder mystery story without blocking the event loop"""
+    structured_llm = get_llm("create_story").with_structured_output(
+        schema=StoryDetails, method="function_calling"
     )
 
+    result = await structured_llm.ainvoke(_story_messages(state))
     return {"story_details": result}
 
 
-def narrator(state: GenerateGameState):
-    """Generate Dr. Watson's narration"""
+def _narrator_messages(state: GenerateGameState):
+    """Build the message list for Dr. Watson's narration"""
     story = state["story_details"]
 
     system_message = NARRATOR_PROMPT.format(
@@ -80,11 +102,21 @@ def narrator(state: GenerateGameState):
         scene=story.crime_scene_details,
     )
 
-    narration = st.session_state.llm.invoke(
-        [
-            SystemMessage(content=system_message),
-            HumanMessage(content="Create an atmospheric narration of the crime scene"),
-        ]
-    )
+    return [
+        SystemMessage(content=system_message),
+        HumanMessage(content="Create an atmospheric narration of the crime scene"),
+    ]
+
+
+def narrator(state: GenerateGameState):
+    """Generate Dr. Watson's narration"""
+    narration = get_llm("narrator").invoke(_narrator_messages(state))
+
+    return {"messages": [narration]}
+
+
+async def anarrator(state: GenerateGameState):
+    """Generate Dr. Watson's narration without blocking the event loop"""
+    narration = await get_llm("narrator").ainvoke(_narrator_messages(state))
 
     return {"messages": [narration]}
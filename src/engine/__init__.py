@@ -0,0 +1,48 @@
+"""Headless game engine: game actions on explicit state with an injected model"""
+
+from .session import Accusation, GameSession
+from .api import (
+    main_graph,
+    new_game,
+    anew_game,
+    interview_state,
+    ainterview_state,
+    introduction,
+    aintroduction,
+    next_question,
+    anext_question,
+    answer,
+    aanswer,
+    with_question,
+    introduce,
+    aintroduce,
+    ask,
+    aask,
+    sherlock_ask,
+    asherlock_ask,
+    accuse,
+)
+
+__all__ = [
+    "Accusation",
+    "GameSession",
+    "main_graph",
+    "new_game",
+    "anew_game",
+    "interview_state",
+    "ainterview_state",
+    "introduction",
+    "aintroduction",
+    "next_question",
+    "anext_question",
+    "answer",
+    "aanswer",
+    "with_question",
+    "introduce",
+    "aintroduce",
+    "ask",
+    "aask",
+    "sherlock_ask",
+    "asherlock_ask",
+    "accuse",
+]
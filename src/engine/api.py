@@ -0,0 +1,350 @@
+"""
+Game actions, with the chat model passed in by the caller
+"""
+
+import time
+from functools import lru_cache
+
+from langchain_core.messages import HumanMessage
+
+from config.settings import (
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_RECENT_MESSAGES,
+    CONTEXT_SUMMARY_BATCH,
+)
+from src.agents.conversation_handler import (
+    character_introduction,
+    acharacter_introduction,
+    stream_character_introduction,
+    astream_character_introduction,
+    get_question,
+    aget_question,
+    answer_question,
+    aanswer_question,
+    stream_answer_question,
+    astream_answer_question,
+    summarize_conversation,
+    asummarize_conversation,
+)
+from src.engine.session import Accusation, GameSession
+from src.utils.context_window import (
+    build_context,
+    context_split,
+    empty_summary,
+    format_entry,
+)
+from src.utils.llm_context import use_llm
+from src.utils.metrics import graph_config, metrics_tags
+from src.workflows.game_graph import build_game_input, build_main_graph
+
+
+@lru_cache(maxsize=None)
+def main_graph():
+    """Return the compiled game generation graph shared by every caller"""
+    return build_main_graph()
+
+
+def _generate(chunks, on_text):
+    """Join streamed chunks, reporting the text so far after each one"""
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        on_text(text)
+    return text
+
+
+async def _agenerate(chunks, on_text):
+    """Join chunks streamed asynchronously, reporting the text so far"""
+    text = ""
+    async for chunk in chunks:
+        text += chunk
+        on_text(text)
+    return text
+
+
+def _merge_update(state, output):
+    """Fold one node's output into the accumulated game state"""
+    for key, value in (output or {}).items():
+        if key == "messages":
+            state["messages"] = list(state["messages"]) + list(value)
+        else:
+            state[key] = value
+
+
+def new_game(llm, environment, max_characters, num_guesses, on_step=None):
+    """Generate a game and start a session for it.
+
+    ``on_step(node, state)`` is called after each step of the main graph with
+    the game state accumulated so far.
+    """
+    game_input = build_game_input(environment, max_characters, num_guesses)
+    tags = {"game_id": game_input["game_id"]}
+    state = dict(game_input)
+
+    with use_llm(llm), metrics_tags(**tags):
+        for update in main_graph().stream(game_input, config=graph_config(**tags)):
+            for node, output in update.items():
+                if node == "__end__":
+                    # Some LangGraph versions also emit the final state
+                    state = output
+                    continue
+
+                _merge_update(state, output)
+                if on_step is not None:
+                    on_step(node, state)
+
+    return GameSession.from_game_state(state)
+
+
+async def anew_game(llm, environment, max_characters, num_guesses, on_step=None):
+    """Async counterpart of new_game, running the graph with astream"""
+    game_input = build_game_input(environment, max_characters, num_guesses)
+    tags = {"game_id": game_input["game_id"]}
+    state = dict(game_input)
+
+    with use_llm(llm), metrics_tags(**tags):
+        async for update in main_graph().astream(
+            game_input, config=graph_config(**tags)
+        ):
+            for node, output in update.items():
+                if node == "__end__":
+                    state = output
+                    continue
+
+                _merge_update(state, output)
+                if on_step is not None:
+                    on_step(node, state)
+
+    return GameSession.from_game_state(state)
+
+
+def interview_state(llm, session, name):
+    """Conversation state for the next turn of an interview.
+
+    Older turns are folded into the interview's rolling summary, which may
+    call the model; the most recent turns are sent verbatim.
+    """
+    character = session.character(name)
+
+    def summarize(previous_summary, entries):
+        with use_llm(llm):
+            return summarize_conversation(
+                character,
+                previous_summary,
+                [format_entry(entry, name) for entry in entries],
+            )
+
+    summary, recent = build_context(
+        session.transcript(name),
+        session.summaries.get(name, empty_summary()),
+        summarize,
+        token_budget=CONTEXT_TOKEN_BUDGET,
+        recent_messages=CONTEXT_RECENT_MESSAGES,
+        summary_batch=CONTEXT_SUMMARY_BATCH,
+    )
+    return _conversation_state(session, name, summary, recent)
+
+
+async def ainterview_state(llm, session, name):
+    """Async counterpart of interview_state"""
+    transcript = session.transcript(name)
+    summary = session.summaries.get(name, empty_summary())
+    covered = summary["covered"]
+    keep_from = context_split(
+        transcript,
+        summary,
+        token_budget=CONTEXT_TOKEN_BUDGET,
+        recent_messages=CONTEXT_RECENT_MESSAGES,
+        summary_batch=CONTEXT_SUMMARY_BATCH,
+    )
+
+    if keep_from > covered:
+        with use_llm(llm):
+            text = await asummarize_conversation(
+                session.character(name),
+                summary["text"],
+                [format_entry(entry, name) for entry in transcript[covered:keep_from]],
+            )
+        summary = {"text": text, "covered": keep_from}
+
+    return _conversation_state(session, name, summary, transcript[keep_from:])
+
+
+def _conversation_state(session, name, summary, recent):
+    session.summaries[name] = summary
+    return {
+        "character": session.character(name).to_model(),
+        "story_details": session.story.to_model(),
+        "messages": [HumanMessage(content=entry.content) for entry in recent],
+        "conversation_summary": summary["text"],
+    }
+
+
+def introduction(llm, session, name, on_text=None):
+    """Generate a character's introduction without recording it.
+
+    With ``on_text`` the reply is streamed and ``on_text`` is called with
+    the text generated so far.
+    """
+    conv_state = _introduction_state(session, name)
+    with use_llm(llm):
+        if on_text is not None:
+            return _generate(stream_character_introduction(conv_state), on_text)
+        return character_introduction(conv_state)["messages"][0].content
+
+
+async def aintroduction(llm, session, name, on_text=None):
+    """Async counterpart of introduction"""
+    conv_state = _introduction_state(session, name)
+    with use_llm(llm):
+        if on_text is not None:
+            return await _agenerate(astream_character_introduction(conv_state), on_text)
+        result = await acharacter_introduction(conv_state)
+        return result["messages"][0].content
+
+
+def _introduction_state(session, name):
+    return {
+        "character": session.character(name).to_model(),
+        "story_details": session.story.to_model(),
+        "messages": [],
+    }
+
+
+def next_question(llm, conv_state, call_site="get_question"):
+    """Sherlock Holmes' next question for a conversation state"""
+    with use_llm(llm):
+        return get_question(conv_state, call_site=call_site)
+
+
+async def anext_question(llm, conv_state, call_site="get_question"):
+    """Async counterpart of next_question"""
+    with use_llm(llm):
+        return await aget_question(conv_state, call_site=call_site)
+
+
+def answer(llm, conv_state, on_text=None):
+    """The character's answer to the last question of a conversation state"""
+    with use_llm(llm):
+        if on_text is not None:
+            return _generate(stream_answer_question(conv_state), on_text)
+        return answer_question(conv_state)["messages"][0].content
+
+
+async def aanswer(llm, conv_state, on_text=None):
+    """Async counterpart of answer"""
+    with use_llm(llm):
+        if on_text is not None:
+            return await _agenerate(astream_answer_question(conv_state), on_text)
+        result = await aanswer_question(conv_state)
+        return result["messages"][0].content
+
+
+def with_question(conv_state, question):
+    """A copy of a conversation state with one more question asked"""
+    return {
+        **conv_state,
+        "messages": list(conv_state["messages"]) + [HumanMessage(content=question)],
+    }
+
+
+def introduce(llm, session, name, on_text=None):
+    """Start an interview; returns the introduction, generating it once"""
+    transcript = session.transcript(name)
+    if transcript:
+        return transcript[0].content
+
+    text = introduction(llm, session, name, on_text)
+    session.record(name, "character", text)
+    return text
+
+
+async def aintroduce(llm, session, name, on_text=None):
+    """Async counterpart of introduce"""
+    transcript = session.transcript(name)
+    if transcript:
+        return transcript[0].content
+
+    text = await aintroduction(llm, session, name, on_text)
+    session.record(name, "character", text)
+    return text
+
+
+def ask(llm, session, name, question, on_text=None):
+    """Ask a character the player's question and return the answer"""
+    introduce(llm, session, name)
+    session.record(name, "player", question)
+    text = answer(llm, interview_state(llm, session, name), on_text)
+    session.record(name, "character", text)
+    return text
+
+
+async def aask(llm, session, name, question, on_text=None):
+    """Async counterpart of ask"""
+    await aintroduce(llm, session, name)
+    session.record(name, "player", question)
+    text = await aanswer(llm, await ainterview_state(llm, session, name), on_text)
+    session.record(name, "character", text)
+    return text
+
+
+def sherlock_ask(llm, session, name, on_text=None):
+    """Let Sherlock AI ask the next question; returns (question, answer)"""
+    introduce(llm, session, name)
+    conv_state = interview_state(llm, session, name)
+    question = next_question(llm, conv_state)
+    text = answer(llm, with_question(conv_state, question), on_text)
+    session.record(name, "sherlock_ai", question)
+    session.record(name, "character", text)
+    return question, text
+
+
+async def asherlock_ask(llm, session, name, on_text=None):
+    """Async counterpart of sherlock_ask"""
+    await aintroduce(llm, session, name)
+    conv_state = await ainterview_state(llm, session, name)
+    question = await anext_question(llm, conv_state)
+    text = await aanswer(llm, with_question(conv_state, question), on_text)
+    session.record(name, "sherlock_ai", question)
+    session.record(name, "character", text)
+    return question, text
+
+
+def accuse(session, name):
+    """Accuse a suspect, ending the game when right or out of guesses.
+
+    Raises ValueError if the game is over or has no killer, or if ``name``
+    is not one of its suspects.
+    """
+    if session.result is not None:
+        raise ValueError("The game is already over")
+    killer = session.killer
+    if killer is None:
+        raise ValueError("The game has no killer")
+    accused = next((c for c in session.suspects if c.name == name), None)
+    if accused is None:
+        raise ValueError(f"No suspect named {name!r}")
+    correct = accused.name == killer.name
+    session.guesses.append(
+        {"character": accused.name, "correct": correct, "timestamp": time.time()}
+    )
+
+    game = session.game
+    if correct:
+        session.result = "win"
+        game["result"] = "end"
+    else:
+        game["num_guesses_left"] -= 1
+        if game["num_guesses_left"] <= 0:
+            session.result = "lose"
+            game["result"] = "end"
+        else:
+            game["result"] = "sherlock"
+
+    return Accusation(
+        accused=accused.name,
+        correct=correct,
+        guesses_left=game["num_guesses_left"],
+        killer=killer.name,
+        result=session.result,
+    )
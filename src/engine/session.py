@@ -0,0 +1,75 @@
+"""
+Explicit state of one game played through the engine
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config.settings import KILLER_ROLE, VICTIM_ROLE
+from src.models.compact import TranscriptEntry, compact_game_state
+
+
+@dataclass(slots=True)
+class GameSession:
+    """A game and everything the player has done in it.
+
+    ``game`` is the compact game state, ``transcripts`` maps each character
+    name to its interview transcript and ``summaries`` holds the rolling
+    summary of each interview. ``result`` is "win" or "lose" once the game
+    is over.
+    """
+
+    game: dict
+    transcripts: dict = field(default_factory=dict)
+    summaries: dict = field(default_factory=dict)
+    guesses: list = field(default_factory=list)
+    result: Optional[str] = None
+
+    @classmethod
+    def from_game_state(cls, state):
+        """Start a session for a game produced by the main graph"""
+        return cls(compact_game_state(state))
+
+    @property
+    def story(self):
+        return self.game["story_details"]
+
+    @property
+    def characters(self):
+        return self.game["characters"]
+
+    @property
+    def suspects(self):
+        return [c for c in self.characters if c.role.lower() != VICTIM_ROLE]
+
+    @property
+    def killer(self):
+        return next((c for c in self.characters if c.role.lower() == KILLER_ROLE), None)
+
+    def character(self, name):
+        """The character with this name; raises KeyError if there is none"""
+        for character in self.characters:
+            if character.name == name:
+                return character
+        raise KeyError(f"No character named {name!r}")
+
+    def transcript(self, name):
+        """The interview transcript of a character, empty if not interviewed"""
+        return self.transcripts.get(name, [])
+
+    def record(self, name, entry_type, content):
+        """Append a line to a character's transcript"""
+        entry = TranscriptEntry.now(entry_type, content)
+        self.transcripts.setdefault(name, []).append(entry)
+        return entry
+
+
+@dataclass(slots=True)
+class Accusation:
+    """Outcome of accusing a suspect"""
+
+    accused: str
+    correct: bool
+    guesses_left: int
+    killer: str
+    result: Optional[str] = None
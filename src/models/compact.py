@@ -0,0 +1,132 @@
+"""
+Compact per-session representations of game data
+
+Sessions keep these slotted records instead of the pydantic models and
+LangChain messages the agents work with. The converters below translate at
+the boundaries: when a generated game is stored and when an agent is called.
+"""
+
+import sys
+import time
+from dataclasses import dataclass, fields
+
+from .character import Character
+from .story import StoryDetails
+
+
+def intern_text(value):
+    """Share one copy of short, frequently repeated strings such as names"""
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
+class CompactCharacter:
+    role: str
+    name: str
+    backstory: str
+
+    @property
+    def persona(self) -> str:
+        return f"Name: {self.name}\nRole: {self.role}\nBackstory: {self.backstory}\n"
+
+    @classmethod
+    def from_model(cls, character):
+        return cls(
+            intern_text(character.role),
+            intern_text(character.name),
+            character.backstory,
+        )
+
+    def to_model(self):
+        return Character(role=self.role, name=self.name, backstory=self.backstory)
+
+
+@dataclass(slots=True)
+class CompactStory:
+    victim_name: str
+    time_of_death: str
+    location_found: str
+    murder_weapon: str
+    cause_of_death: str
+    crime_scene_details: str
+    witnesses: str
+    initial_clues: str
+    npc_brief: str
+    killer_motive: str
+    murder_method_details: str
+    key_evidence: str
+    red_herrings_explanation: str
+    complete_timeline: str
+
+    @classmethod
+    def from_model(cls, story):
+        values = story.model_dump()
+        values["victim_name"] = intern_text(values["victim_name"])
+        return cls(**values)
+
+    def to_model(self):
+        return StoryDetails(
+            **{field.name: getattr(self, field.name) for field in fields(self)}
+        )
+
+
+@dataclass(slots=True)
+class TranscriptEntry:
+    """One line of an interview transcript"""
+
+    type: str
+    content: str
+    timestamp: float
+
+    @classmethod
+    def now(cls, entry_type, content):
+        return cls(intern_text(entry_type), content, time.time())
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(
+            intern_text(entry["type"]),
+            entry["content"],
+            entry.get("timestamp", 0.0),
+        )
+
+    def to_dict(self):
+        return {"type": self.type, "content": self.content, "timestamp": self.timestamp}
+
+
+def compact_game_state(state):
+    """Session form of a generated game.
+
+    Characters and the story become slotted records and Dr. Watson's
+    narration is kept as plain text instead of the message that carried it.
+    """
+    messages = state.get("messages") or []
+    return {
+        "game_id": state.get("game_id"),
+        "environment": state["environment"],
+        "max_characters": state["max_characters"],
+        "characters": [CompactCharacter.from_model(c) for c in state["characters"]],
+        "story_details": CompactStory.from_model(state["story_details"]),
+        "narration": messages[0].content if messages else "",
+        "selected_character_id": state.get("selected_character_id"),
+        "num_guesses_left": state["num_guesses_left"],
+        "result": state.get("result", ""),
+    }
+
+
+def expand_game_state(game_state):
+    """Graph form of a compact game, as produced by the main graph"""
+    from langchain_core.messages import AIMessage
+
+    narration = game_state["narration"]
+    return {
+        "messages": [AIMessage(content=narration)] if narration else [],
+        "game_id": game_state["game_id"],
+        "environment": game_state["environment"],
+        "max_characters": game_state["max_characters"],
+        "characters": [c.to_model() for c in game_state["characters"]],
+        "story_details": game_state["story_details"].to_model(),
+        "selected_character_id": game_state["selected_character_id"],
+        "num_guesses_left": game_state["num_guesses_left"],
+        "result": game_state["result"],
+    }
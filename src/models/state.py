@@ -15,10 +15,12 @@ class ConversationState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     character: Character
     story_details: Optional[StoryDetails]
+    conversation_summary: str
 
 
 class GenerateGameState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
+    game_id: str
     environment: str
     max_characters: int
     characters: List[Character]
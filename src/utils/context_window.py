@@ -0,0 +1,70 @@
+"""
+Bounded interview context with a rolling summary of older turns
+"""
+
+SPEAKERS = {
+    "player": "Sherlock Holmes",
+    "sherlock_ai": "Sherlock Holmes",
+}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def format_entry(entry, character_name):
+    """Render a transcript entry as a 'Speaker: text' line"""
+    speaker = SPEAKERS.get(entry.type, character_name)
+    return f"{speaker}: {entry.content}"
+
+
+def empty_summary():
+    """Summary state for a transcript with nothing folded in yet"""
+    return {"text": "", "covered": 0}
+
+
+def context_split(transcript, summary, token_budget, recent_messages, summary_batch):
+    """Index of the first transcript entry to send verbatim.
+
+    Entries between ``summary["covered"]`` and this index are due to be
+    folded into the summary; see build_context.
+    """
+    covered = summary["covered"]
+    keep_from = max(covered, len(transcript) - recent_messages)
+    if keep_from - covered < summary_batch:
+        keep_from = covered
+
+    budget = token_budget - estimate_tokens(summary["text"])
+    tail_tokens = sum(estimate_tokens(e.content) for e in transcript[keep_from:])
+    while keep_from < len(transcript) - 1 and tail_tokens > budget:
+        tail_tokens -= estimate_tokens(transcript[keep_from].content)
+        keep_from += 1
+    return keep_from
+
+
+def build_context(
+    transcript, summary, summarize, token_budget, recent_messages, summary_batch
+):
+    """Split a transcript into a rolling summary and a verbatim tail.
+
+    ``summary`` records how many leading entries are already folded into its
+    text. Entries beyond the last ``recent_messages`` are folded in batches of
+    at least ``summary_batch`` by calling ``summarize(previous_text, entries)``,
+    or sooner when the tail would exceed ``token_budget``. The latest entry is
+    always kept verbatim.
+
+    Returns the (possibly updated) summary and the entries to send verbatim.
+    """
+    covered = summary["covered"]
+    keep_from = context_split(
+        transcript, summary, token_budget, recent_messages, summary_batch
+    )
+
+    if keep_from > covered:
+        summary = {
+            "text": summarize(summary["text"], transcript[covered:keep_from]),
+            "covered": keep_from,
+        }
+
+    return summary, transcript[keep_from:]
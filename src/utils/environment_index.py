@@ -0,0 +1,111 @@
+"""
+Fuzzy lookup of free-text game environments
+
+Environments are compared as TF-IDF vectors of character n-grams taken
+within words, so word order, articles, plurals and small typos barely matter:
+"Mistral office in Paris" and "the Paris Mistral offices" score close to
+each other. An inverted index from n-gram to environments keeps a lookup
+proportional to the environments sharing n-grams with the query.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset({"a", "an", "the", "in", "on", "at", "of", "by", "near"})
+
+
+def words(text):
+    """Casefolded words of a setting without articles, prepositions or plurals"""
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") else word
+        for word in _WORD.findall(text.casefold())
+        if word not in _STOPWORDS
+    ]
+
+
+def char_ngrams(text, n=3):
+    """Counts of the character n-grams of each word, padded with spaces"""
+    grams = Counter()
+    for word in words(text):
+        padded = f" {word} "
+        grams.update(padded[i : i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class EnvironmentIndex:
+    """Cosine similarity search over a growing set of environments"""
+
+    def __init__(self, n=3):
+        self.n = n
+        self._environments = []
+        self._ids = {}
+        self._postings = defaultdict(dict)
+        # Document norms depend on IDF and are recomputed after additions
+        self._norms = None
+
+    def __len__(self):
+        return len(self._environments)
+
+    def __contains__(self, environment):
+        return environment in self._ids
+
+    def add(self, environment):
+        """Index an environment; adding one twice has no effect"""
+        if environment in self._ids:
+            return
+        doc_id = len(self._environments)
+        self._environments.append(environment)
+        self._ids[environment] = doc_id
+        for gram, count in char_ngrams(environment, self.n).items():
+            self._postings[gram][doc_id] = count
+        self._norms = None
+
+    def search(self, query, threshold=0.0, limit=5):
+        """Indexed environments most similar to ``query``, best first.
+
+        Returns up to ``limit`` ``(environment, score)`` pairs with a cosine
+        similarity of at least ``threshold``.
+        """
+        if not self._environments:
+            return []
+        norms = self._document_norms()
+
+        scores = defaultdict(float)
+        query_norm = 0.0
+        for gram, count in char_ngrams(query, self.n).items():
+            postings = self._postings.get(gram)
+            if postings is None:
+                # Unseen n-grams only lengthen the query vector
+                query_norm += (count * self._idf(0)) ** 2
+                continue
+            weight = count * self._idf(len(postings))
+            query_norm += weight**2
+            for doc_id, doc_count in postings.items():
+                scores[doc_id] += weight * doc_count * self._idf(len(postings))
+
+        if not scores:
+            return []
+        query_norm = math.sqrt(query_norm)
+        matches = [
+            (self._environments[doc_id], score / (query_norm * norms[doc_id]))
+            for doc_id, score in scores.items()
+        ]
+        matches = [match for match in matches if match[1] >= threshold]
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:limit]
+
+    def _idf(self, document_frequency):
+        # Smoothed so n-grams found in every environment still count a little
+        return math.log((1 + len(self._environments)) / (1 + document_frequency)) + 1
+
+    def _document_norms(self):
+        if self._norms is None:
+            squares = [0.0] * len(self._environments)
+            for postings in self._postings.values():
+                idf = self._idf(len(postings))
+                for doc_id, count in postings.items():
+                    squares[doc_id] += (count * idf) ** 2
+            self._norms = [math.sqrt(square) for square in squares]
+        return self._norms
@@ -0,0 +1,251 @@
+"""
+Deterministic local stand-in for the Databricks chat model
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from src.models.character import Character, NPC
+from src.models.story import StoryDetails
+
+FIRST_NAMES = (
+    "Claire Henri Sophie Luc Amelie Victor Juliette Marc Elise Bastien Margot Theo"
+).split()
+LAST_NAMES = (
+    "Dubois Lambert Martin Bernard Moreau Laurent Girard Roux Fontaine Chevalier "
+    "Blanc Mercier"
+).split()
+SUPPORTING_ROLES = [
+    "colleague",
+    "assistant",
+    "security guard",
+    "investor",
+    "manager",
+    "visitor",
+]
+QUESTIONS = [
+    "Tell me, where exactly were you when the lights went out?",
+    "Who else knew you would be in the building that evening?",
+    "How would you describe your last conversation with the victim?",
+    "Why did you not mention the back stairs when we first spoke?",
+]
+FILLER = (
+    "I remember the evening well, the corridor lights were dim and the "
+    "building was almost empty when I left my desk to fetch some coffee "
+    "and I heard voices near the stairwell but thought nothing of it then"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that returns plausible text after a simulated delay.
+
+    Responses and latencies are derived from the prompt and ``seed`` only, so
+    runs are reproducible regardless of thread scheduling. Call latency is
+    drawn from a log-normal distribution around ``latency_median`` seconds;
+    streamed calls wait ``ttft_share`` of such a latency for their first token
+    and then emit ``tokens_per_second``. ``with_structured_output`` returns ``NPC`` and
+    ``StoryDetails`` objects consistent with the prompt, a share
+    ``invalid_rate`` of them broken (two killers, blank fields) to exercise
+    repair, and fills any other schema with filler text.
+    """
+
+    endpoint: str = "fake-chat-model"
+    temperature: float = 0.1
+    seed: int = 0
+    latency_median: float = 0.5
+    latency_sigma: float = 0.3
+    ttft_share: float = 0.4
+    tokens_per_second: float = 50.0
+    response_words: int = 60
+    invalid_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _rng(self, messages: List[BaseMessage]) -> random.Random:
+        text = "\n".join(f"{m.type}:{m.content}" for m in messages)
+        digest = hashlib.sha256(f"{self.seed}:{text}".encode("utf-8")).hexdigest()
+        return random.Random(digest)
+
+    def _latency(self, rng: random.Random) -> float:
+        if self.latency_median <= 0:
+            return 0.0
+        return rng.lognormvariate(0.0, self.latency_sigma) * self.latency_median
+
+    def _time_to_first_token(self, rng: random.Random) -> float:
+        return self._latency(rng) * self.ttft_share
+
+    def _reply(self, messages: List[BaseMessage], rng: random.Random) -> str:
+        system = messages[0].content if messages else ""
+        words = [rng.choice(FILLER) for _ in range(self.response_words)]
+        body = " ".join(words).capitalize() + "."
+
+        if "Sherlock Holmes, the renowned detective" in system:
+            return rng.choice(QUESTIONS)
+        if "Dr. John Watson" in system:
+            return f"Holmes, you must see this. {body}"
+        if "keeping notes" in system:
+            return f"Notes: {body}"
+        if "greet and introduce yourself" in system:
+            return f"Good evening, Mr Holmes. {body}"
+        return body
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        rng = self._rng(messages)
+        time.sleep(self._latency(rng))
+        content = self._reply(messages, rng)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))]
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        rng = self._rng(messages)
+        time.sleep(self._time_to_first_token(rng))
+        for index, word in enumerate(self._reply(messages, rng).split(" ")):
+            token = word if index == 0 else f" {word}"
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        rng = self._rng(messages)
+        await asyncio.sleep(self._latency(rng))
+        content = self._reply(messages, rng)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))]
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        rng = self._rng(messages)
+        await asyncio.sleep(self._time_to_first_token(rng))
+        for index, word in enumerate(self._reply(messages, rng).split(" ")):
+            token = word if index == 0 else f" {word}"
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(1 / self.tokens_per_second)
+
+    def with_structured_output(self, schema, **kwargs):
+        def structured(messages, rng):
+            invalid = rng.random() < self.invalid_rate
+            if schema is NPC:
+                return fake_cast(messages[0].content, rng, invalid)
+            if schema is StoryDetails:
+                return fake_story(messages[0].content, rng, invalid)
+            return schema(
+                **{
+                    name: " ".join(rng.choice(FILLER) for _ in range(12)).capitalize()
+                    for name in schema.model_fields
+                }
+            )
+
+        def generate(input):
+            messages = self._convert_input(input).to_messages()
+            rng = self._rng(messages)
+            time.sleep(self._latency(rng))
+            return structured(messages, rng)
+
+        async def agenerate(input):
+            messages = self._convert_input(input).to_messages()
+            rng = self._rng(messages)
+            await asyncio.sleep(self._latency(rng))
+            return structured(messages, rng)
+
+        return RunnableLambda(generate, afunc=agenerate)
+
+
+def fake_cast(prompt, rng, invalid=False):
+    """A cast with one killer and one victim, sized as the prompt asks.
+
+    When the prompt lists the roles to create, those roles are used instead.
+    An ``invalid`` cast has a second killer in place of the victim.
+    """
+    match = re.search(r"number of characters to create:\s*(\d+)", prompt, re.I)
+    count = int(match.group(1)) if match else 5
+
+    first_names = rng.sample(FIRST_NAMES, count)
+    last_names = rng.sample(LAST_NAMES, count)
+    match = re.search(r"roles of the characters to create.*?:\s*(.+)", prompt, re.I)
+    if match:
+        roles = [
+            rng.choice(SUPPORTING_ROLES) if role == "suspect" else role
+            for role in match.group(1).split(", ")
+        ]
+    else:
+        roles = ["victim", "killer"] + [
+            rng.choice(SUPPORTING_ROLES) for _ in range(count - 2)
+        ]
+    if invalid and "victim" in roles:
+        roles[roles.index("victim")] = "killer"
+    return NPC(
+        characters=[
+            Character(
+                role=role,
+                name=f"{first} {last}",
+                backstory=f"{first} has worked here for {rng.randint(1, 20)} years "
+                f"and keeps a careful eye on everyone.",
+            )
+            for role, first, last in zip(roles, first_names, last_names)
+        ]
+    )
+
+
+def fake_story(prompt, rng, invalid=False):
+    """Story details that name the prompt's victim, some blank if ``invalid``"""
+    names = re.findall(r"Name: (.+)\nRole: (.+)\n", prompt)
+    victim = next((name for name, role in names if role == "victim"), "the victim")
+    killer = next((name for name, role in names if role == "killer"), "the killer")
+    hour = rng.randint(19, 23)
+
+    story = StoryDetails(
+        victim_name=victim,
+        time_of_death=f"Around {hour}:30",
+        location_found="The archive room on the second floor",
+        murder_weapon="A brass letter opener",
+        cause_of_death="A single stab wound",
+        crime_scene_details="Papers were scattered and the window was ajar.",
+        witnesses="A guard saw someone leave by the back stairs.",
+        initial_clues="A torn glove and a half-finished cup of tea.",
+        npc_brief=", ".join(name for name, _ in names),
+        killer_motive=f"{killer} wanted to bury an old secret.",
+        murder_method_details=f"{killer} waited in the archive room.",
+        key_evidence="The torn glove matches a pair in the killer's desk.",
+        red_herrings_explanation="The loud argument earlier was about budgets.",
+        complete_timeline=f"{hour}:00 the victim arrives; {hour}:30 the murder.",
+    )
+    if invalid:
+        story = story.model_copy(update={"initial_clues": "", "key_evidence": " "})
+    return story
@@ -0,0 +1,164 @@
+"""
+In-process background jobs for LLM calls
+"""
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from config.settings import (
+    JOB_WORKERS,
+    JOB_DEFAULT_WORKERS,
+    JOB_RETENTION_SECONDS,
+    LLM_MAX_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A unit of background work, its progress and its outcome.
+
+    Workers publish partial results (e.g. streamed text) through
+    ``progress`` so the UI can show them while the job runs. A running job
+    cannot be interrupted, but can check ``cancelled`` between steps.
+    """
+
+    def __init__(self, job_id, kind, key=None):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.status = "queued"
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self.future = None
+        self.cancelled = False
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def cancel(self):
+        """Drop the job if it has not started, else ask it to stop early"""
+        self.cancelled = True
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+            self.finished = time.time()
+
+
+class JobRunner:
+    """Runs jobs on bounded thread pools and keeps them until collected.
+
+    ``workers`` maps a job kind to the threads of its own pool; other kinds
+    share a pool of ``default_workers``. Pools are created on first use.
+
+    Jobs are looked up by id, so they outlive the Streamlit script run that
+    submitted them. Finished jobs nobody collects are dropped after
+    ``retention_seconds``. A job submitted with a key stands for every
+    submission with that key until it is collected, so a rerun or a double
+    click repeating the submission gets the running job back.
+    """
+
+    def __init__(self, workers, retention_seconds, default_workers=4):
+        self.workers = workers
+        self.default_workers = default_workers
+        self.retention_seconds = retention_seconds
+        self._executors = {}
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._keys = {}
+
+    def submit(self, fn, *args, kind="job", key=None):
+        """Run ``fn(job, *args)`` in the background and return the job id.
+
+        If a job submitted with the same ``key`` has not been collected yet,
+        its id is returned instead and ``fn`` is not run.
+        """
+        job = Job(uuid.uuid4().hex, kind, key)
+        with self._lock:
+            self._prune()
+            if key is not None:
+                if key in self._keys:
+                    return self._keys[key]
+                self._keys[key] = job.id
+            self._jobs[job.id] = job
+            executor = self._executor(kind)
+        # Carry the caller's context (e.g. metrics tags) into the worker
+        context = contextvars.copy_context()
+        job.future = executor.submit(context.run, self._run, job, fn, args)
+        return job.id
+
+    def get(self, job_id):
+        """The job with this id, or None if it is unknown or was collected"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pop(self, job_id):
+        """Remove a job once its result has been committed"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                self._forget_key(job)
+            return job
+
+    def stats(self):
+        """Number of jobs per status"""
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def queued(self, *kinds):
+        """Number of jobs of these kinds still waiting for a worker"""
+        with self._lock:
+            return sum(
+                job.status == "queued" and job.kind in kinds
+                for job in self._jobs.values()
+            )
+
+    def _executor(self, kind):
+        """The pool for a job kind; called with the lock"""
+        pool = kind if kind in self.workers else None
+        if pool not in self._executors:
+            self._executors[pool] = ThreadPoolExecutor(
+                max_workers=self.workers.get(pool, self.default_workers),
+                thread_name_prefix=f"llm-job-{pool or 'default'}",
+            )
+        return self._executors[pool]
+
+    def _run(self, job, fn, args):
+        job.status = "running"
+        try:
+            job.result = fn(job, *args)
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            job.error = e
+            job.status = "failed"
+        job.finished = time.time()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.done and job.finished < cutoff:
+                del self._jobs[job_id]
+                self._forget_key(job)
+
+    def _forget_key(self, job):
+        if job.key is not None and self._keys.get(job.key) == job.id:
+            del self._keys[job.key]
+
+
+@lru_cache(maxsize=None)
+def get_job_runner():
+    """Return the process-wide job runner"""
+    workers = {**JOB_WORKERS, "interview_turn": LLM_MAX_CONCURRENCY}
+    return JobRunner(workers, JOB_RETENTION_SECONDS, JOB_DEFAULT_WORKERS)
@@ -0,0 +1,268 @@
+"""
+Persistent SQLite cache for LLM responses
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from config.settings import (
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SECONDS,
+)
+from src.utils.llm_wrapper import ChatModelWrapper
+
+# Model settings that change the distribution of responses
+SAMPLING_PARAMS = (
+    "endpoint",
+    "model",
+    "temperature",
+    "max_tokens",
+    "top_p",
+    "stop",
+    "n",
+)
+
+
+def cache_key(llm, messages, schema=None):
+    """Hash the messages, model endpoint and sampling params of a call.
+
+    A routed model may answer from any of its tiers, so the key covers the
+    settings of each tier it can fall back to. Caching is tier-agnostic: an
+    answer from a fallback tier is served like one from the call site's own.
+    """
+    models = getattr(llm, "tier_models", None) or [llm]
+    payload = {
+        "messages": [[message.type, message.content] for message in messages],
+        "params": [
+            {name: getattr(model, name, None) for name in SAMPLING_PARAMS}
+            for model in models
+        ],
+        "schema": schema.model_json_schema() if schema is not None else None,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with TTL and LRU eviction.
+
+    Entries older than ``ttl_seconds`` are treated as misses. Once more than
+    ``max_entries`` are stored, the least recently used are evicted. Hit and
+    miss counts are kept per call site in the same database so they survive
+    restarts and can be compared across benchmark runs.
+    """
+
+    def __init__(self, path, max_entries=5000, ttl_seconds=7 * 24 * 3600):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    call_site TEXT,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+                "ON responses (accessed_at)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS call_site_stats (
+                    call_site TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    def get(self, key, call_site=None):
+        """Return the cached value for a key, or None on a miss"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self._record(call_site, hit=row is not None)
+        return row[0] if row is not None else None
+
+    def set(self, key, value, call_site=None):
+        """Store a value and evict expired and least recently used entries"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, value, call_site, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, call_site, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        """Return hit/miss counts and hit rate per call site"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT call_site, hits, misses FROM call_site_stats "
+                "ORDER BY call_site"
+            ).fetchall()
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+
+        call_sites = {
+            call_site: {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+            for call_site, hits, misses in rows
+        }
+        return {"entries": entries, "call_sites": call_sites}
+
+    def clear(self):
+        """Remove all cached responses and counters"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM call_site_stats")
+
+    def _record(self, call_site, hit):
+        self._conn.execute(
+            "INSERT INTO call_site_stats (call_site, hits, misses) VALUES (?, ?, ?) "
+            "ON CONFLICT(call_site) DO UPDATE SET "
+            "hits = hits + excluded.hits, misses = misses + excluded.misses",
+            (call_site or "unknown", int(hit), int(not hit)),
+        )
+
+
+class CachedChatModel(ChatModelWrapper):
+    """Chat model wrapper that serves repeated prompts from a ResponseCache"""
+
+    def __init__(self, llm, cache, call_site=None):
+        super().__init__(llm)
+        self.cache = cache
+        self.call_site = call_site
+
+    def _invoke(self, messages, config, **kwargs):
+        key = cache_key(self.llm, messages)
+        cached = self.cache.get(key, self.call_site)
+        if cached is not None:
+            return AIMessage(content=cached)
+
+        response = self.llm.invoke(messages, config, **kwargs)
+        self.cache.set(key, response.content, self.call_site)
+        return response
+
+    def _stream(self, messages, config, **kwargs):
+        key = cache_key(self.llm, messages)
+        cached = self.cache.get(key, self.call_site)
+        if cached is not None:
+            yield AIMessageChunk(content=cached)
+            return
+
+        content = ""
+        for chunk in self.llm.stream(messages, config, **kwargs):
+            content += chunk.content
+            yield chunk
+        # Only complete responses are cached
+        self.cache.set(key, content, self.call_site)
+
+    def _invoke_structured(self, schema, structured_llm, messages, config):
+        key = cache_key(self.llm, messages, schema)
+        cached = self.cache.get(key, self.call_site)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+
+        result = structured_llm.invoke(messages, config)
+        self.cache.set(key, result.model_dump_json(), self.call_site)
+        return result
+
+    # The SQLite lookups are local and short, so the async path makes them
+    # inline rather than in a thread
+
+    async def _ainvoke(self, messages, config, **kwargs):
+        key = cache_key(self.llm, messages)
+        cached = self.cache.get(key, self.call_site)
+        if cached is not None:
+            return AIMessage(content=cached)
+
+        response = await self.llm.ainvoke(messages, config, **kwargs)
+        self.cache.set(key, response.content, self.call_site)
+        return response
+
+    async def _astream(self, messages, config, **kwargs):
+        key = cache_key(self.llm, messages)
+        cached = self.cache.get(key, self.call_site)
+        if cached is not None:
+            yield AIMessageChunk(content=cached)
+            return
+
+        content = ""
+        async for chunk in self.llm.astream(messages, config, **kwargs):
+            content += chunk.content
+            yield chunk
+        self.cache.set(key, content, self.call_site)
+
+    async def _ainvoke_structured(self, schema, structured_llm, messages, config):
+        key = cache_key(self.llm, messages, schema)
+        cached = self.cache.get(key, self.call_site)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+
+        result = await structured_llm.ainvoke(messages, config)
+        self.cache.set(key, result.model_dump_json(), self.call_site)
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    """Return the process-wide response cache"""
+    return ResponseCache(
+        LLM_CACHE_PATH,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    report = get_response_cache().stats()
+    print(f"Cached responses: {report['entries']}")
+    for call_site, counts in report["call_sites"].items():
+        print(
+            f"{call_site:<24} hits={counts['hits']:<6} misses={counts['misses']:<6} "
+            f"hit rate={counts['hit_rate']:.1%}"
+        )
@@ -0,0 +1,252 @@
+"""
+Coalescing of identical model requests that are in flight at the same time
+
+Streamlit reruns and double clicks can repeat a request for a session while
+the first one is still running. The repeat attaches to the first request's
+future instead of calling the endpoint again.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from functools import lru_cache
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.utils.llm_cache import cache_key
+from src.utils.llm_wrapper import ChatModelWrapper
+from src.utils.metrics import record_coalesced
+
+
+class InflightRequests:
+    """Registry of running requests by key, shared by identical repeats.
+
+    The first caller for a key leads: it runs the request and settles a
+    future with the outcome, errors included. Callers arriving meanwhile
+    follow and wait for that future. If the leader is abandoned (its stream
+    closed or its task cancelled) the followers start over and one of them
+    leads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._coalesced = 0
+
+    def join(self, key):
+        """The future for a key and whether the caller leads the request"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = self._futures[key] = Future()
+            return future, True
+
+    def settle(self, key, future, result=None, error=None):
+        """Publish a leader's outcome and let new requests for the key run"""
+        self._release(key, future)
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def abandon(self, key, future):
+        """Give up leading without an outcome; followers will retry"""
+        self._release(key, future)
+        future.cancel()
+
+    def run(self, key, fn):
+        """``(fn(), False)`` if leading, or ``(leader's result, True)``"""
+        while True:
+            future, leader = self.join(key)
+            if leader:
+                break
+            try:
+                return future.result(), True
+            except CancelledError:
+                continue
+
+        with self.leading(key, future) as lead:
+            lead.result = fn()
+        return lead.result, False
+
+    async def arun(self, key, fn):
+        """Async ``run`` with a coroutine function"""
+        while True:
+            future, leader = self.join(key)
+            if leader:
+                break
+            try:
+                # Shielded so a cancelled follower does not cancel the leader
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                continue
+
+        with self.leading(key, future) as lead:
+            lead.result = await fn()
+        return lead.result, False
+
+    def leading(self, key, future):
+        """Context manager settling the future with the block's outcome"""
+        return _Lead(self, key, future)
+
+    def stats(self):
+        """Requests running and repeats served from them so far"""
+        with self._lock:
+            return {"in_flight": len(self._futures), "coalesced": self._coalesced}
+
+    def _release(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+
+class _Lead:
+    """A leader's hold on a key; set ``result`` before the block exits"""
+
+    def __init__(self, inflight, key, future):
+        self.inflight = inflight
+        self.key = key
+        self.future = future
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.inflight.settle(self.key, self.future, result=self.result)
+        elif issubclass(exc_type, Exception):
+            self.inflight.settle(self.key, self.future, error=exc)
+        else:
+            # Cancellation, interpreter exit or a closed stream
+            self.inflight.abandon(self.key, self.future)
+        return False
+
+
+def _text_chunk(message):
+    return AIMessageChunk(content=message.content)
+
+
+class CoalescingChatModel(ChatModelWrapper):
+    """Chat model wrapper that shares identical concurrent requests.
+
+    Requests are keyed by session and game, call site and a hash of the
+    payload, so games generated side by side by one batch stay independent.
+    Followers get a copy of the leader's response: the whole text at once
+    when streaming, and a deep copy of structured output.
+    """
+
+    def __init__(self, llm, inflight, call_site=None, tags=None):
+        super().__init__(llm)
+        self.inflight = inflight
+        self.call_site = call_site
+        self.tags = tags or {}
+
+    def _key(self, messages, schema=None):
+        payload = cache_key(self.llm, messages, schema)
+        session = (self.tags.get("session_id"), self.tags.get("game_id"))
+        key = f"{session}|{self.call_site}|{payload}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _followed(self, start):
+        record_coalesced(self.call_site, time.perf_counter() - start, self.tags)
+
+    def _invoke(self, messages, config, **kwargs):
+        start = time.perf_counter()
+        response, followed = self.inflight.run(
+            self._key(messages), lambda: self.llm.invoke(messages, config, **kwargs)
+        )
+        if followed:
+            self._followed(start)
+            return AIMessage(content=response.content)
+        return response
+
+    def _stream(self, messages, config, **kwargs):
+        start = time.perf_counter()
+        key = self._key(messages)
+        while True:
+            future, leader = self.inflight.join(key)
+            if leader:
+                break
+            try:
+                response = future.result()
+            except CancelledError:
+                continue
+            self._followed(start)
+            yield _text_chunk(response)
+            return
+
+        with self.inflight.leading(key, future) as lead:
+            content = ""
+            for chunk in self.llm.stream(messages, config, **kwargs):
+                content += chunk.content
+                yield chunk
+            lead.result = AIMessage(content=content)
+
+    def _invoke_structured(self, schema, structured_llm, messages, config):
+        start = time.perf_counter()
+        result, followed = self.inflight.run(
+            self._key(messages, schema),
+            lambda: structured_llm.invoke(messages, config),
+        )
+        if followed:
+            self._followed(start)
+            return result.model_copy(deep=True)
+        return result
+
+    async def _ainvoke(self, messages, config, **kwargs):
+        start = time.perf_counter()
+        response, followed = await self.inflight.arun(
+            self._key(messages), lambda: self.llm.ainvoke(messages, config, **kwargs)
+        )
+        if followed:
+            self._followed(start)
+            return AIMessage(content=response.content)
+        return response
+
+    async def _astream(self, messages, config, **kwargs):
+        start = time.perf_counter()
+        key = self._key(messages)
+        while True:
+            future, leader = self.inflight.join(key)
+            if leader:
+                break
+            try:
+                response = await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                continue
+            self._followed(start)
+            yield _text_chunk(response)
+            return
+
+        with self.inflight.leading(key, future) as lead:
+            content = ""
+            async for chunk in self.llm.astream(messages, config, **kwargs):
+                content += chunk.content
+                yield chunk
+            lead.result = AIMessage(content=content)
+
+    async def _ainvoke_structured(self, schema, structured_llm, messages, config):
+        start = time.perf_counter()
+        result, followed = await self.inflight.arun(
+            self._key(messages, schema),
+            lambda: structured_llm.ainvoke(messages, config),
+        )
+        if followed:
+            self._followed(start)
+            return result.model_copy(deep=True)
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_inflight_requests():
+    """Return the process-wide registry of in-flight model requests"""
+    return InflightRequests()
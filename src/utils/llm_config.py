@@ -3,24 +3,50 @@ LLM configuration and initialization
 """
 
 import streamlit as st
-from databricks_langchain import ChatDatabricks
-from src.workflows.conversation_graph import build_conversation_graph
-from src.workflows.game_graph import build_main_graph
+
+from src.utils.llm_context import create_llm, set_default_llm
+
+
+@st.cache_resource
+def get_shared_llm():
+    """Return the chat model client shared by every session in this process.
+
+    One client means one HTTP connection pool, so keep-alive connections to
+    the serving endpoint are reused across players instead of each session
+    opening its own.
+    """
+    return create_llm()
+
+
+# Agents called from a Streamlit script without use_llm() get the shared client
+set_default_llm(get_shared_llm)
 
 
 def initialize_llm():
     """Initialize the LLM model"""
     if "llm" not in st.session_state:
-        st.session_state.llm = ChatDatabricks(
-            endpoint="databricks-llama-4-maverick",
-            temperature=0.1,
-        )
+        st.session_state.llm = get_shared_llm()
+
+
+@st.cache_resource
+def get_conversation_graph():
+    """Return the compiled conversation graph shared by every session"""
+    from src.workflows.conversation_graph import build_conversation_graph
+
+    return build_conversation_graph()
+
+
+def get_main_graph():
+    """Return the compiled game generation graph shared by every session"""
+    from src.engine import main_graph
+
+    return main_graph()
 
 
 def build_graphs():
     """Initialize LangGraph workflows"""
     if "conversation_graph" not in st.session_state:
-        st.session_state.conversation_graph = build_conversation_graph()
+        st.session_state.conversation_graph = get_conversation_graph()
 
     if "main_graph" not in st.session_state:
-        st.session_state.main_graph = build_main_graph()
+        st.session_state.main_graph = get_main_graph()
@@ -0,0 +1,122 @@
+"""
+Model creation and resolution for agents, independent of Streamlit
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config.settings import (
+    LLM_BACKEND,
+    FAKE_LLM_SEED,
+    FAKE_LLM_LATENCY_MEDIAN,
+    FAKE_LLM_LATENCY_SIGMA,
+    FAKE_LLM_INVALID_RATE,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_CALL_SITES,
+    LLM_COALESCE_ENABLED,
+    LLM_TIERS,
+    LLM_DEFAULT_TIER,
+    LLM_CALL_SITE_TIERS,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_CALL_SITES,
+    METRICS_ENABLED,
+)
+from src.utils.llm_cache import CachedChatModel, get_response_cache
+from src.utils.llm_coalesce import CoalescingChatModel, get_inflight_requests
+from src.utils.llm_hedge import get_hedge_policy
+from src.utils.llm_router import ModelRouter
+from src.utils.llm_scheduler import ScheduledChatModel, get_request_scheduler
+from src.utils.llm_metrics import InstrumentedChatModel
+from src.utils.metrics import current_tags, get_metrics_recorder
+
+# Model agents call in the current context (script run, job or worker thread)
+_active_llm = ContextVar("active_llm", default=None)
+
+# Zero-argument callable returning the model used outside any use_llm block
+_default_llm = None
+
+
+def create_tier_model(tier, spec):
+    """Create the chat model client serving one model tier"""
+    if LLM_BACKEND == "fake":
+        from src.utils.fake_llm import FakeChatModel
+
+        return FakeChatModel(
+            endpoint=f"fake-{tier}",
+            seed=FAKE_LLM_SEED,
+            latency_median=FAKE_LLM_LATENCY_MEDIAN,
+            latency_sigma=FAKE_LLM_LATENCY_SIGMA,
+            invalid_rate=FAKE_LLM_INVALID_RATE,
+        )
+
+    from databricks_langchain import ChatDatabricks
+
+    return ChatDatabricks(
+        endpoint=spec["endpoint"],
+        temperature=spec["temperature"],
+    )
+
+
+def create_llm():
+    """Create chat model clients for the configured backend and model tiers.
+
+    Returns a router; ``get_llm`` resolves it to the tiers serving a call site.
+    """
+    return ModelRouter(
+        {tier: create_tier_model(tier, spec) for tier, spec in LLM_TIERS.items()},
+        timeouts={tier: spec.get("timeout") for tier, spec in LLM_TIERS.items()},
+        fallbacks={tier: spec.get("fallback") for tier, spec in LLM_TIERS.items()},
+        call_site_tiers=LLM_CALL_SITE_TIERS,
+        default_tier=LLM_DEFAULT_TIER,
+        scheduler=get_request_scheduler(),
+        hedging=get_hedge_policy() if LLM_HEDGE_ENABLED else None,
+        hedge_call_sites=LLM_HEDGE_CALL_SITES,
+    )
+
+
+def set_default_llm(factory):
+    """Set the callable that provides the model when none is in context"""
+    global _default_llm
+    _default_llm = factory
+
+
+def get_llm(call_site=None):
+    """Return the model agents should call in the current context.
+
+    ``call_site`` names the calling agent so per-call-site behaviour such as
+    the model tier, response caching and metrics can be applied. Identical
+    requests made for the same session at the same time are coalesced into one.
+    """
+    llm = _active_llm.get()
+    if llm is None:
+        if _default_llm is None:
+            raise RuntimeError("No chat model in context; call agents in use_llm()")
+        llm = _default_llm()
+
+    tags = current_tags()
+    if isinstance(llm, ModelRouter):
+        # The router takes a scheduler slot for each tier it tries
+        llm = llm.route(call_site, tags)
+    else:
+        llm = ScheduledChatModel(llm, get_request_scheduler(), call_site, tags)
+
+    if METRICS_ENABLED:
+        handler = get_metrics_recorder().handler
+        llm = InstrumentedChatModel(llm, handler, call_site, tags)
+
+    if LLM_CACHE_ENABLED and call_site in LLM_CACHE_CALL_SITES:
+        llm = CachedChatModel(llm, get_response_cache(), call_site)
+
+    if LLM_COALESCE_ENABLED and tags.get("session_id") is not None:
+        llm = CoalescingChatModel(llm, get_inflight_requests(), call_site, tags)
+    return llm
+
+
+@contextmanager
+def use_llm(llm):
+    """Make agents use the given model within this context"""
+    token = _active_llm.set(llm)
+    try:
+        yield llm
+    finally:
+        _active_llm.reset(token)
@@ -0,0 +1,119 @@
+"""
+Hedged model requests for interactive call sites
+
+A request that is slower than usual is sent a second time; whichever copy
+answers first is used. The other is cancelled if it can be (an async call, or
+one not started yet); a synchronous call already sent runs on and its
+response is dropped. "Usual" is a percentile of the latencies recently seen
+for the call site on its model tier, so only the slowest requests are hedged.
+"""
+
+import math
+import threading
+from collections import defaultdict, deque
+from functools import lru_cache
+
+from config.settings import (
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MAX_EXTRA_LOAD,
+)
+
+
+class HedgePolicy:
+    """When to hedge a request, within a budget on the extra load.
+
+    ``delay`` is the ``percentile`` of the last ``history`` latencies for a
+    key, once ``min_samples`` have been seen. Every request earns
+    ``max_extra_load`` of a hedge and every hedge spends one, so over time
+    hedges add at most that share of requests; ``burst`` caps what can be
+    saved up.
+    """
+
+    def __init__(
+        self,
+        percentile=95,
+        min_samples=20,
+        max_extra_load=0.05,
+        history=200,
+        burst=3,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra_load = max_extra_load
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=history))
+        self._budget = 0.0
+        self._counts = defaultdict(
+            lambda: {"requests": 0, "hedged": 0, "won": 0, "dropped": 0}
+        )
+
+    def delay(self, key):
+        """Seconds to wait before hedging a request, or None to not hedge it.
+
+        Called once per request, which earns its share of the hedge budget.
+        ``key`` is ``(call_site, tier, measure)``.
+        """
+        with self._lock:
+            self._counts[key[0]]["requests"] += 1
+            self._budget = min(self.burst, self._budget + self.max_extra_load)
+            latencies = self._latencies[key]
+            if len(latencies) < self.min_samples:
+                return None
+            ordered = sorted(latencies)
+        rank = math.ceil(self.percentile / 100 * len(ordered)) - 1
+        return ordered[max(rank, 0)]
+
+    def try_hedge(self, call_site):
+        """Spend budget on a hedge; False if none is left"""
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            self._counts[call_site]["hedged"] += 1
+            return True
+
+    def refund(self, call_site):
+        """Give back the budget of a hedge that could not be sent"""
+        with self._lock:
+            self._budget = min(self.burst, self._budget + 1)
+            self._counts[call_site]["hedged"] -= 1
+
+    def observe(self, key, seconds, hedge_won=False, dropped=False):
+        """Record the latency a request's caller saw and which copy won.
+
+        A request that failed or timed out is recorded with the time it took
+        to fail. ``dropped`` means the losing copy was already running and
+        could not be cancelled, so its output was received and thrown away.
+        """
+        with self._lock:
+            self._latencies[key].append(seconds)
+            if hedge_won:
+                self._counts[key[0]]["won"] += 1
+            if dropped:
+                self._counts[key[0]]["dropped"] += 1
+
+    def stats(self):
+        """Per call site requests, share hedged and share of hedges that won.
+
+        ``dropped`` counts losing copies that could not be cancelled.
+        """
+        with self._lock:
+            counts = {site: dict(row) for site, row in self._counts.items()}
+        for row in counts.values():
+            row["hedge_rate"] = (
+                row["hedged"] / row["requests"] if row["requests"] else 0.0
+            )
+            row["win_rate"] = row["won"] / row["hedged"] if row["hedged"] else 0.0
+        return counts
+
+
+@lru_cache(maxsize=None)
+def get_hedge_policy():
+    """Return the process-wide hedge policy"""
+    return HedgePolicy(
+        percentile=LLM_HEDGE_PERCENTILE,
+        min_samples=LLM_HEDGE_MIN_SAMPLES,
+        max_extra_load=LLM_HEDGE_MAX_EXTRA_LOAD,
+    )
@@ -0,0 +1,186 @@
+"""
+LangChain callback handler and model wrapper that feed the metrics recorder
+"""
+
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import merge_configs
+
+from src.utils.llm_wrapper import ChatModelWrapper
+
+# LangGraph nodes whose runs are recorded
+GRAPH_NODES = {
+    "create_characters",
+    "repair_characters",
+    "create_story",
+    "repair_story",
+    "narrator",
+    "character_introduction",
+    "ask_question",
+    "answer_question",
+}
+
+
+def _token_usage(response):
+    """Prompt and completion token counts reported by the provider, if any"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens"), usage.get("output_tokens")
+    return None, None
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times chat model calls and graph nodes from LangChain callback events"""
+
+    # Handlers are otherwise run in a thread pool on the async path; these
+    # are cheap enough to call on the event loop
+    run_inline = True
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self._runs = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompt_chars = sum(
+            len(str(message.content)) for batch in messages for message in batch
+        )
+        self._start_llm(run_id, prompt_chars, **kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start_llm(run_id, sum(len(prompt) for prompt in prompts), **kwargs)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None:
+            run["first_token"] = run["first_token"] or time.perf_counter()
+            run["output_chars"] += len(token)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        estimated = prompt_tokens is None
+        if estimated:
+            output_chars = run["output_chars"] or sum(
+                len(generation.text)
+                for generations in response.generations
+                for generation in generations
+            )
+            prompt_tokens = run["prompt_chars"] // 4 + 1
+            completion_tokens = output_chars // 4 + 1
+        self._finish(
+            run,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_estimated=estimated,
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            self._finish(run, error=type(error).__name__)
+
+    def on_chain_start(
+        self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs
+    ):
+        metadata = kwargs.get("metadata") or {}
+        name = kwargs.get("name")
+        if name not in GRAPH_NODES or metadata.get("langgraph_node", name) != name:
+            return
+        parent = self._runs.get(parent_run_id)
+        if parent is not None and parent["call_site"] == name:
+            # Nested runnable of the same node
+            return
+        self._runs[run_id] = {
+            "kind": "node",
+            "call_site": name,
+            "tags": metadata,
+            "start": time.perf_counter(),
+            "first_token": None,
+        }
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            self._finish(run)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            self._finish(run, error=type(error).__name__)
+
+    def _start_llm(self, run_id, prompt_chars, **kwargs):
+        metadata = kwargs.get("metadata") or {}
+        self._runs[run_id] = {
+            "kind": "llm",
+            "call_site": metadata.get("call_site", "unknown"),
+            "tier": metadata.get("tier"),
+            "tags": metadata,
+            "start": time.perf_counter(),
+            "first_token": None,
+            "prompt_chars": prompt_chars,
+            "output_chars": 0,
+        }
+
+    def _finish(self, run, **fields):
+        ttft = None
+        if run["first_token"] is not None:
+            ttft = round(run["first_token"] - run["start"], 4)
+        if run.get("tier") is not None:
+            fields["tier"] = run["tier"]
+        self.recorder.record(
+            run["kind"],
+            run["call_site"],
+            time.perf_counter() - run["start"],
+            tags=run["tags"],
+            ttft_s=ttft,
+            **fields,
+        )
+
+
+class InstrumentedChatModel(ChatModelWrapper):
+    """Chat model wrapper that attaches the metrics handler to every call"""
+
+    def __init__(self, llm, handler, call_site, tags):
+        super().__init__(llm)
+        self.config = {
+            "callbacks": [handler],
+            "metadata": {**tags, "call_site": call_site},
+        }
+
+    def _invoke(self, messages, config, **kwargs):
+        return self.llm.invoke(messages, merge_configs(config, self.config), **kwargs)
+
+    def _stream(self, messages, config, **kwargs):
+        yield from self.llm.stream(
+            messages, merge_configs(config, self.config), **kwargs
+        )
+
+    def _invoke_structured(self, schema, structured_llm, messages, config):
+        return structured_llm.invoke(messages, merge_configs(config, self.config))
+
+    async def _ainvoke(self, messages, config, **kwargs):
+        return await self.llm.ainvoke(
+            messages, merge_configs(config, self.config), **kwargs
+        )
+
+    async def _astream(self, messages, config, **kwargs):
+        async for chunk in self.llm.astream(
+            messages, merge_configs(config, self.config), **kwargs
+        ):
+            yield chunk
+
+    async def _ainvoke_structured(self, schema, structured_llm, messages, config):
+        return await structured_llm.ainvoke(
+            messages, merge_configs(config, self.config)
+        )
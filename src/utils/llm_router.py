@@ -0,0 +1,608 @@
+"""
+Routing of model requests to model tiers by call site
+
+A tier is a serving endpoint with its own per-call timeout. Each call site is
+served by one tier; a call that times out there, or finds the endpoint
+throttled or overloaded, is retried on the tier's fallback. The last tier
+tried has no deadline, since a slow answer beats none. Calls from hedged call
+sites that run late on a tier are sent to it a second time (see
+``src.utils.llm_hedge``).
+
+Each tier tried takes its own slot from the request scheduler, so throttling
+and timeouts reach the scheduler's limit. Its deadline starts when the call
+itself does. A synchronous call that misses its deadline cannot be stopped;
+it keeps its slot until it ends.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+
+from langchain_core.runnables.config import merge_configs
+
+from config.settings import LLM_MAX_CONCURRENCY
+from src.utils.llm_scheduler import is_throttled, request_tokens
+from src.utils.llm_wrapper import ChatModelWrapper, StructuredOutputWrapper
+from src.utils.metrics import record_fallback, record_hedge
+
+_TIMEOUTS = (TimeoutError, FutureTimeoutError, asyncio.TimeoutError)
+
+# Synchronous calls with a deadline run here while the caller waits. A call
+# that times out keeps its thread, and its scheduler slot, until the client
+# gives up on it. Every call holds a slot, so with a scheduler there is
+# always a free thread.
+_executor = ThreadPoolExecutor(
+    max_workers=2 * LLM_MAX_CONCURRENCY, thread_name_prefix="llm-call"
+)
+
+
+def is_overloaded(error):
+    """Whether a model error means the endpoint cannot take requests now"""
+    if is_throttled(error):
+        return True
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    if status in (503, 529):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("overloaded", "temporarily unavailable"))
+
+
+def fallback_reason(error):
+    """Why a failed call should move on to another tier, or None if it should not.
+
+    Returns "timeout" or "overloaded".
+    """
+    if isinstance(error, _TIMEOUTS):
+        return "timeout"
+    if is_overloaded(error):
+        return "overloaded"
+    return None
+
+
+def _submit(fn, *args, request=None):
+    """Run ``fn(*args)`` on the executor, returning its future once it starts.
+
+    Time spent waiting for a free thread is not charged to the call: its
+    deadline is set after this returns, and its scheduler ``request`` is
+    timed from here. The call runs in a copy of the caller's context
+    (metrics tags).
+    """
+    context = contextvars.copy_context()
+    started = threading.Event()
+
+    def run():
+        if request is not None:
+            request.calling()
+        started.set()
+        return context.run(fn, *args)
+
+    future = _executor.submit(run)
+    started.wait()
+    return future
+
+
+def _remaining(deadline):
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.perf_counter())
+
+
+def first_result(futures, deadline=None):
+    """``(result, future)`` of the first of ``futures`` to succeed.
+
+    Earlier futures win ties. Raises the first error if all of them fail, or
+    TimeoutError if none succeeds by ``deadline`` (a perf_counter time).
+    """
+    pending = set(futures)
+    error = None
+    while pending:
+        done, pending = wait(pending, _remaining(deadline), FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError("Model call missed its deadline")
+        for future in (future for future in futures if future in done):
+            if future.exception() is None:
+                return future.result(), future
+            error = error or future.exception()
+    raise error
+
+
+async def afirst_result(tasks, deadline=None):
+    """Async ``first_result`` over tasks"""
+    pending = set(tasks)
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(
+            pending, timeout=_remaining(deadline), return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            raise TimeoutError("Model call missed its deadline")
+        for task in (task for task in tasks if task in done):
+            if task.exception() is None:
+                return task.result(), task
+            error = error or task.exception()
+    raise error
+
+
+def _next_chunk(chunks, request):
+    chunk = next(chunks, None)
+    if request is not None:
+        request.responded()
+    return chunk
+
+
+async def _anext_chunk(chunks, request):
+    chunk = await anext(chunks, None)
+    if request is not None:
+        request.responded()
+    return chunk
+
+
+def _task_error(task, abandoned):
+    """What a finished task failed with; ``abandoned`` if it was cancelled"""
+    return abandoned if task.cancelled() else task.exception()
+
+
+class ModelRouter:
+    """Model clients per tier, and the tiers each call site is served by"""
+
+    def __init__(
+        self,
+        models,
+        timeouts,
+        fallbacks,
+        call_site_tiers,
+        default_tier,
+        scheduler=None,
+        hedging=None,
+        hedge_call_sites=(),
+    ):
+        self.models = models
+        self.timeouts = timeouts
+        self.fallbacks = fallbacks
+        self.call_site_tiers = call_site_tiers
+        self.default_tier = default_tier
+        self.scheduler = scheduler
+        self.hedging = hedging
+        self.hedge_call_sites = hedge_call_sites
+
+    def tiers_for(self, call_site):
+        """Tiers to try for a call site, its own tier first"""
+        tiers = []
+        tier = self.call_site_tiers.get(call_site, self.default_tier)
+        while tier is not None and tier not in tiers:
+            tiers.append(tier)
+            tier = self.fallbacks.get(tier)
+        return tiers
+
+    def route(self, call_site=None, tags=None):
+        """Chat model serving ``call_site`` through its tiers, each scheduled"""
+        return RoutedChatModel(self, call_site, tags)
+
+
+class RoutedChatModel(ChatModelWrapper):
+    """Chat model that tries each of a call site's tiers in turn.
+
+    A streamed call's deadline covers the time to its first chunk; once text
+    has been produced the stream is not moved to another tier. Calls are
+    tagged with their tier, so model call metrics are kept per tier.
+
+    With a hedge policy, a call still waiting for its response (or first
+    chunk) after the policy's delay is sent again on the same tier, if a
+    scheduler slot is free for it right away. The first to arrive is used
+    and the other is cancelled; a synchronous call already sent cannot be
+    stopped, so it keeps its slot until it ends and its response is dropped.
+    """
+
+    def __init__(self, router, call_site=None, tags=None):
+        self.router = router
+        self.call_site = call_site
+        self.tags = tags or {}
+        self.tiers = router.tiers_for(call_site)
+        self.hedging = router.hedging if call_site in router.hedge_call_sites else None
+        # Settings such as the endpoint are those of the call site's own tier
+        super().__init__(router.models[self.tiers[0]])
+
+    @property
+    def tier_models(self):
+        """The model of each tier tried, in order"""
+        return [self.router.models[tier] for tier in self.tiers]
+
+    def with_structured_output(self, schema, **kwargs):
+        structured_llms = {
+            tier: self.router.models[tier].with_structured_output(schema, **kwargs)
+            for tier in self.tiers
+        }
+        return StructuredOutputWrapper(self, schema, structured_llms)
+
+    def _attempts(self):
+        """``(tier, timeout)`` for each tier to try"""
+        for i, tier in enumerate(self.tiers):
+            last = i == len(self.tiers) - 1
+            yield tier, None if last else self.router.timeouts.get(tier)
+
+    def _config(self, config, tier):
+        return merge_configs(config, {"metadata": {"tier": tier}})
+
+    def _fell_back(self, tier, error, start):
+        reason = fallback_reason(error)
+        if reason is None or tier == self.tiers[-1]:
+            raise error
+        next_tier = self.tiers[self.tiers.index(tier) + 1]
+        record_fallback(
+            self.call_site,
+            tier,
+            next_tier,
+            reason,
+            time.perf_counter() - start,
+            self.tags,
+        )
+
+    def _hedge_delay(self, key, timeout):
+        if self.hedging is None:
+            return None
+        delay = self.hedging.delay(key)
+        if delay is None or (timeout is not None and delay >= timeout):
+            return None
+        return delay
+
+    def _hedge_slot(self, tier, tokens):
+        """``(hedge, request)``: whether to send a hedge and the slot it holds.
+
+        A hedge needs budget and a scheduler slot that is free right away,
+        with its own share of the request and token budgets; it never queues.
+        """
+        if not self.hedging.try_hedge(self.call_site):
+            return False, None
+        if self.router.scheduler is None:
+            return True, None
+        request = self.router.scheduler.try_acquire(
+            self.call_site, self.tags, tokens, tier
+        )
+        if request is None:
+            self.hedging.refund(self.call_site)
+            return False, None
+        return True, request
+
+    def _hedged(self, key, start, attempts, winner, dropped=False):
+        """Report a call's latency to the hedge policy.
+
+        ``winner`` is None if the call failed or missed its deadline; it is
+        then reported with the time it took to fail, a lower bound that keeps
+        slow failures from pulling the percentile down.
+        """
+        if self.hedging is None:
+            return
+        hedge_won = winner is not None and winner is not attempts[0]
+        wall_s = time.perf_counter() - start
+        self.hedging.observe(key, wall_s, hedge_won, dropped)
+        if len(attempts) > 1:
+            record_hedge(self.call_site, key[1], hedge_won, wall_s, self.tags)
+
+    def _acquire(self, tier, tokens):
+        if self.router.scheduler is None:
+            return None
+        return self.router.scheduler.acquire(self.call_site, self.tags, tokens, tier)
+
+    async def _aacquire(self, tier, tokens):
+        if self.router.scheduler is None:
+            return None
+        return await self.router.scheduler.aacquire(
+            self.call_site, self.tags, tokens, tier
+        )
+
+    def _release(self, request, error=None):
+        if request is not None:
+            self.router.scheduler.release(request, error)
+
+    def _release_when_done(self, request, future, abandoned=None):
+        """Give back a call's slot once the call ends, however long that takes.
+
+        A call abandoned at its deadline is reported with ``abandoned``.
+        """
+
+        def release(future):
+            if future.cancelled():
+                self._release(request, FutureCancelledError())
+            else:
+                self._release(request, future.exception() or abandoned)
+
+        if request is not None:
+            future.add_done_callback(release)
+
+    @contextmanager
+    def _holding(self, request):
+        """Give back a slot when the block ends, reporting any error"""
+        error = None
+        try:
+            yield
+        except (Exception, asyncio.CancelledError) as caught:
+            error = caught
+            raise
+        finally:
+            self._release(request, error)
+
+    def _call(self, tier, timeout, tokens, fn):
+        """``fn()`` on a tier within its timeout, hedged if it runs late"""
+        request = self._acquire(tier, tokens)
+        if timeout is None and self.hedging is None:
+            with self._holding(request):
+                return fn()
+
+        key = (self.call_site, tier, "response")
+        futures = [_submit(fn, request=request)]
+        requests = [request]
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        winner = None
+        abandoned = None
+        try:
+            delay = self._hedge_delay(key, timeout)
+            if delay is not None:
+                done, _ = wait(futures, delay)
+                if not done:
+                    hedge, hedge_request = self._hedge_slot(tier, tokens)
+                    if hedge:
+                        futures.append(_submit(fn, request=hedge_request))
+                        requests.append(hedge_request)
+            result, winner = first_result(futures, deadline)
+        except _TIMEOUTS as error:
+            abandoned = error
+            raise
+        finally:
+            dropped = False
+            for future, held in zip(futures, requests):
+                if future is not winner and not future.cancel():
+                    dropped = True
+                self._release_when_done(held, future, abandoned)
+            self._hedged(key, start, futures, winner, dropped)
+        return result
+
+    async def _acall(self, tier, timeout, tokens, make):
+        """Async ``_call`` with a coroutine function"""
+        request = await self._aacquire(tier, tokens)
+        if timeout is None and self.hedging is None:
+            with self._holding(request):
+                return await make()
+
+        key = (self.call_site, tier, "response")
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        tasks = [asyncio.ensure_future(make())]
+        requests = [request]
+        winner = None
+        abandoned = asyncio.CancelledError()
+        try:
+            delay = self._hedge_delay(key, timeout)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    hedge, hedge_request = self._hedge_slot(tier, tokens)
+                    if hedge:
+                        tasks.append(asyncio.ensure_future(make()))
+                        requests.append(hedge_request)
+            result, winner = await afirst_result(tasks, deadline)
+        except _TIMEOUTS as error:
+            abandoned = error
+            raise
+        except asyncio.CancelledError:
+            # The caller gave up, which says nothing about the model's latency
+            key = None
+            raise
+        finally:
+            for task, held in zip(tasks, requests):
+                if task is not winner:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                self._release(held, _task_error(task, abandoned))
+            if key is not None:
+                self._hedged(key, start, tasks, winner)
+        return result
+
+    def _first_chunk(self, tier, timeout, tokens, open_stream):
+        """``(first chunk, stream, request)`` on a tier, hedging a late first chunk.
+
+        The caller holds the returned request's slot until the stream ends.
+        """
+        request = self._acquire(tier, tokens)
+        if self.hedging is None and timeout is None:
+            try:
+                chunks = open_stream()
+                return _next_chunk(chunks, request), chunks, request
+            except Exception as error:
+                self._release(request, error)
+                raise
+
+        key = (self.call_site, tier, "first_chunk")
+        streams = [open_stream()]
+        requests = [request]
+        futures = [_submit(_next_chunk, streams[0], request, request=request)]
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        winner = None
+        abandoned = None
+        try:
+            delay = self._hedge_delay(key, timeout)
+            if delay is not None:
+                done, _ = wait(futures, delay)
+                if not done:
+                    hedge, hedge_request = self._hedge_slot(tier, tokens)
+                    if hedge:
+                        streams.append(open_stream())
+                        requests.append(hedge_request)
+                        futures.append(
+                            _submit(
+                                _next_chunk,
+                                streams[1],
+                                hedge_request,
+                                request=hedge_request,
+                            )
+                        )
+            first, winner = first_result(futures, deadline)
+        except _TIMEOUTS as error:
+            abandoned = error
+            raise
+        finally:
+            dropped = False
+            for future, chunks, held in zip(futures, streams, requests):
+                if future is not winner:
+                    # Closed and released once the chunk being fetched arrives
+                    dropped = not future.cancel() or dropped
+                    future.add_done_callback(lambda _, chunks=chunks: chunks.close())
+                    self._release_when_done(held, future, abandoned)
+            self._hedged(key, start, futures, winner, dropped)
+        index = futures.index(winner)
+        return first, streams[index], requests[index]
+
+    async def _afirst_chunk(self, tier, timeout, tokens, open_stream):
+        """Async ``_first_chunk``"""
+        request = await self._aacquire(tier, tokens)
+        if self.hedging is None and timeout is None:
+            try:
+                chunks = open_stream()
+                return await _anext_chunk(chunks, request), chunks, request
+            except (Exception, asyncio.CancelledError) as error:
+                self._release(request, error)
+                raise
+
+        key = (self.call_site, tier, "first_chunk")
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        streams = [open_stream()]
+        requests = [request]
+        tasks = [asyncio.ensure_future(_anext_chunk(streams[0], request))]
+        winner = None
+        abandoned = asyncio.CancelledError()
+        try:
+            delay = self._hedge_delay(key, timeout)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    hedge, hedge_request = self._hedge_slot(tier, tokens)
+                    if hedge:
+                        streams.append(open_stream())
+                        requests.append(hedge_request)
+                        tasks.append(
+                            asyncio.ensure_future(
+                                _anext_chunk(streams[1], hedge_request)
+                            )
+                        )
+            first, winner = await afirst_result(tasks, deadline)
+        except _TIMEOUTS as error:
+            abandoned = error
+            raise
+        except asyncio.CancelledError:
+            key = None
+            raise
+        finally:
+            for task, chunks, held in zip(tasks, streams, requests):
+                if task is not winner:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    await chunks.aclose()
+                    self._release(held, _task_error(task, abandoned))
+            if key is not None:
+                self._hedged(key, start, tasks, winner)
+        index = tasks.index(winner)
+        return first, streams[index], requests[index]
+
+    def _run(self, tokens, call):
+        for tier, timeout in self._attempts():
+            start = time.perf_counter()
+            try:
+                return self._call(tier, timeout, tokens, lambda: call(tier))
+            except Exception as error:
+                self._fell_back(tier, error, start)
+
+    async def _arun(self, tokens, call):
+        for tier, timeout in self._attempts():
+            start = time.perf_counter()
+            try:
+                return await self._acall(tier, timeout, tokens, lambda: call(tier))
+            except Exception as error:
+                self._fell_back(tier, error, start)
+
+    def _invoke(self, messages, config, **kwargs):
+        return self._run(
+            request_tokens(messages),
+            lambda tier: self.router.models[tier].invoke(
+                messages, self._config(config, tier), **kwargs
+            ),
+        )
+
+    def _stream(self, messages, config, **kwargs):
+        tokens = request_tokens(messages)
+        for tier, timeout in self._attempts():
+            start = time.perf_counter()
+            try:
+                first, chunks, request = self._first_chunk(
+                    tier,
+                    timeout,
+                    tokens,
+                    lambda: self.router.models[tier].stream(
+                        messages, self._config(config, tier), **kwargs
+                    ),
+                )
+            except Exception as error:
+                self._fell_back(tier, error, start)
+                continue
+
+            with self._holding(request):
+                if first is not None:
+                    yield first
+                yield from chunks
+            return
+
+    def _invoke_structured(self, schema, structured_llms, messages, config):
+        return self._run(
+            request_tokens(messages),
+            lambda tier: structured_llms[tier].invoke(
+                messages, self._config(config, tier)
+            ),
+        )
+
+    async def _ainvoke(self, messages, config, **kwargs):
+        return await self._arun(
+            request_tokens(messages),
+            lambda tier: self.router.models[tier].ainvoke(
+                messages, self._config(config, tier), **kwargs
+            ),
+        )
+
+    async def _astream(self, messages, config, **kwargs):
+        tokens = request_tokens(messages)
+        for tier, timeout in self._attempts():
+            start = time.perf_counter()
+            try:
+                first, chunks, request = await self._afirst_chunk(
+                    tier,
+                    timeout,
+                    tokens,
+                    lambda: self.router.models[tier].astream(
+                        messages, self._config(config, tier), **kwargs
+                    ),
+                )
+            except Exception as error:
+                self._fell_back(tier, error, start)
+                continue
+
+            with self._holding(request):
+                if first is not None:
+                    yield first
+                async for chunk in chunks:
+                    yield chunk
+            return
+
+    async def _ainvoke_structured(self, schema, structured_llms, messages, config):
+        return await self._arun(
+            request_tokens(messages),
+            lambda tier: structured_llms[tier].ainvoke(
+                messages, self._config(config, tier)
+            ),
+        )
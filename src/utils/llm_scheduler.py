@@ -0,0 +1,506 @@
+"""
+Process-wide scheduling of LLM requests
+
+Every model request takes a slot from one scheduler. Requests queue by
+priority class (interactive answers, then game creation, then background
+work), are held back by request and token budgets per minute, and share a
+concurrency limit that shrinks when the endpoint throttles or slows down and
+grows back while it keeps up.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from config.settings import (
+    LLM_MAX_CONCURRENCY,
+    LLM_MIN_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_EXPECTED_OUTPUT_TOKENS,
+    LLM_CONGESTION_LATENCY_FACTOR,
+    LLM_CALL_SITE_PRIORITIES,
+)
+from src.utils.context_window import estimate_tokens
+from src.utils.llm_wrapper import ChatModelWrapper
+from src.utils.metrics import record_queue_wait
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "creation", "background")
+DEFAULT_PRIORITY = "creation"
+
+# Priority class forced on every request made in this context
+_priority_override = ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority):
+    """Schedule every model request made within this context as ``priority``"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown request priority {priority!r}")
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+def call_site_priority(call_site):
+    """Priority class of a request from this call site in the current context"""
+    return _priority_override.get() or LLM_CALL_SITE_PRIORITIES.get(
+        call_site, DEFAULT_PRIORITY
+    )
+
+
+def is_throttled(error):
+    """Whether a model error means the endpoint is rate limiting us"""
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    if status == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(
+        marker in text
+        for marker in ("429", "ratelimit", "rate limit", "request_limit_exceeded")
+    )
+
+
+def request_outcome(error):
+    """How a request ended: "ok", "cancelled", "timeout", "throttled" or "error" """
+    if error is None:
+        return "ok"
+    if isinstance(error, (asyncio.CancelledError, FutureCancelledError)):
+        return "cancelled"
+    if isinstance(error, (TimeoutError, FutureTimeoutError, asyncio.TimeoutError)):
+        return "timeout"
+    if is_throttled(error):
+        return "throttled"
+    return "error"
+
+
+class TokenBucket:
+    """Allows ``per_minute`` units a minute, in bursts of up to that many"""
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.clock = clock
+        self.level = float(per_minute)
+        self._updated = clock()
+
+    def delay(self, amount):
+        """Seconds until ``amount`` units can be taken; 0 if they can now"""
+        self._refill()
+        # Requests larger than a full bucket go through once it is full
+        needed = min(amount, self.capacity)
+        return max(needed - self.level, 0.0) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class _Request:
+    """A queued or running request and how to wake its caller"""
+
+    __slots__ = (
+        "call_site",
+        "tier",
+        "priority",
+        "tokens",
+        "wake",
+        "queued_at",
+        "started_at",
+        "responded_at",
+    )
+
+    def __init__(self, call_site, tier, priority, tokens, wake, queued_at):
+        self.call_site = call_site
+        self.tier = tier
+        self.priority = priority
+        self.tokens = tokens
+        self.wake = wake
+        self.queued_at = queued_at
+        self.started_at = None
+        self.responded_at = None
+
+    def calling(self):
+        """Mark the start of the model call, after any wait for a thread"""
+        self.started_at = time.monotonic()
+
+    def responded(self):
+        """Mark the first response from the model, e.g. a streamed chunk"""
+        if self.responded_at is None:
+            self.responded_at = time.monotonic()
+
+
+class RequestScheduler:
+    """Admits model requests by priority within rate and concurrency limits.
+
+    A request waits until it is the first queued request of the highest
+    priority class with any, a concurrency slot is free and the request and
+    token buckets (``requests_per_minute``, ``tokens_per_minute``; 0 for no
+    limit) can cover it. Threads block and coroutines await, so both kinds
+    of caller share one scheduler without an event loop ever blocking.
+
+    The concurrency limit starts at ``max_in_flight``. It is halved when the
+    endpoint throttles a request, cut by a fifth when a request times out or
+    a response takes more than ``congestion_factor`` times the usual latency
+    of its call site and model tier, and grows by one per window of
+    successful requests, staying between ``min_in_flight`` and
+    ``max_in_flight``.
+
+    ``slot`` and ``aslot`` hold a slot for a block. ``acquire`` and
+    ``release`` are for callers that hand a request to another thread and
+    may stop waiting for it: the slot is only given back, and the outcome
+    reported, once the request has really finished.
+
+    The time each request spent queued is reported to
+    ``on_wait(call_site, priority, wait_s, tags, stats)``.
+    """
+
+    # Minimum time between two decreases, so one burst of errors counts once
+    DECREASE_COOLDOWN_S = 1.0
+
+    def __init__(
+        self,
+        max_in_flight,
+        min_in_flight=1,
+        requests_per_minute=0,
+        tokens_per_minute=0,
+        congestion_factor=3.0,
+        on_wait=None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min(min_in_flight, max_in_flight)
+        self.congestion_factor = congestion_factor
+        self.on_wait = on_wait
+        self._lock = threading.Lock()
+        self._limit = float(max_in_flight)
+        self._request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        self._in_flight = 0
+        self._timer = None
+        self._latency = {}
+        self._last_decrease = 0.0
+        self._throttled = 0
+        self._classes = {
+            priority: {
+                "requests": 0,
+                "peak_waiting": 0,
+                "total_wait": 0.0,
+                "max_wait": 0.0,
+            }
+            for priority in PRIORITIES
+        }
+
+    @contextmanager
+    def slot(self, call_site=None, tags=None, tokens=0, tier=None):
+        """Hold one request slot for the duration of the block.
+
+        Yields the request; call its ``responded()`` on the first streamed
+        chunk so latency is measured to the first token.
+        """
+        request = self.acquire(call_site, tags, tokens, tier)
+        with self._running(request):
+            yield request
+
+    @asynccontextmanager
+    async def aslot(self, call_site=None, tags=None, tokens=0, tier=None):
+        """Hold one request slot for the duration of the block, awaiting it"""
+        request = await self.aacquire(call_site, tags, tokens, tier)
+        with self._running(request):
+            yield request
+
+    def acquire(self, call_site=None, tags=None, tokens=0, tier=None):
+        """Wait for a request slot and return the request holding it"""
+        event = threading.Event()
+        request = self._submit(call_site, tier, tokens, event.set)
+        event.wait()
+        self._started(request, tags)
+        return request
+
+    async def aacquire(self, call_site=None, tags=None, tokens=0, tier=None):
+        """Await a request slot and return the request holding it"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = self._submit(
+            call_site,
+            tier,
+            tokens,
+            lambda: loop.call_soon_threadsafe(_resolve, future),
+        )
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._abandon(request)
+            raise
+        self._started(request, tags)
+        return request
+
+    def try_acquire(self, call_site=None, tags=None, tokens=0, tier=None):
+        """Take a request slot only if one is free now, or return None.
+
+        For optional requests such as hedges, which should neither wait nor
+        overtake queued ones: nothing may be queued, and the request and
+        token buckets must cover the request at once.
+        """
+        priority = call_site_priority(call_site)
+        with self._lock:
+            if (
+                any(self._queues.values())
+                or self._in_flight >= int(self._limit)
+                or self._bucket_delay(tokens) > 0
+            ):
+                return None
+            request = _Request(
+                call_site, tier, priority, tokens, None, time.monotonic()
+            )
+            self._start(request)
+        self._started(request, tags)
+        return request
+
+    def release(self, request, error=None):
+        """Give back a request's slot once it has finished.
+
+        ``error`` is what the request failed with, if anything; throttling
+        and timeouts shrink the concurrency limit.
+        """
+        end = request.responded_at or time.monotonic()
+        self._finished(request, end - request.started_at, request_outcome(error))
+
+    def stats(self):
+        """Current limits, occupancy and per-class queue depth and wait"""
+        with self._lock:
+            classes = {}
+            for priority, counters in self._classes.items():
+                requests = counters["requests"]
+                classes[priority] = {
+                    "waiting": len(self._queues[priority]),
+                    "peak_waiting": counters["peak_waiting"],
+                    "requests": requests,
+                    "mean_wait_s": (
+                        counters["total_wait"] / requests if requests else 0.0
+                    ),
+                    "max_wait_s": counters["max_wait"],
+                }
+            return {
+                "max_in_flight": self.max_in_flight,
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "waiting": sum(len(queue) for queue in self._queues.values()),
+                "throttled": self._throttled,
+                "classes": classes,
+            }
+
+    def _submit(self, call_site, tier, tokens, wake):
+        priority = call_site_priority(call_site)
+        request = _Request(call_site, tier, priority, tokens, wake, time.monotonic())
+        with self._lock:
+            queue = self._queues[priority]
+            queue.append(request)
+            counters = self._classes[priority]
+            counters["peak_waiting"] = max(counters["peak_waiting"], len(queue))
+            self._dispatch()
+        return request
+
+    def _dispatch(self):
+        """Start queued requests while capacity allows; called with the lock"""
+        while self._in_flight < int(self._limit):
+            queue = next((q for q in self._queues.values() if q), None)
+            if queue is None:
+                return
+
+            request = queue[0]
+            delay = self._bucket_delay(request.tokens)
+            if delay > 0:
+                # Nothing overtakes the head of the queue; retry once refilled
+                self._dispatch_later(delay)
+                return
+
+            queue.popleft()
+            self._start(request)
+            request.wake()
+
+    def _bucket_delay(self, tokens):
+        return max(
+            self._request_bucket.delay(1) if self._request_bucket else 0.0,
+            self._token_bucket.delay(tokens) if self._token_bucket else 0.0,
+        )
+
+    def _start(self, request):
+        """Charge the buckets for a request and count it in flight"""
+        if self._request_bucket:
+            self._request_bucket.take(1)
+        if self._token_bucket:
+            self._token_bucket.take(request.tokens)
+        self._in_flight += 1
+        request.started_at = time.monotonic()
+
+    def _dispatch_later(self, delay):
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _started(self, request, tags):
+        wait = request.started_at - request.queued_at
+        with self._lock:
+            counters = self._classes[request.priority]
+            counters["requests"] += 1
+            counters["total_wait"] += wait
+            counters["max_wait"] = max(counters["max_wait"], wait)
+        if self.on_wait is not None:
+            self.on_wait(
+                request.call_site, request.priority, wait, tags or {}, self.stats()
+            )
+
+    @contextmanager
+    def _running(self, request):
+        error = None
+        try:
+            yield
+        except (Exception, asyncio.CancelledError) as caught:
+            error = caught
+            raise
+        finally:
+            self.release(request, error)
+
+    def _abandon(self, request):
+        """Give up the queued or just-granted slot of a cancelled coroutine"""
+        with self._lock:
+            queue = self._queues[request.priority]
+            if request in queue:
+                queue.remove(request)
+                return
+            # The slot was granted before the cancellation landed
+            self._in_flight -= 1
+            self._dispatch()
+
+    def _finished(self, request, latency, outcome):
+        with self._lock:
+            self._in_flight -= 1
+            if outcome == "throttled":
+                self._throttled += 1
+                self._decrease(0.5)
+            elif outcome == "timeout":
+                self._decrease(0.8)
+            elif outcome == "ok":
+                self._adapt(request, latency)
+            self._dispatch()
+
+    def _adapt(self, request, latency):
+        """Grow the limit while latency stays usual, shrink it when it does not"""
+        # Streams are timed to the first token and other requests to the
+        # whole response, so each is compared with its own history
+        measure = "ttft" if request.responded_at is not None else "total"
+        key = (request.call_site, request.tier, measure)
+        usual = self._latency.get(key)
+        self._latency[key] = latency if usual is None else 0.9 * usual + 0.1 * latency
+        if usual is not None and latency > self.congestion_factor * usual:
+            self._decrease(0.8)
+        else:
+            self._limit = min(self.max_in_flight, self._limit + 1 / self._limit)
+
+    def _decrease(self, factor):
+        now = time.monotonic()
+        if now - self._last_decrease >= self.DECREASE_COOLDOWN_S:
+            self._last_decrease = now
+            self._limit = max(self.min_in_flight, self._limit * factor)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def request_tokens(messages):
+    """Tokens a request is expected to use: its prompt plus a typical reply"""
+    prompt = sum(estimate_tokens(str(message.content)) for message in messages)
+    return prompt + LLM_EXPECTED_OUTPUT_TOKENS
+
+
+class ScheduledChatModel(ChatModelWrapper):
+    """Chat model wrapper that runs every request through the scheduler"""
+
+    def __init__(self, llm, scheduler, call_site=None, tags=None, tier=None):
+        super().__init__(llm)
+        self.scheduler = scheduler
+        self.call_site = call_site
+        self.tags = tags
+        self.tier = tier
+
+    def _slot(self, messages):
+        return self.scheduler.slot(
+            self.call_site, self.tags, request_tokens(messages), self.tier
+        )
+
+    def _aslot(self, messages):
+        return self.scheduler.aslot(
+            self.call_site, self.tags, request_tokens(messages), self.tier
+        )
+
+    def _invoke(self, messages, config, **kwargs):
+        with self._slot(messages):
+            return self.llm.invoke(messages, config, **kwargs)
+
+    def _stream(self, messages, config, **kwargs):
+        # The slot is held until the stream is exhausted or closed
+        with self._slot(messages) as request:
+            for chunk in self.llm.stream(messages, config, **kwargs):
+                request.responded()
+                yield chunk
+
+    def _invoke_structured(self, schema, structured_llm, messages, config):
+        with self._slot(messages):
+            return structured_llm.invoke(messages, config)
+
+    async def _ainvoke(self, messages, config, **kwargs):
+        async with self._aslot(messages):
+            return await self.llm.ainvoke(messages, config, **kwargs)
+
+    async def _astream(self, messages, config, **kwargs):
+        async with self._aslot(messages) as request:
+            async for chunk in self.llm.astream(messages, config, **kwargs):
+                request.responded()
+                yield chunk
+
+    async def _ainvoke_structured(self, schema, structured_llm, messages, config):
+        async with self._aslot(messages):
+            return await structured_llm.ainvoke(messages, config)
+
+
+@lru_cache(maxsize=None)
+def get_request_scheduler():
+    """Return the process-wide request scheduler"""
+    return RequestScheduler(
+        LLM_MAX_CONCURRENCY,
+        min_in_flight=LLM_MIN_CONCURRENCY,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+        congestion_factor=LLM_CONGESTION_LATENCY_FACTOR,
+        on_wait=record_queue_wait,
+    )
@@ -0,0 +1,91 @@
+"""
+Composable wrappers around the chat model
+"""
+
+from langchain_core.messages import HumanMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable
+
+
+def to_messages(input):
+    """Normalize a model input into a list of messages"""
+    if isinstance(input, PromptValue):
+        return input.to_messages()
+    if isinstance(input, str):
+        return [HumanMessage(content=input)]
+    return list(input)
+
+
+class ChatModelWrapper(Runnable):
+    """Runnable that forwards to a chat model through overridable hooks.
+
+    Subclasses override ``_invoke``, ``_stream`` and ``_invoke_structured``
+    to add behaviour around every call, including structured output calls,
+    and their ``_a*`` counterparts for the native async path. Wrappers can be
+    nested and still compose with prompts via ``|``.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __getattr__(self, name):
+        # Expose the wrapped model's settings (endpoint, temperature, ...)
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def invoke(self, input, config=None, **kwargs):
+        return self._invoke(to_messages(input), config, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        yield from self._stream(to_messages(input), config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self._ainvoke(to_messages(input), config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        async for chunk in self._astream(to_messages(input), config, **kwargs):
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs):
+        return StructuredOutputWrapper(
+            self, schema, self.llm.with_structured_output(schema, **kwargs)
+        )
+
+    def _invoke(self, messages, config, **kwargs):
+        return self.llm.invoke(messages, config, **kwargs)
+
+    def _stream(self, messages, config, **kwargs):
+        yield from self.llm.stream(messages, config, **kwargs)
+
+    def _invoke_structured(self, schema, structured_llm, messages, config):
+        return structured_llm.invoke(messages, config)
+
+    async def _ainvoke(self, messages, config, **kwargs):
+        return await self.llm.ainvoke(messages, config, **kwargs)
+
+    async def _astream(self, messages, config, **kwargs):
+        async for chunk in self.llm.astream(messages, config, **kwargs):
+            yield chunk
+
+    async def _ainvoke_structured(self, schema, structured_llm, messages, config):
+        return await structured_llm.ainvoke(messages, config)
+
+
+class StructuredOutputWrapper(Runnable):
+    """Structured output runnable that routes calls through a wrapper"""
+
+    def __init__(self, wrapper, schema, structured_llm):
+        self.wrapper = wrapper
+        self.schema = schema
+        self.structured_llm = structured_llm
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.wrapper._invoke_structured(
+            self.schema, self.structured_llm, to_messages(input), config
+        )
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return await self.wrapper._ainvoke_structured(
+            self.schema, self.structured_llm, to_messages(input), config
+        )
@@ -0,0 +1,207 @@
+"""
+Per-call timing and token accounting for LLM calls, graph nodes and renders
+
+LangChain-specific pieces live in ``src.utils.llm_metrics`` so this module
+can be imported by the UI without loading the LLM stack.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from config.settings import (
+    METRICS_LOG_PATH,
+    METRICS_LOG_MAX_BYTES,
+    METRICS_LOG_BACKUPS,
+    METRICS_SESSION_HISTORY,
+    METRICS_ENABLED,
+)
+
+# Session and game the current script run or worker is acting for
+_metrics_tags = ContextVar("metrics_tags", default={})
+
+
+def current_tags():
+    """Tags attached to records made in the current context"""
+    return dict(_metrics_tags.get())
+
+
+@contextmanager
+def metrics_tags(**tags):
+    """Tag records made within this context (e.g. session_id, game_id)"""
+    token = _metrics_tags.set({**_metrics_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _metrics_tags.reset(token)
+
+
+def set_metrics_tags(**tags):
+    """Tag all further records made in the current context"""
+    _metrics_tags.set({**_metrics_tags.get(), **tags})
+
+
+class MetricsRecorder:
+    """Keeps recent records per session and appends every record to JSONL"""
+
+    def __init__(self, log_path=None, max_bytes=0, backups=0, session_history=200):
+        self._lock = threading.Lock()
+        self._sessions = defaultdict(lambda: deque(maxlen=session_history))
+        self._logger = logging.getLogger(f"{__name__}.jsonl")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if log_path and not self._logger.handlers:
+            Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backups
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+        self._handler = None
+
+    @property
+    def handler(self):
+        """LangChain callback handler that records into this recorder"""
+        with self._lock:
+            if self._handler is None:
+                from src.utils.llm_metrics import MetricsCallbackHandler
+
+                self._handler = MetricsCallbackHandler(self)
+            return self._handler
+
+    def record(self, kind, call_site, wall_s, tags=None, **fields):
+        """Store one measurement"""
+        tags = tags or {}
+        record = {
+            "ts": time.time(),
+            "kind": kind,
+            "call_site": call_site,
+            "session_id": tags.get("session_id"),
+            "game_id": tags.get("game_id"),
+            "wall_s": round(wall_s, 4),
+            **fields,
+        }
+        with self._lock:
+            self._sessions[record["session_id"]].append(record)
+        self._logger.info(json.dumps(record))
+        return record
+
+    def session_records(self, session_id):
+        """Recent records for one session, oldest first"""
+        with self._lock:
+            return list(self._sessions.get(session_id, ()))
+
+    def summary(self, session_id):
+        """Per call site and model tier counts, mean latency and token totals"""
+        rows = {}
+        for record in self.session_records(session_id):
+            row = rows.setdefault(
+                (record["kind"], record["call_site"], record.get("tier")),
+                {
+                    "kind": record["kind"],
+                    "call_site": record["call_site"],
+                    "tier": record.get("tier"),
+                    "calls": 0,
+                    "total_s": 0.0,
+                    "ttft_s": [],
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                },
+            )
+            row["calls"] += 1
+            row["total_s"] += record["wall_s"]
+            if record.get("ttft_s") is not None:
+                row["ttft_s"].append(record["ttft_s"])
+            row["prompt_tokens"] += record.get("prompt_tokens") or 0
+            row["completion_tokens"] += record.get("completion_tokens") or 0
+
+        summary = []
+        for row in rows.values():
+            ttfts = row.pop("ttft_s")
+            row["mean_s"] = round(row.pop("total_s") / row["calls"], 3)
+            row["mean_ttft_s"] = round(sum(ttfts) / len(ttfts), 3) if ttfts else None
+            summary.append(row)
+        return summary
+
+
+@lru_cache(maxsize=None)
+def get_metrics_recorder():
+    """Return the process-wide metrics recorder"""
+    return MetricsRecorder(
+        METRICS_LOG_PATH,
+        max_bytes=METRICS_LOG_MAX_BYTES,
+        backups=METRICS_LOG_BACKUPS,
+        session_history=METRICS_SESSION_HISTORY,
+    )
+
+
+def record_queue_wait(call_site, priority, wait_s, tags, stats):
+    """Record how long a request waited for the scheduler to start it"""
+    if METRICS_ENABLED:
+        get_metrics_recorder().record(
+            "queue",
+            call_site,
+            wait_s,
+            tags=tags,
+            priority=priority,
+            in_flight=stats["in_flight"],
+            limit=stats["limit"],
+            waiting=stats["classes"][priority]["waiting"],
+        )
+
+
+def record_coalesced(call_site, wait_s, tags):
+    """Record a repeated request served by an identical one in flight"""
+    if METRICS_ENABLED:
+        get_metrics_recorder().record("coalesced", call_site, wait_s, tags=tags)
+
+
+def record_fallback(call_site, tier, fallback, reason, wall_s, tags):
+    """Record a call given up on one model tier and retried on another"""
+    if METRICS_ENABLED:
+        get_metrics_recorder().record(
+            "fallback",
+            call_site,
+            wall_s,
+            tags=tags,
+            tier=tier,
+            fallback=fallback,
+            reason=reason,
+        )
+
+
+def record_hedge(call_site, tier, won, wall_s, tags):
+    """Record a hedged request and whether the hedge answered first"""
+    if METRICS_ENABLED:
+        get_metrics_recorder().record(
+            "hedge", call_site, wall_s, tags=tags, tier=tier, won=won
+        )
+
+
+def graph_config(**tags):
+    """Run config that records graph node timings with the current tags"""
+    recorder = get_metrics_recorder()
+    return {
+        "callbacks": [recorder.handler],
+        "metadata": {**current_tags(), **tags},
+    }
+
+
+@contextmanager
+def timed_section(kind, call_site):
+    """Record the wall time of a block, such as a Streamlit script run"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if METRICS_ENABLED:
+            get_metrics_recorder().record(
+                kind, call_site, time.perf_counter() - start, tags=current_tags()
+            )
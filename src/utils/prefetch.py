@@ -0,0 +1,31 @@
+"""
+Background prefetching of character introductions
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import INTRO_PREFETCH_WORKERS
+from src.engine import introduction
+from src.utils.llm_scheduler import request_priority
+
+_executor = ThreadPoolExecutor(
+    max_workers=INTRO_PREFETCH_WORKERS, thread_name_prefix="intro-prefetch"
+)
+
+
+def prefetch_introductions(session, llm):
+    """Start generating every suspect's introduction in parallel.
+
+    Returns a dict mapping character name to a Future of the introduction text.
+    """
+    futures = {}
+    for character in session.suspects:
+        # Carry the caller's context (e.g. metrics tags) into the worker,
+        # queued behind interactive requests
+        with request_priority("background"):
+            context = contextvars.copy_context()
+        futures[character.name] = _executor.submit(
+            context.run, introduction, llm, session, character.name
+        )
+    return futures
@@ -14,14 +14,18 @@ Your tone should be conversational and should address Sherlock Holmes directly.
 Make sure that you do not reveal your role and incriminate yourself.
 """
 
+# The interview prompts below are system prefixes that stay byte-identical for a
+# given character and story. Everything that changes between turns (summary,
+# recent messages, the question) is appended after them, so provider-side
+# prefix caches can reuse the constant part.
+
 SHERLOCK_ASK_PROMPT = """You are Sherlock Holmes, the renowned detective. You are interviewing {character_name} about the murder of {victim_name}.
 The murder occurred around {time_of_death} at {location_found}. The murder weapon was {murder_weapon}, and the cause of death was {cause_of_death}.
 
 Here's the crime scene description: {crime_scene_details}
 Here are some initial clues: {initial_clues}
 
-Here's the conversation history with {character_name}:
-{conversation_history}
+A summary of the earlier conversation with {character_name} and the most recent exchanges follow as messages.
 
 Considering the above information, formulate an insightful and relevant question to ask {character_name} to further investigate the case.
 The question should be phrased in a manner befitting Sherlock Holmes's inquisitive nature.
@@ -44,7 +48,8 @@ Crime Scene Details:
     All Characters and their relationships:
     {npc_brief}
 
-Based on the message history, answer the question as the character would, based on:
+A summary of the earlier interview and the message history follow.
+Answer the last question in the message history as the character would, based on:
 1. Your character's personality and background
 2. Your knowledge of the crime
 3. Your relationships with other characters
@@ -55,9 +60,21 @@ Important:
 - Only reveal information this character would know
 - Maintain consistency with the story details
 - You can lie if your character would have a reason to do so
+"""
 
-Question to answer:
-{question}
+CONVERSATION_SUMMARY_MESSAGE = """Summary of the earlier interview:
+{conversation_summary}
+"""
+
+CONVERSATION_SUMMARY_PROMPT = """You are keeping notes for Sherlock Holmes on his interview with {character_name}.
+Update the notes below with the new exchanges. Keep every claim, alibi, timing, name and contradiction that could matter to the investigation.
+Write plain sentences in 150 words or less.
+
+Current notes:
+{previous_summary}
+
+New exchanges:
+{new_exchanges}
 """
 
 CHARACTER_CREATION_PROMPT = """You are an AI character designer tasked with creating personas for a murder mystery game.
@@ -169,3 +186,42 @@ Crime Scene Details:
     Scene Description:
     {scene}
 """
+
+CHARACTER_REPAIR_PROMPT = """You are an AI character designer completing the cast of a murder mystery game.
+
+Environment:
+{environment}
+
+These characters already exist. Do not change or repeat them:
+{existing_characters}
+
+Problems found with the cast so far:
+{problems}
+
+Number of characters to create: {count}
+Roles of the characters to create, one each: {roles}
+
+Guidelines:
+- A "killer" has a hidden, deeper motive and should not be the most obvious suspect.
+- A "victim" is the person who was murdered.
+- A "suspect" is a supporting character who can be questioned by the detective. Give them a role that fits the setting instead of "suspect".
+- Give every new character a unique name and a backstory consistent with the existing characters.
+"""
+
+STORY_REPAIR_PROMPT = """You are completing the details of a murder mystery scenario. Some fields of the scenario are missing.
+
+Environment:
+{environment}
+
+Characters:
+{characters}
+
+Existing scenario details:
+{story_details}
+
+Problems found with the scenario so far:
+{problems}
+
+Write only the missing fields listed below, consistent with the existing details and characters:
+{missing_fields}
+"""
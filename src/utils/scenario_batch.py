@@ -0,0 +1,194 @@
+"""
+Offline batch generation of scenarios into the scenario library.
+
+Runs the main graph for every combination of environment and cast size,
+validates each finished game and appends it to the JSONL library as soon as
+it is done. Generations run concurrently on one event loop; ``--workers``
+caps how many games are generated at once, ``--max-in-flight`` how many model
+requests are open at once and ``--per-minute`` how many games are started
+per minute.
+
+Usage: python -m src.utils.scenario_batch --environments "Mistral office in Paris"
+       [--environments-file envs.txt] [--characters 4 5] [--count 3]
+       [--workers 4] [--max-in-flight 16] [--per-minute 0] [--library PATH]
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def scenario_problems(state):
+    """What is still wrong with a generated game; empty if it is playable"""
+    from src.agents.repair import split_cast, story_problems
+
+    _, missing_roles, problems = split_cast(
+        state["characters"], state["max_characters"]
+    )
+    if not missing_roles and len(state["characters"]) != state["max_characters"]:
+        problems.append(f"{len(state['characters'])} characters")
+    if state.get("story_details") is None:
+        return problems + ["no story"]
+
+    blank, misnamed = story_problems(state["story_details"], state["characters"])
+    problems += [f"blank {name}" for name in blank]
+    if misnamed:
+        problems.append("victim_name does not match the cast")
+    if not state.get("messages"):
+        problems.append("no narration")
+    return problems
+
+
+class StartPacer:
+    """Spaces out starts so no more than ``per_minute`` happen per minute"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_start = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            delay = self._next_start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = max(self._next_start, time.monotonic()) + self.interval
+
+
+async def generate_scenarios(llm, library, jobs, workers=4, per_minute=0):
+    """Generate a game for every (environment, max_characters) job.
+
+    Valid games are appended to ``library`` as they finish. Returns counts
+    of stored, invalid and failed generations.
+    """
+    from src.engine.api import main_graph
+    from src.utils.llm_context import use_llm
+    from src.utils.llm_scheduler import request_priority
+    from src.utils.metrics import graph_config, metrics_tags
+    from src.workflows.game_graph import build_game_input
+
+    graph = main_graph()
+    semaphore = asyncio.Semaphore(workers)
+    pacer = StartPacer(per_minute)
+    totals = {"stored": 0, "invalid": 0, "failed": 0}
+
+    async def generate(environment, max_characters):
+        async with semaphore:
+            await pacer.wait()
+            game_input = build_game_input(environment, max_characters, 0)
+            tags = {"session_id": "scenario_batch", "game_id": game_input["game_id"]}
+            try:
+                with use_llm(llm), metrics_tags(**tags), request_priority("background"):
+                    state = await graph.ainvoke(game_input, config=graph_config(**tags))
+            except Exception:
+                logger.exception(
+                    "Generation failed for %r (%d)", environment, max_characters
+                )
+                totals["failed"] += 1
+                return
+
+        problems = scenario_problems(state)
+        if problems:
+            logger.warning(
+                "Discarding scenario for %r (%d): %s",
+                environment,
+                max_characters,
+                "; ".join(problems),
+            )
+            totals["invalid"] += 1
+            return
+
+        library.append(state)
+        totals["stored"] += 1
+        logger.info(
+            "Stored scenario %d/%d: %s (%d)",
+            sum(totals.values()),
+            len(jobs),
+            environment,
+            max_characters,
+        )
+
+    try:
+        await asyncio.gather(*(generate(*job) for job in jobs))
+    finally:
+        library.save_index()
+    return totals
+
+
+def read_environments(args):
+    environments = list(args.environments or [])
+    if args.environments_file:
+        with open(args.environments_file, encoding="utf-8") as f:
+            environments += [line.strip() for line in f if line.strip()]
+    return environments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--environments", nargs="+", metavar="ENVIRONMENT")
+    parser.add_argument("--environments-file", help="One environment per line")
+    parser.add_argument("--characters", type=int, nargs="+", default=[5])
+    parser.add_argument("--count", type=int, default=1, help="Games per combination")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-in-flight", type=int, help="Open model requests")
+    parser.add_argument(
+        "--per-minute", type=float, default=0, help="Games started per minute"
+    )
+    parser.add_argument("--library", help="Library JSONL path")
+    args = parser.parse_args()
+
+    environments = read_environments(args)
+    if not environments:
+        parser.error("no environments given")
+
+    # Settings are read at import time, so apply the overrides first
+    if args.max_in_flight:
+        os.environ["LLM_MAX_CONCURRENCY"] = str(args.max_in_flight)
+    if args.library:
+        os.environ["SCENARIO_LIBRARY_PATH"] = args.library
+
+    from config.settings import MIN_CHARACTERS, MAX_CHARACTERS
+    from src.utils.llm_context import create_llm
+    from src.utils.scenario_library import get_scenario_library
+
+    for max_characters in args.characters:
+        if not MIN_CHARACTERS <= max_characters <= MAX_CHARACTERS:
+            parser.error(
+                f"--characters must be between {MIN_CHARACTERS} and {MAX_CHARACTERS}"
+            )
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    library = get_scenario_library()
+    jobs = list(itertools.product(environments, args.characters)) * args.count
+
+    start = time.perf_counter()
+    totals = asyncio.run(
+        generate_scenarios(
+            create_llm(),
+            library,
+            jobs,
+            workers=args.workers,
+            per_minute=args.per_minute,
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{totals['stored']} stored, {totals['invalid']} invalid, "
+        f"{totals['failed']} failed in {elapsed:.1f}s -> {library.path}"
+    )
+    for (environment, max_characters), count in sorted(library.counts().items()):
+        print(f"  {count:>5}  {environment} ({max_characters})")
+    if not totals["stored"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Append-only library of pre-generated scenarios on disk
+
+Scenarios are stored one JSON record per line. A sidecar index maps each
+(environment, cast size) to the byte offsets of its records, so a game can be
+loaded without reading the whole library. Records appended after the index
+was last saved are picked up by scanning the end of the file.
+
+A configuration with no stored games can be served one generated for a
+similar environment with the same cast size, found through a fuzzy index.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+from config.settings import SCENARIO_LIBRARY_PATH, SCENARIO_MATCH_THRESHOLD
+from src.utils.environment_index import EnvironmentIndex
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+def scenario_key(environment, max_characters):
+    """Normalize a game configuration into a library key"""
+    return " ".join(environment.split()).casefold(), int(max_characters)
+
+
+def _index_key(key):
+    environment, max_characters = key
+    return f"{max_characters}:{environment}"
+
+
+def scenario_record(state):
+    """Library record of a game state produced by the main graph"""
+    messages = state.get("messages") or []
+    return {
+        "scenario_id": state["game_id"],
+        "environment": state["environment"],
+        "max_characters": state["max_characters"],
+        "characters": [c.model_dump() for c in state["characters"]],
+        "story_details": state["story_details"].model_dump(),
+        "narration": messages[0].content if messages else "",
+        "created_at": time.time(),
+    }
+
+
+def scenario_state(record, num_guesses):
+    """Main graph game state for a library record, as a new game"""
+    from langchain_core.messages import AIMessage
+
+    from src.models.character import Character
+    from src.models.story import StoryDetails
+
+    narration = record["narration"]
+    return {
+        "messages": [AIMessage(content=narration)] if narration else [],
+        "game_id": uuid.uuid4().hex,
+        "environment": record["environment"],
+        "max_characters": record["max_characters"],
+        "characters": [Character(**c) for c in record["characters"]],
+        "story_details": StoryDetails(**record["story_details"]),
+        "selected_character_id": None,
+        "num_guesses_left": num_guesses,
+        "result": "",
+    }
+
+
+class ScenarioLibrary:
+    """A JSONL scenario library and its index.
+
+    ``path`` is the JSONL file; the index is kept next to it with an
+    ``.index.json`` suffix. Only one process should append at a time, but
+    any number may read while it does.
+
+    With a ``match_threshold``, ``take`` falls back to the most similar
+    stored environment scoring at least that cosine similarity.
+    """
+
+    def __init__(self, path, match_threshold=None):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".index.json")
+        self.match_threshold = match_threshold
+        self._lock = threading.Lock()
+        self._offsets = {}
+        # Stored environments by cast size, for fuzzy matching
+        self._environments = {}
+        self._size = 0
+        self._load_index()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(offsets) for offsets in self._offsets.values())
+
+    def append(self, state):
+        """Write a generated game state to the end of the library"""
+        line = json.dumps(scenario_record(state), ensure_ascii=False) + "\n"
+        data = line.encode("utf-8")
+        key = scenario_key(state["environment"], state["max_characters"])
+
+        with self._lock:
+            self._catch_up()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                if f.tell() != self._size:
+                    # A write was cut off mid-line; start on a fresh one
+                    f.write(b"\n")
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                self._size = f.tell()
+            self._add_offset(key, (offset, len(data)))
+
+    def take(self, environment, max_characters, num_guesses):
+        """Return a random stored game for a configuration, or None"""
+        key = scenario_key(environment, max_characters)
+        with self._lock:
+            self._catch_up()
+            offsets = self._offsets.get(key) or self._similar_offsets(key)
+            if not offsets:
+                return None
+            offset, length = random.choice(offsets)
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            record = json.loads(f.read(length))
+        return scenario_state(record, num_guesses)
+
+    def counts(self):
+        """Number of stored scenarios per (environment, cast size)"""
+        with self._lock:
+            self._catch_up()
+            return {key: len(offsets) for key, offsets in self._offsets.items()}
+
+    def save_index(self):
+        """Write the index covering every record appended so far"""
+        with self._lock:
+            self._catch_up()
+            index = {
+                "version": INDEX_VERSION,
+                "size": self._size,
+                "entries": {
+                    _index_key(key): offsets for key, offsets in self._offsets.items()
+                },
+            }
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(index), encoding="utf-8")
+            os.replace(tmp_path, self.index_path)
+
+    def _similar_offsets(self, key):
+        environment, max_characters = key
+        index = self._environments.get(max_characters)
+        if self.match_threshold is None or index is None:
+            return None
+
+        matches = index.search(environment, self.match_threshold, limit=1)
+        if not matches:
+            return None
+        match, score = matches[0]
+        logger.info("Serving %r for %r (similarity %.2f)", match, environment, score)
+        return self._offsets[(match, max_characters)]
+
+    def _add_offset(self, key, entry):
+        if key not in self._offsets:
+            environment, max_characters = key
+            index = self._environments.setdefault(max_characters, EnvironmentIndex())
+            index.add(environment)
+        self._offsets.setdefault(key, []).append(entry)
+
+    def _load_index(self):
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            index = None
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable scenario index %s", self.index_path)
+            index = None
+
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if (
+            index is None
+            or index.get("version") != INDEX_VERSION
+            or index["size"] > size
+        ):
+            # Missing or stale index: rebuild it from the library itself
+            return
+
+        self._size = index["size"]
+        for name, offsets in index["entries"].items():
+            max_characters, environment = name.split(":", 1)
+            key = (environment, int(max_characters))
+            for entry in offsets:
+                self._add_offset(key, tuple(entry))
+
+    def _catch_up(self):
+        """Index records appended since the index was saved or last scanned"""
+        if not self.path.exists() or self.path.stat().st_size <= self._size:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._size)
+            offset = self._size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written; it is indexed on a later scan
+                    break
+                try:
+                    record = json.loads(line)
+                    key = scenario_key(record["environment"], record["max_characters"])
+                except (ValueError, KeyError):
+                    logger.warning("Skipping unreadable scenario at byte %d", offset)
+                else:
+                    self._add_offset(key, (offset, len(line)))
+                offset += len(line)
+        self._size = offset
+
+
+@lru_cache(maxsize=None)
+def get_scenario_library():
+    """Return the process-wide scenario library"""
+    return ScenarioLibrary(
+        SCENARIO_LIBRARY_PATH, match_threshold=SCENARIO_MATCH_THRESHOLD
+    )
@@ -0,0 +1,181 @@
+"""
+Background pool of pre-generated game scenarios
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from config.settings import (
+    SCENARIO_POOL_KEYS,
+    SCENARIO_POOL_TARGET_DEPTH,
+    SCENARIO_POOL_REFILL_THRESHOLD,
+    SCENARIO_POOL_WORKERS,
+    SCENARIO_POOL_PROMOTE_AFTER_MISSES,
+    SCENARIO_POOL_MAX_KEYS,
+)
+from src.utils.llm_config import get_main_graph, get_shared_llm
+from src.utils.llm_context import use_llm
+from src.utils.llm_scheduler import request_priority
+from src.utils.metrics import graph_config, metrics_tags
+from src.workflows.game_graph import build_game_input
+
+logger = logging.getLogger(__name__)
+
+
+def pool_key(environment, max_characters):
+    """Normalize a game configuration into a pool key"""
+    return " ".join(environment.split()).casefold(), int(max_characters)
+
+
+class ScenarioPool:
+    """Keeps ready-to-play game states for popular configurations.
+
+    Worker threads run the main graph ahead of time. A key is topped back up
+    to ``target_depth`` whenever its ready plus in-flight count drops to
+    ``refill_threshold``. Keys that miss ``promote_after_misses`` times are
+    added to the pool, up to ``max_keys``.
+    """
+
+    def __init__(
+        self,
+        graph,
+        llm,
+        target_depth=2,
+        refill_threshold=1,
+        num_workers=2,
+        promote_after_misses=3,
+        max_keys=8,
+    ):
+        self.graph = graph
+        self.llm = llm
+        self.target_depth = target_depth
+        self.refill_threshold = refill_threshold
+        self.promote_after_misses = promote_after_misses
+        self.max_keys = max_keys
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="scenario-pool"
+        )
+        self._lock = threading.Lock()
+        self._environments = {}
+        self._ready = {}
+        self._pending = {}
+        self._miss_counts = {}
+        self._hits = 0
+        self._misses = 0
+        self._generated = 0
+        self._failures = 0
+
+    def add_key(self, environment, max_characters):
+        """Start keeping scenarios ready for a configuration"""
+        key = pool_key(environment, max_characters)
+        with self._lock:
+            if key not in self._environments:
+                if len(self._environments) >= self.max_keys:
+                    return False
+                self._environments[key] = " ".join(environment.split())
+                self._ready[key] = deque()
+                self._pending[key] = 0
+        self._refill(key)
+        return True
+
+    def take(self, environment, max_characters, num_guesses):
+        """Return a ready game state, or None if the pool has none"""
+        key = pool_key(environment, max_characters)
+        with self._lock:
+            ready = self._ready.get(key)
+            state = ready.popleft() if ready else None
+            if state is not None:
+                self._hits += 1
+            else:
+                self._misses += 1
+                self._miss_counts[key] = self._miss_counts.get(key, 0) + 1
+                promote = (
+                    key not in self._environments
+                    and self._miss_counts[key] >= self.promote_after_misses
+                )
+
+        if state is None:
+            if promote:
+                self.add_key(environment, max_characters)
+            elif key in self._environments:
+                self._refill(key)
+            return None
+
+        self._refill(key)
+        state["num_guesses_left"] = num_guesses
+        return state
+
+    def stats(self):
+        """Return hit/miss counters and per-key depth"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "generated": self._generated,
+                "failures": self._failures,
+                "depth": {
+                    f"{self._environments[key]} ({key[1]})": len(self._ready[key])
+                    for key in self._environments
+                },
+                "in_flight": sum(self._pending.values()),
+            }
+
+    def shutdown(self):
+        """Stop accepting work and wait for in-flight generations"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _refill(self, key):
+        with self._lock:
+            supply = len(self._ready[key]) + self._pending[key]
+            if supply > self.refill_threshold:
+                return
+            missing = max(self.target_depth - supply, 0)
+            self._pending[key] += missing
+
+        for _ in range(missing):
+            self._executor.submit(self._generate, key)
+
+    def _generate(self, key):
+        environment = self._environments[key]
+        game_input = build_game_input(environment, key[1], 0)
+        tags = {"session_id": "scenario_pool", "game_id": game_input["game_id"]}
+        try:
+            with use_llm(self.llm), metrics_tags(**tags), request_priority(
+                "background"
+            ):
+                state = self.graph.invoke(game_input, config=graph_config(**tags))
+        except Exception:
+            logger.exception("Scenario generation failed for %r", key)
+            with self._lock:
+                self._pending[key] -= 1
+                self._failures += 1
+            return
+
+        with self._lock:
+            self._pending[key] -= 1
+            self._ready[key].append(state)
+            self._generated += 1
+
+
+@st.cache_resource
+def get_scenario_pool():
+    """Return the process-wide scenario pool"""
+    pool = ScenarioPool(
+        get_main_graph(),
+        get_shared_llm(),
+        target_depth=SCENARIO_POOL_TARGET_DEPTH,
+        refill_threshold=SCENARIO_POOL_REFILL_THRESHOLD,
+        num_workers=SCENARIO_POOL_WORKERS,
+        promote_after_misses=SCENARIO_POOL_PROMOTE_AFTER_MISSES,
+        max_keys=SCENARIO_POOL_MAX_KEYS,
+    )
+    for environment, max_characters in SCENARIO_POOL_KEYS:
+        pool.add_key(environment, max_characters)
+    return pool
@@ -2,23 +2,34 @@
 Conversation workflow graph for character interactions
 """
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from src.models.state import ConversationState
 from src.agents.conversation_handler import (
     character_introduction,
+    acharacter_introduction,
     ask_question,
+    aask_question,
     answer_question,
+    aanswer_question,
     where_to_go,
 )
 
 
 def build_conversation_graph():
-    """Build the conversation subgraph"""
+    """Build the conversation subgraph, runnable with invoke or ainvoke"""
     conversation_builder = StateGraph(ConversationState)
 
-    conversation_builder.add_node("character_introduction", character_introduction)
-    conversation_builder.add_node("ask_question", ask_question)
-    conversation_builder.add_node("answer_question", answer_question)
+    conversation_builder.add_node(
+        "character_introduction",
+        RunnableLambda(character_introduction, afunc=acharacter_introduction),
+    )
+    conversation_builder.add_node(
+        "ask_question", RunnableLambda(ask_question, afunc=aask_question)
+    )
+    conversation_builder.add_node(
+        "answer_question", RunnableLambda(answer_question, afunc=aanswer_question)
+    )
 
     conversation_builder.add_edge(START, "character_introduction")
     conversation_builder.add_edge("character_introduction", "ask_question")
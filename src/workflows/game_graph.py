@@ -2,23 +2,69 @@
 Main game workflow graph
 """
 
+import uuid
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from src.models.state import GenerateGameState
-from src.agents.story_generator import create_characters, create_story, narrator
+from src.agents.story_generator import (
+    create_characters,
+    acreate_characters,
+    create_story,
+    acreate_story,
+    narrator,
+    anarrator,
+)
+from src.agents.repair import (
+    repair_characters,
+    arepair_characters,
+    repair_story,
+    arepair_story,
+)
 
 
 def build_main_graph():
-    """Build the main game graph - stops after narrator for user input"""
+    """Build the main game graph - stops after narrator for user input.
+
+    Every node has a native async implementation used by ``ainvoke`` and
+    ``astream``, so async runs never hold a thread while the model works.
+    """
     builder = StateGraph(GenerateGameState)
 
-    builder.add_node("create_characters", create_characters)
-    builder.add_node("create_story", create_story)
-    builder.add_node("narrator", narrator)
+    builder.add_node(
+        "create_characters",
+        RunnableLambda(create_characters, afunc=acreate_characters),
+    )
+    builder.add_node(
+        "repair_characters",
+        RunnableLambda(repair_characters, afunc=arepair_characters),
+    )
+    builder.add_node("create_story", RunnableLambda(create_story, afunc=acreate_story))
+    builder.add_node("repair_story", RunnableLambda(repair_story, afunc=arepair_story))
+    builder.add_node("narrator", RunnableLambda(narrator, afunc=anarrator))
 
+    # Each generation step is validated, and only faulty parts regenerated
     builder.add_edge(START, "create_characters")
-    builder.add_edge("create_characters", "create_story")
-    builder.add_edge("create_story", "narrator")
+    builder.add_edge("create_characters", "repair_characters")
+    builder.add_edge("repair_characters", "create_story")
+    builder.add_edge("create_story", "repair_story")
+    builder.add_edge("repair_story", "narrator")
     builder.add_edge("narrator", END)  # Stop after narrator for user input
 
     main_graph = builder.compile()
     return main_graph
+
+
+def build_game_input(environment, max_characters, num_guesses):
+    """Build the initial state for a main graph run"""
+    return {
+        "game_id": uuid.uuid4().hex,
+        "environment": environment,
+        "max_characters": max_characters,
+        "num_guesses_left": num_guesses,
+        "messages": [],
+        "characters": [],
+        "story_details": None,
+        "selected_character_id": None,
+        "result": "",
+    }
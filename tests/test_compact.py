@@ -0,0 +1,53 @@
+"""
+Tests for the compact session form of games and transcripts
+"""
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.fixtures import sample_characters, sample_story
+from src.models.compact import (
+    TranscriptEntry,
+    compact_game_state,
+    expand_game_state,
+)
+
+
+def game_state():
+    return {
+        "messages": [AIMessage(content="Watson's report")],
+        "game_id": "game-1",
+        "environment": "Mistral office in Paris",
+        "max_characters": 4,
+        "characters": sample_characters(),
+        "story_details": sample_story(),
+        "selected_character_id": None,
+        "num_guesses_left": 3,
+        "result": "",
+    }
+
+
+def test_a_game_survives_the_round_trip():
+    state = game_state()
+    expanded = expand_game_state(compact_game_state(state))
+    assert expanded["characters"] == state["characters"]
+    assert expanded["story_details"] == state["story_details"]
+    assert [m.content for m in expanded["messages"]] == ["Watson's report"]
+    for key in ("game_id", "environment", "max_characters", "num_guesses_left"):
+        assert expanded[key] == state[key]
+
+
+def test_a_game_without_narration_has_no_messages():
+    state = game_state()
+    state["messages"] = []
+    assert expand_game_state(compact_game_state(state))["messages"] == []
+
+
+def test_character_names_are_shared():
+    first = compact_game_state(game_state())["characters"][0]
+    second = compact_game_state(game_state())["characters"][0]
+    assert first.name is second.name
+
+
+def test_transcript_entries_survive_the_round_trip():
+    entry = TranscriptEntry.now("player", "Where were you?")
+    assert TranscriptEntry.from_dict(entry.to_dict()) == entry
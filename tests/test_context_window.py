@@ -0,0 +1,64 @@
+"""
+Tests for the bounded interview context
+"""
+
+from src.models.compact import TranscriptEntry
+from src.utils.context_window import build_context, empty_summary
+
+
+def transcript(count, words=1):
+    return [
+        TranscriptEntry("player" if i % 2 else "character", f"line {i} " * words, 0.0)
+        for i in range(count)
+    ]
+
+
+def summarize_calls():
+    calls = []
+
+    def summarize(previous, entries):
+        calls.append(len(entries))
+        return previous + "".join(entry.content for entry in entries)
+
+    return calls, summarize
+
+
+def test_a_short_transcript_is_sent_whole():
+    calls, summarize = summarize_calls()
+    entries = transcript(5)
+    summary, tail = build_context(entries, empty_summary(), summarize, 2000, 6, 4)
+    assert tail == entries
+    assert summary == empty_summary()
+    assert calls == []
+
+
+def test_older_entries_are_folded_in_batches():
+    calls, summarize = summarize_calls()
+    entries = transcript(9)
+    summary, tail = build_context(entries, empty_summary(), summarize, 2000, 6, 4)
+    assert calls == []
+    assert tail == entries
+
+    entries = transcript(10)
+    summary, tail = build_context(entries, summary, summarize, 2000, 6, 4)
+    assert calls == [4]
+    assert summary["covered"] == 4
+    assert tail == entries[4:]
+
+
+def test_a_summary_is_not_redone_for_covered_entries():
+    calls, summarize = summarize_calls()
+    entries = transcript(10)
+    summary, _ = build_context(entries, empty_summary(), summarize, 2000, 6, 4)
+    summary, tail = build_context(transcript(11), summary, summarize, 2000, 6, 4)
+    assert calls == [4]
+    assert len(tail) == 7
+
+
+def test_the_token_budget_folds_entries_early_but_keeps_the_latest():
+    calls, summarize = summarize_calls()
+    entries = transcript(4, words=100)
+    summary, tail = build_context(entries, empty_summary(), summarize, 50, 6, 4)
+    assert tail == entries[-1:]
+    assert summary["covered"] == 3
+    assert calls == [3]
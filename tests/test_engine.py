@@ -0,0 +1,60 @@
+"""
+Tests for the game engine's actions
+"""
+
+import pytest
+
+from benchmarks.fixtures import sample_characters, sample_story
+from src.engine import GameSession, accuse
+
+
+def new_session(characters=None, num_guesses=2):
+    return GameSession.from_game_state(
+        {
+            "environment": "Mistral office in Paris",
+            "max_characters": 4,
+            "characters": characters or sample_characters(),
+            "story_details": sample_story(),
+            "num_guesses_left": num_guesses,
+        }
+    )
+
+
+def test_accusing_the_killer_wins():
+    session = new_session()
+    accusation = accuse(session, "Henri Lambert")
+    assert accusation.correct
+    assert session.result == accusation.result == "win"
+    assert session.guesses[0]["character"] == "Henri Lambert"
+
+
+def test_running_out_of_guesses_loses():
+    session = new_session()
+    assert accuse(session, "Sophie Martin").result is None
+    assert session.game["num_guesses_left"] == 1
+
+    accusation = accuse(session, "Luc Bernard")
+    assert session.result == accusation.result == "lose"
+    assert accusation.killer == "Henri Lambert"
+
+
+def test_only_suspects_can_be_accused():
+    session = new_session()
+    with pytest.raises(ValueError):
+        accuse(session, "Nobody")
+    with pytest.raises(ValueError):
+        accuse(session, "Claire Dubois")
+    assert session.guesses == []
+
+
+def test_a_game_without_a_killer_cannot_be_played():
+    characters = [c for c in sample_characters() if c.role != "killer"]
+    with pytest.raises(ValueError):
+        accuse(new_session(characters), "Sophie Martin")
+
+
+def test_no_accusation_after_the_game_is_over():
+    session = new_session()
+    accuse(session, "Henri Lambert")
+    with pytest.raises(ValueError):
+        accuse(session, "Sophie Martin")
@@ -0,0 +1,47 @@
+"""
+Tests for the fuzzy environment lookup
+"""
+
+from src.utils.environment_index import EnvironmentIndex
+
+
+def index(*environments):
+    environment_index = EnvironmentIndex()
+    for environment in environments:
+        environment_index.add(environment)
+    return environment_index
+
+
+def test_an_exact_setting_scores_one():
+    environment_index = index("Mistral office in Paris", "Haunted lighthouse")
+    (match, score), *_ = environment_index.search("Mistral office in Paris")
+    assert match == "Mistral office in Paris"
+    assert abs(score - 1.0) < 1e-9
+
+
+def test_similar_settings_rank_first():
+    environment_index = index(
+        "Mistral office in Paris", "Haunted lighthouse", "Orient Express dining car"
+    )
+    matches = environment_index.search("the Mistral offices, Paris")
+    assert matches[0][0] == "Mistral office in Paris"
+    assert [score for _, score in matches] == sorted(
+        (score for _, score in matches), reverse=True
+    )
+
+
+def test_the_threshold_drops_weak_matches():
+    environment_index = index("Mistral office in Paris", "Haunted lighthouse")
+    matches = environment_index.search("Haunted lighthouses", threshold=0.8)
+    assert [match for match, _ in matches] == ["Haunted lighthouse"]
+    assert environment_index.search("Submarine", threshold=0.8) == []
+
+
+def test_adding_a_setting_twice_has_no_effect():
+    environment_index = index("Mistral office in Paris", "Mistral office in Paris")
+    assert len(environment_index) == 1
+    assert "Mistral office in Paris" in environment_index
+
+
+def test_an_empty_index_finds_nothing():
+    assert EnvironmentIndex().search("Mistral office in Paris") == []
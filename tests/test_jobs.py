@@ -0,0 +1,83 @@
+"""
+Tests for the background job runner
+"""
+
+import threading
+import time
+
+from src.utils.jobs import JobRunner
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def blocked_runner(kind="turn"):
+    """A runner whose single ``kind`` worker is busy until the event is set"""
+    runner = JobRunner({kind: 1}, retention_seconds=60)
+    release = threading.Event()
+    runner.submit(lambda job: release.wait(), kind=kind)
+    return runner, release
+
+
+def test_a_job_cancelled_before_it_starts_never_runs():
+    runner, release = blocked_runner()
+    ran = []
+    job_id = runner.submit(lambda job: ran.append(job.id), kind="turn")
+    assert runner.queued("turn") == 1
+
+    runner.get(job_id).cancel()
+    release.set()
+    wait_until(lambda: runner.stats()["running"] == 0)
+    assert runner.get(job_id).status == "cancelled"
+    assert ran == []
+
+
+def test_a_running_job_is_asked_to_stop():
+    runner = JobRunner({}, retention_seconds=60)
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while not job.cancelled:
+            time.sleep(0.005)
+        return "stopped"
+
+    job_id = runner.submit(work)
+    started.wait(timeout=5)
+    runner.get(job_id).cancel()
+    wait_until(lambda: runner.get(job_id).done)
+    assert runner.get(job_id).result == "stopped"
+
+
+def test_job_kinds_do_not_wait_for_each_other():
+    runner, release = blocked_runner()
+    job_id = runner.submit(lambda job: "done", kind="other")
+    wait_until(lambda: runner.get(job_id).done)
+    release.set()
+
+
+def test_a_keyed_job_stands_for_its_repeats_until_collected():
+    runner, release = blocked_runner()
+    first = runner.submit(lambda job: "first", kind="turn", key="k")
+    assert runner.submit(lambda job: "second", kind="turn", key="k") == first
+
+    release.set()
+    wait_until(lambda: runner.get(first).done)
+    assert runner.pop(first).result == "first"
+    assert runner.submit(lambda job: "third", kind="turn", key="k") != first
+
+
+def test_finished_jobs_are_dropped_after_the_retention_period():
+    runner = JobRunner({}, retention_seconds=60)
+    job_id = runner.submit(lambda job: None, key="k")
+    wait_until(lambda: runner.get(job_id).done)
+
+    runner.get(job_id).finished -= 61
+    other = runner.submit(lambda job: None)
+    assert runner.get(job_id) is None
+    assert runner.get(other) is not None
+    assert runner.submit(lambda job: None, key="k") != job_id
@@ -0,0 +1,116 @@
+"""
+Tests for coalescing identical in-flight model requests
+"""
+
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.utils import llm_coalesce
+from src.utils.llm_coalesce import CoalescingChatModel, InflightRequests
+
+
+class SlowModel:
+    endpoint = "slow"
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        number = self.calls
+        time.sleep(self.latency)
+        return AIMessage(content=f"answer {number}")
+
+
+@pytest.fixture(autouse=True)
+def no_metrics(monkeypatch):
+    monkeypatch.setattr(llm_coalesce, "record_coalesced", lambda *_: None)
+
+
+def run_together(*fns):
+    results = [None] * len(fns)
+
+    def run(index, fn):
+        results[index] = fn()
+
+    threads = [
+        threading.Thread(target=run, args=(index, fn)) for index, fn in enumerate(fns)
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_a_repeat_follows_the_request_in_flight():
+    inflight = InflightRequests()
+    model = SlowModel()
+
+    def call():
+        return inflight.run("key", lambda: model.invoke("hi"))
+
+    (first, led), (second, followed) = run_together(call, call)
+    assert (led, followed) == (False, True)
+    assert first.content == second.content == "answer 1"
+    assert model.calls == 1
+    assert inflight.stats() == {"in_flight": 0, "coalesced": 1}
+
+
+def test_followers_share_the_leaders_error():
+    inflight = InflightRequests()
+    errors = []
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("bad")
+
+    def call():
+        try:
+            inflight.run("key", fail)
+        except ValueError as error:
+            errors.append(error)
+
+    run_together(call, call)
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+
+
+def test_followers_retry_when_the_leader_is_abandoned():
+    inflight = InflightRequests()
+    future, leader = inflight.join("key")
+    assert leader
+
+    result = []
+    follower = threading.Thread(
+        target=lambda: result.append(inflight.run("key", lambda: "retried"))
+    )
+    follower.start()
+    time.sleep(0.05)
+    inflight.abandon("key", future)
+    follower.join(timeout=5)
+    assert result == [("retried", False)]
+
+
+def test_only_requests_for_the_same_session_are_coalesced():
+    inflight = InflightRequests()
+    model = SlowModel()
+
+    def wrapped(session_id):
+        return CoalescingChatModel(
+            model, inflight, "answer_question", {"session_id": session_id}
+        )
+
+    first, second, other = run_together(
+        lambda: wrapped("a").invoke("hi"),
+        lambda: wrapped("a").invoke("hi"),
+        lambda: wrapped("b").invoke("hi"),
+    )
+    assert first.content == second.content
+    assert other.content != first.content
+    assert model.calls == 2
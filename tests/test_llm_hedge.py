@@ -0,0 +1,54 @@
+"""
+Tests for the hedged request policy
+"""
+
+import pytest
+
+from src.utils.llm_hedge import HedgePolicy
+
+KEY = ("answer_question", "large", "response")
+
+
+def test_no_hedging_until_enough_latencies_are_seen():
+    policy = HedgePolicy(percentile=50, min_samples=3)
+    for seconds in (1.0, 2.0):
+        policy.observe(KEY, seconds)
+    assert policy.delay(KEY) is None
+
+    policy.observe(KEY, 3.0)
+    assert policy.delay(KEY) == pytest.approx(2.0)
+
+
+def test_latencies_are_kept_per_key():
+    policy = HedgePolicy(percentile=100, min_samples=1)
+    policy.observe(KEY, 1.0)
+    policy.observe(("answer_question", "small", "response"), 5.0)
+    assert policy.delay(KEY) == pytest.approx(1.0)
+
+
+def test_hedges_are_limited_to_the_extra_load_budget():
+    policy = HedgePolicy(max_extra_load=0.25, burst=1)
+    hedges = 0
+    for _ in range(20):
+        policy.delay(KEY)
+        hedges += policy.try_hedge("answer_question")
+    assert hedges == 5
+    assert policy.stats()["answer_question"]["hedge_rate"] == pytest.approx(0.25)
+
+
+def test_unused_budget_is_capped_by_the_burst():
+    policy = HedgePolicy(max_extra_load=0.5, burst=2)
+    for _ in range(20):
+        policy.delay(KEY)
+    assert policy.try_hedge("answer_question")
+    assert policy.try_hedge("answer_question")
+    assert not policy.try_hedge("answer_question")
+
+
+def test_a_refunded_hedge_is_not_counted():
+    policy = HedgePolicy(max_extra_load=1.0, burst=1)
+    policy.delay(KEY)
+    assert policy.try_hedge("answer_question")
+    policy.refund("answer_question")
+    assert policy.stats()["answer_question"]["hedged"] == 0
+    assert policy.try_hedge("answer_question")
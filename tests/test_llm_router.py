@@ -0,0 +1,164 @@
+"""
+Tests for routing model calls to tiers, with fallback and hedging
+"""
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.utils import llm_router
+from src.utils.llm_hedge import HedgePolicy
+from src.utils.llm_router import ModelRouter
+from src.utils.llm_scheduler import RequestScheduler
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+class FakeModel:
+    """Answers with its name after ``latency`` seconds, or raises ``error``.
+
+    ``calls`` counts calls as they start.
+    """
+
+    def __init__(self, name, latency=0.0, error=None):
+        self.endpoint = name
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+
+    def _answer(self):
+        if self.error is not None:
+            raise self.error
+        return self.endpoint
+
+    def invoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return AIMessage(content=self._answer())
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return AIMessage(content=self._answer())
+
+    def stream(self, messages, config=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        yield AIMessageChunk(content=self._answer())
+        yield AIMessageChunk(content="!")
+
+
+@pytest.fixture
+def fallbacks(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        llm_router,
+        "record_fallback",
+        lambda call_site, tier, fallback, reason, *_: recorded.append(
+            (tier, fallback, reason)
+        ),
+    )
+    monkeypatch.setattr(llm_router, "record_hedge", lambda *_: None)
+    return recorded
+
+
+def make_router(large, small, timeout=0.1, **kwargs):
+    return ModelRouter(
+        {"large": large, "small": small},
+        timeouts={"large": timeout, "small": timeout},
+        fallbacks={"large": "small", "small": "large"},
+        call_site_tiers={"summarize": "small"},
+        default_tier="large",
+        **kwargs,
+    )
+
+
+def test_call_sites_get_their_tier_then_its_fallbacks():
+    router = make_router(FakeModel("large"), FakeModel("small"))
+    assert router.tiers_for("summarize") == ["small", "large"]
+    assert router.tiers_for("anything_else") == ["large", "small"]
+
+
+def test_a_call_that_times_out_moves_to_the_fallback_tier(fallbacks):
+    router = make_router(FakeModel("large", latency=0.5), FakeModel("small"))
+    assert router.route("answer").invoke("hi").content == "small"
+    assert fallbacks == [("large", "small", "timeout")]
+
+
+def test_a_throttled_endpoint_moves_to_the_fallback_tier(fallbacks):
+    router = make_router(FakeModel("large", error=Throttled()), FakeModel("small"))
+    assert router.route("answer").invoke("hi").content == "small"
+    assert fallbacks == [("large", "small", "overloaded")]
+
+
+def test_other_errors_do_not_fall_back(fallbacks):
+    small = FakeModel("small")
+    router = make_router(FakeModel("large", error=ValueError("bad")), small)
+    with pytest.raises(ValueError):
+        router.route("answer").invoke("hi")
+    assert small.calls == 0
+    assert fallbacks == []
+
+
+def test_the_last_tier_has_no_deadline(fallbacks):
+    router = make_router(
+        FakeModel("large", error=Throttled()), FakeModel("small", latency=0.3)
+    )
+    assert router.route("answer").invoke("hi").content == "small"
+
+
+def test_a_stream_falls_back_before_its_first_chunk(fallbacks):
+    router = make_router(FakeModel("large", latency=0.5), FakeModel("small"))
+    chunks = [chunk.content for chunk in router.route("answer").stream("hi")]
+    assert chunks == ["small", "!"]
+    assert fallbacks == [("large", "small", "timeout")]
+
+
+def test_async_calls_fall_back_too(fallbacks):
+    router = make_router(FakeModel("large", latency=0.5), FakeModel("small"))
+    response = asyncio.run(router.route("answer").ainvoke("hi"))
+    assert response.content == "small"
+    assert fallbacks == [("large", "small", "timeout")]
+
+
+def test_each_tier_tried_holds_a_scheduler_slot(fallbacks):
+    scheduler = RequestScheduler(max_in_flight=4)
+    router = make_router(
+        FakeModel("large", error=Throttled()), FakeModel("small"), scheduler=scheduler
+    )
+    assert router.route("answer").invoke("hi").content == "small"
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["limit"] < 4
+
+
+def test_time_waiting_for_a_thread_is_not_charged_to_the_deadline(fallbacks):
+    router = make_router(FakeModel("large", latency=0.05), FakeModel("small"))
+    router.timeouts["large"] = 0.5
+    blockers = [
+        llm_router._submit(time.sleep, 0.6)
+        for _ in range(llm_router._executor._max_workers)
+    ]
+    assert router.route("answer").invoke("hi").content == "large"
+    for blocker in blockers:
+        blocker.result()
+
+
+def test_a_late_call_is_hedged_on_the_same_tier(fallbacks):
+    policy = HedgePolicy(min_samples=1, max_extra_load=1.0, burst=1)
+    policy.observe(("answer", "large", "response"), 0.01)
+    large = FakeModel("large", latency=0.2)
+    router = make_router(
+        large,
+        FakeModel("small"),
+        timeout=1.0,
+        hedging=policy,
+        hedge_call_sites={"answer"},
+    )
+    assert router.route("answer").invoke("hi").content == "large"
+    assert large.calls == 2
+    assert policy.stats()["answer"]["hedged"] == 1
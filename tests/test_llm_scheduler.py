@@ -0,0 +1,172 @@
+"""
+Tests for the LLM request scheduler
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.llm_scheduler import (
+    RequestScheduler,
+    TokenBucket,
+    _Request,
+    request_priority,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_token_bucket_starts_full():
+    bucket = TokenBucket(60, clock=FakeClock())
+    assert bucket.delay(60) == 0.0
+
+
+def test_token_bucket_refills_at_its_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+    bucket.take(60)
+    assert bucket.delay(3) == pytest.approx(3.0)
+
+    clock.now = 2.0
+    assert bucket.delay(3) == pytest.approx(1.0)
+
+    clock.now = 1000.0
+    assert bucket.delay(60) == 0.0
+    assert bucket.level == 60
+
+
+def test_token_bucket_admits_an_oversized_request_once_full():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+    assert bucket.delay(500) == 0.0
+
+    bucket.take(500)
+    assert bucket.delay(1) == pytest.approx(441.0)
+
+
+def test_queued_requests_start_by_priority_then_arrival():
+    scheduler = RequestScheduler(max_in_flight=1)
+    started = []
+
+    def request(call_site, priority):
+        with request_priority(priority):
+            with scheduler.slot(call_site):
+                started.append(call_site)
+
+    threads = []
+    with scheduler.slot("holder"):
+        for call_site, priority in [
+            ("background_1", "background"),
+            ("creation", "creation"),
+            ("background_2", "background"),
+            ("interactive", "interactive"),
+        ]:
+            thread = threading.Thread(target=request, args=(call_site, priority))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda: scheduler.stats()["waiting"] == len(threads))
+
+    for thread in threads:
+        thread.join(timeout=5)
+    assert started == ["interactive", "creation", "background_1", "background_2"]
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_abandoning_a_queued_request_removes_it():
+    scheduler = RequestScheduler(max_in_flight=1)
+    holder = scheduler._submit("holder", None, 0, lambda: None)
+    waiter = scheduler._submit("waiter", None, 0, lambda: None)
+    assert scheduler.stats()["waiting"] == 1
+
+    scheduler._abandon(waiter)
+    assert scheduler.stats()["waiting"] == 0
+    assert scheduler.stats()["in_flight"] == 1
+    assert holder.started_at is not None
+
+
+def test_abandoning_a_granted_slot_passes_it_on():
+    scheduler = RequestScheduler(max_in_flight=1)
+    granted = scheduler._submit("granted", None, 0, lambda: None)
+    woken = []
+    scheduler._submit("next", None, 0, lambda: woken.append("next"))
+
+    scheduler._abandon(granted)
+    assert woken == ["next"]
+    assert scheduler.stats()["in_flight"] == 1
+
+
+def test_cancelled_coroutine_gives_up_its_place():
+    async def main():
+        scheduler = RequestScheduler(max_in_flight=1)
+
+        async def wait_for_slot():
+            async with scheduler.aslot("waiter"):
+                pass
+
+        async with scheduler.aslot("holder"):
+            waiter = asyncio.create_task(wait_for_slot())
+            while not scheduler.stats()["waiting"]:
+                await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            assert scheduler.stats()["waiting"] == 0
+        assert scheduler.stats()["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_try_acquire_never_waits_or_overtakes():
+    scheduler = RequestScheduler(max_in_flight=2)
+    request = scheduler.try_acquire("hedge")
+    assert request is not None
+    assert scheduler.stats()["in_flight"] == 1
+
+    holder = scheduler.acquire("holder")
+    assert scheduler.try_acquire("hedge") is None
+
+    scheduler._submit("queued", None, 0, lambda: None)
+    scheduler.release(holder)
+    assert scheduler.stats()["in_flight"] == 2
+    scheduler.release(request)
+    assert scheduler.try_acquire("hedge") is not None
+
+
+def test_try_acquire_is_charged_to_the_token_bucket():
+    scheduler = RequestScheduler(max_in_flight=4, tokens_per_minute=1000)
+    assert scheduler.try_acquire("hedge", tokens=800) is not None
+    assert scheduler.try_acquire("hedge", tokens=800) is None
+
+
+def finished_request(streamed, tier=None):
+    request = _Request("answer_question", tier, "interactive", 0, None, 0.0)
+    if streamed:
+        request.responded_at = 0.0
+    return request
+
+
+def test_streamed_and_whole_response_latencies_are_tracked_apart():
+    scheduler = RequestScheduler(max_in_flight=4)
+    for _ in range(5):
+        scheduler._adapt(finished_request(streamed=True), 0.1)
+    scheduler._adapt(finished_request(streamed=False), 2.0)
+    scheduler._adapt(finished_request(streamed=True, tier="large"), 2.0)
+    assert scheduler.stats()["limit"] == 4
+
+    scheduler._adapt(finished_request(streamed=True), 2.0)
+    assert scheduler.stats()["limit"] == 3
@@ -14,7 +14,13 @@ from config.settings import (
     MAX_CHARACTERS,
     MIN_GUESSES,
     MAX_GUESSES,
+    VICTIM_ROLE,
+    JOB_POLL_INTERVAL,
+    SCENARIO_POOL_ENABLED,
+    SCENARIO_LIBRARY_ENABLED,
+    PREFETCH_INTRODUCTIONS,
 )
+from src.utils.metrics import set_metrics_tags
 
 
 def display_main_header():
@@ -76,30 +82,178 @@ def setup_game():
         - Use the AI assistant when stuck
         """)
 
-    if st.button("🚀 Start New Game", type="primary", use_container_width=True):
-        with st.spinner("🎭 Creating characters and storyline..."):
-            try:
-                game_input = {
-                    "environment": environment,
-                    "max_characters": max_characters,
-                    "num_guesses_left": num_guesses,
-                    "messages": [],
-                    "characters": [],
-                    "story_details": None,
-                    "selected_character_id": None,
-                    "result": "",
-                }
-
-                # Generate game using LangGraph
-                result = st.session_state.main_graph.invoke(game_input)
-                st.session_state.game_state = result
-                st.session_state.current_phase = "investigation"
-                st.success("✅ Game created successfully!")
-
-                time.sleep(1)
-                st.rerun()
-
-            except Exception as e:
-                st.error("❌ Error creating game.")
-                st.text(f"Exception: {str(e)}")
-                st.text(traceback.format_exc())
+    start = st.button("🚀 Start New Game", type="primary", use_container_width=True)
+    # A game still being generated is followed again after any rerun
+    if start or st.session_state.new_game_job is not None:
+        # The LLM and graph stack is only loaded once a game is requested
+        from src.engine import GameSession
+        from src.utils.llm_config import get_shared_llm
+        from src.utils.prefetch import prefetch_introductions
+        from src.utils.scenario_library import get_scenario_library
+        from src.utils.scenario_pool import get_scenario_pool
+
+        try:
+            session = None
+            if st.session_state.new_game_job is not None:
+                # A click or rerun while a game is generated follows that game
+                session = follow_new_game()
+
+            if session is None and SCENARIO_LIBRARY_ENABLED:
+                result = get_scenario_library().take(
+                    environment, max_characters, num_guesses
+                )
+                if result is not None:
+                    session = GameSession.from_game_state(result)
+
+            if session is None and SCENARIO_POOL_ENABLED:
+                result = get_scenario_pool().take(
+                    environment, max_characters, num_guesses
+                )
+                if result is not None:
+                    session = GameSession.from_game_state(result)
+
+            if session is None:
+                # Generate game using LangGraph, showing each step as it lands
+                session = generate_game(environment, max_characters, num_guesses)
+
+            st.session_state.game_state = session.game
+            set_metrics_tags(game_id=session.game["game_id"])
+            if PREFETCH_INTRODUCTIONS:
+                st.session_state.intro_prefetch = prefetch_introductions(
+                    session, get_shared_llm()
+                )
+            st.session_state.current_phase = "investigation"
+            st.success("✅ Game created successfully!")
+
+            time.sleep(1)
+            st.rerun()
+
+        except Exception as e:
+            st.error("❌ Error creating game.")
+            st.text(f"Exception: {str(e)}")
+            st.text(traceback.format_exc())
+
+
+# Status shown while the node after the one that just finished is running
+NEXT_STEP_LABELS = {
+    "repair_characters": "🔎 Staging the crime scene...",
+    "repair_story": "📖 Dr. Watson is writing his report...",
+}
+
+
+def run_new_game(job, llm, environment, max_characters, num_guesses):
+    """Background job: generate a game, publishing each step for the page"""
+    from src.engine import new_game
+
+    steps = job.progress.setdefault("steps", [])
+
+    def publish(node, state):
+        steps.append((node, dict(state)))
+
+    return new_game(llm, environment, max_characters, num_guesses, on_step=publish)
+
+
+def generate_game(environment, max_characters, num_guesses):
+    """Generate a game in a background job, rendering each step as it completes.
+
+    The job is keyed by the session and the game settings, so submitting the
+    same game again while it is generated returns the running job.
+    """
+    from src.utils.jobs import get_job_runner
+    from src.utils.llm_config import get_shared_llm
+
+    key = (
+        st.session_state.session_id,
+        "new_game",
+        environment,
+        max_characters,
+        num_guesses,
+    )
+    st.session_state.new_game_job = get_job_runner().submit(
+        run_new_game,
+        get_shared_llm(),
+        environment,
+        max_characters,
+        num_guesses,
+        kind="new_game",
+        key=key,
+    )
+    session = follow_new_game()
+    if session is None:
+        raise RuntimeError("The game being generated was lost")
+    return session
+
+
+def follow_new_game():
+    """Render the pending game's steps until it is generated, then collect it.
+
+    Returns the session, or None if the job is gone. The job is popped so its
+    game is committed to the session state only once.
+    """
+    from src.utils.jobs import get_job_runner
+
+    runner = get_job_runner()
+    job_id = st.session_state.new_game_job
+    status = st.status("🎭 Creating characters...", expanded=True)
+    shown = 0
+    while True:
+        job = runner.get(job_id)
+        if job is None:
+            st.session_state.new_game_job = None
+            return None
+
+        # Checked before reading the steps so the last ones are always drawn
+        done = job.done
+        steps = job.progress.get("steps", [])
+        for node, state in steps[shown:]:
+            render_step(status, node, state)
+        shown = len(steps)
+        if done:
+            break
+        time.sleep(JOB_POLL_INTERVAL)
+
+    runner.pop(job_id)
+    st.session_state.new_game_job = None
+    if job.error is not None:
+        status.update(label="❌ The game could not be created", state="error")
+        raise job.error
+    status.update(label="🕵️ The game is afoot!", state="complete")
+    return job.result
+
+
+def render_step(status, node, state):
+    """Draw a finished generation step into the status container"""
+    with status:
+        # Previews are drawn once each step has been validated
+        if node == "repair_characters":
+            display_cast_preview(state["characters"])
+        elif node == "repair_story":
+            display_scene_preview(state["story_details"])
+        elif node == "narrator" and state["messages"]:
+            st.markdown("**📖 Dr. Watson's Report**")
+            st.markdown(f"*{state['messages'][0].content}*")
+
+    if node in NEXT_STEP_LABELS:
+        status.update(label=NEXT_STEP_LABELS[node])
+
+
+def display_cast_preview(characters):
+    """Show the generated cast without revealing the killer"""
+    st.markdown("**👥 The Cast**")
+    for character in characters:
+        if character.role.lower() == VICTIM_ROLE:
+            st.markdown(f"- 💀 **{character.name}** (victim)")
+        else:
+            st.markdown(f"- **{character.name}**")
+
+
+def display_scene_preview(story):
+    """Show the basic crime scene facts"""
+    st.markdown("**🏢 The Crime Scene**")
+    st.markdown(
+        f"**Victim:** {story.victim_name}  \n"
+        f"**Time of Death:** {story.time_of_death}  \n"
+        f"**Location:** {story.location_found}  \n"
+        f"**Weapon:** {story.murder_weapon}"
+    )
+    st.markdown(story.crime_scene_details)
@@ -4,14 +4,165 @@ Investigation phase UI components
 
 import streamlit as st
 import time
-from langchain_core.messages import HumanMessage
-
-from src.agents.conversation_handler import (
-    character_introduction,
-    get_question,
-    answer_question,
+from functools import lru_cache
+
+from src.agents.conversation_handler import sherlock_messages
+from src.engine import (
+    GameSession,
+    accuse,
+    answer,
+    interview_state,
+    introduction,
+    next_question,
+    with_question,
+)
+from src.utils.context_window import estimate_tokens
+from src.utils.jobs import get_job_runner
+from src.utils.llm_config import get_shared_llm
+from src.utils.metrics import current_tags, get_metrics_recorder
+from src.utils.llm_scheduler import get_request_scheduler
+from src.utils.llm_hedge import get_hedge_policy
+from config.settings import (
+    STREAM_RESPONSES,
+    METRICS_ENABLED,
+    LLM_HEDGE_ENABLED,
+    TRANSCRIPT_PAGE_SIZE,
+    TRANSCRIPT_HTML_CACHE_SIZE,
+    JOB_POLL_INTERVAL,
+    SPECULATIVE_SHERLOCK_QUESTIONS,
 )
-from config.settings import KILLER_ROLE
+
+# Bubble style and speaker label for each transcript entry type; character
+# entries are labelled with the character's name
+MESSAGE_STYLES = {
+    "character": ("conversation-bubble", None),
+    "player": ("sherlock-bubble", "🕵️ You:"),
+    "sherlock_ai": ("sherlock-bubble", "🤖 Sherlock AI:"),
+}
+
+
+# Fragments (Streamlit >= 1.33) rerun just the decorated function on a timer;
+# without them poll_interview_jobs reruns the page at the end of each run
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def polling(func):
+    """Rerun ``func`` every JOB_POLL_INTERVAL seconds where fragments exist"""
+    if _fragment is None:
+        return func
+    return _fragment(run_every=JOB_POLL_INTERVAL)(func)
+
+
+def bubble_html(css_class, speaker, content):
+    """Build the HTML for a single conversation bubble"""
+    return f"""
+            <div class="{css_class}">
+                <strong>{speaker}</strong> {content}
+            </div>
+            """
+
+
+@lru_cache(maxsize=TRANSCRIPT_HTML_CACHE_SIZE)
+def message_html(msg_type, content, char_name):
+    """Bubble HTML for a transcript entry, cached since entries never change"""
+    css_class, speaker = MESSAGE_STYLES[msg_type]
+    return bubble_html(css_class, speaker or f"{char_name}:", content)
+
+
+def load_earlier_messages(char_name, shown):
+    """Show one more page of a character's transcript"""
+    st.session_state.transcript_window[char_name] = shown + TRANSCRIPT_PAGE_SIZE
+
+
+def display_transcript(conversation, char_name):
+    """Draw the latest page of the transcript, with earlier pages on request"""
+    shown = st.session_state.transcript_window.get(char_name, TRANSCRIPT_PAGE_SIZE)
+    hidden = len(conversation) - shown
+
+    if hidden > 0:
+        st.button(
+            f"⬆️ Load earlier messages ({hidden} hidden)",
+            key=f"load_earlier_{char_name}",
+            on_click=load_earlier_messages,
+            args=(char_name, shown),
+        )
+
+    for msg in conversation[-shown:]:
+        if msg.type in MESSAGE_STYLES:
+            st.markdown(
+                message_html(msg.type, msg.content, char_name),
+                unsafe_allow_html=True,
+            )
+
+
+def streaming_bubble(placeholder, css_class, speaker):
+    """Callback drawing the text generated so far into a bubble"""
+
+    def show(text):
+        placeholder.markdown(
+            bubble_html(css_class, speaker, text + "▌"), unsafe_allow_html=True
+        )
+
+    return show
+
+
+def prefetched_introduction(char_name):
+    """Return the prefetched introduction, waiting for it if still running"""
+    future = st.session_state.intro_prefetch.get(char_name)
+    if future is None:
+        return None
+
+    try:
+        if future.done():
+            intro_message = future.result()
+        else:
+            with st.spinner(f"{char_name} is coming in..."):
+                intro_message = future.result()
+    except Exception:
+        # Fall back to generating the introduction live
+        intro_message = None
+
+    del st.session_state.intro_prefetch[char_name]
+    return intro_message
+
+
+def generate_introduction(char_name):
+    """Generate the character's introduction, streaming it when enabled"""
+    if STREAM_RESPONSES:
+        intro_placeholder = st.empty()
+        intro_message = introduction(
+            get_shared_llm(),
+            current_session(),
+            char_name,
+            on_text=streaming_bubble(
+                intro_placeholder, "conversation-bubble", f"{char_name}:"
+            ),
+        )
+        # The transcript renders the committed message
+        intro_placeholder.empty()
+        return intro_message
+
+    return introduction(get_shared_llm(), current_session(), char_name)
+
+
+def current_session():
+    """The engine's view of this player's game, sharing the session state"""
+    return GameSession(
+        st.session_state.game_state,
+        st.session_state.conversation_history,
+        st.session_state.conversation_summaries,
+        st.session_state.guesses_made,
+        st.session_state.game_result,
+    )
+
+
+def save_session(session):
+    """Write back what the session does not share with the session state.
+
+    The game, transcripts, summaries and guesses are the session state's own
+    objects; the result is a plain value and has to be copied.
+    """
+    st.session_state.game_result = session.result
 
 
 def display_game_status():
@@ -43,6 +194,63 @@ def display_game_status():
             f"**Characters Interviewed:** {interviewed}/{total_chars} 👥"
         )
 
+    with st.sidebar:
+        display_job_status()
+
+    if METRICS_ENABLED and st.sidebar.checkbox("📈 Performance metrics"):
+        scheduler = get_request_scheduler().stats()
+        queued = ", ".join(
+            f"{priority} {row['waiting']} ({row['mean_wait_s']:.2f}s avg wait)"
+            for priority, row in scheduler["classes"].items()
+        )
+        st.sidebar.caption(
+            f"Model requests in flight: {scheduler['in_flight']}/"
+            f"{scheduler['limit']} (max {scheduler['max_in_flight']}), "
+            f"queued: {queued}"
+        )
+        if LLM_HEDGE_ENABLED:
+            hedged = ", ".join(
+                f"{call_site} {row['hedge_rate']:.0%} ({row['win_rate']:.0%} won, "
+                f"{row['dropped']} dropped)"
+                for call_site, row in get_hedge_policy().stats().items()
+            )
+            st.sidebar.caption(f"Hedged requests: {hedged or 'none yet'}")
+        summary = get_metrics_recorder().summary(st.session_state.session_id)
+        speculation = {
+            row["call_site"]: row for row in summary if row["kind"] == "speculation"
+        }
+        hits = speculation.get("hit", {}).get("calls", 0)
+        misses = speculation.get("miss", {}).get("calls", 0)
+        if hits + misses:
+            wasted = speculation.get("wasted", {})
+            wasted_tokens = wasted.get("prompt_tokens", 0) + wasted.get(
+                "completion_tokens", 0
+            )
+            st.sidebar.caption(
+                f"Sherlock AI speculation: {hits / (hits + misses):.0%} hit rate, "
+                f"{wasted_tokens} tokens wasted"
+            )
+        if summary:
+            st.sidebar.dataframe(summary, hide_index=True)
+        else:
+            st.sidebar.caption("No model calls recorded yet.")
+
+
+@polling
+def display_job_status():
+    """List interviews in progress, redrawing the page as each one finishes"""
+    jobs = st.session_state.interview_jobs
+    if not jobs:
+        return
+
+    runner = get_job_runner()
+    for entry in jobs.values():
+        job = runner.get(entry["job_id"])
+        if job is None or job.done:
+            st.rerun()
+
+    st.caption("⏳ Answering: " + ", ".join(jobs))
+
 
 def display_crime_scene():
     """Display crime scene information"""
@@ -76,10 +284,9 @@ def display_crime_scene():
     st.markdown("</div>", unsafe_allow_html=True)
 
     # Display Watson's narration
-    if st.session_state.game_state.get("messages"):
+    if st.session_state.game_state.get("narration"):
         st.subheader("📖 Dr. Watson's Report")
-        narration = st.session_state.game_state["messages"][0]
-        st.markdown(f"*{narration.content}*")
+        st.markdown(f"*{st.session_state.game_state['narration']}*")
 
 
 def display_characters():
@@ -148,54 +355,24 @@ def display_character_interview():
 
     st.header(f"🗣️ Interviewing {char_name}")
 
+    st.subheader("💬 Conversation")
+
     # Initialize conversation history for this character
     if char_name not in st.session_state.conversation_history:
-        st.session_state.conversation_history[char_name] = []
         # Generate character introduction
-        conv_state = {
-            "character": character,
-            "story_details": st.session_state.game_state["story_details"],
-            "messages": [],
-        }
-        intro_result = character_introduction(conv_state)
-        intro_message = intro_result["messages"][0].content
+        intro_message = prefetched_introduction(char_name)
+        if intro_message is None:
+            intro_message = generate_introduction(char_name)
 
-        st.session_state.conversation_history[char_name].append(
-            {"type": "character", "content": intro_message, "timestamp": time.time()}
-        )
+        # Only start the transcript once the introduction exists, so a rerun
+        # while it is being generated retries instead of leaving it empty
+        current_session().record(char_name, "character", intro_message)
+        start_speculative_question(character)
 
     # Display conversation history
-    st.subheader("💬 Conversation")
     conversation = st.session_state.conversation_history[char_name]
-
-    for msg in conversation:
-        if msg["type"] == "character":
-            st.markdown(
-                f"""
-            <div class="conversation-bubble">
-                <strong>{char_name}:</strong> {msg["content"]}
-            </div>
-            """,
-                unsafe_allow_html=True,
-            )
-        elif msg["type"] == "player":
-            st.markdown(
-                f"""
-            <div class="sherlock-bubble">
-                <strong>🕵️ You:</strong> {msg["content"]}
-            </div>
-            """,
-                unsafe_allow_html=True,
-            )
-        elif msg["type"] == "sherlock_ai":
-            st.markdown(
-                f"""
-            <div class="sherlock-bubble">
-                <strong>🤖 Sherlock AI:</strong> {msg["content"]}
-            </div>
-            """,
-                unsafe_allow_html=True,
-            )
+    display_transcript(conversation, char_name)
+    display_pending_turn(char_name)
 
     # Question input section
     st.subheader("❓ Ask a Question")
@@ -213,12 +390,15 @@ def display_character_interview():
         st.markdown("**Options:**")
         use_sherlock_ai = st.checkbox("🤖 Use Sherlock AI", value=False)
 
+        # Keyed by submission so a second click on the same form is stale
+        submission = st.session_state.question_submissions
         if st.button(
             "📤 Ask Question",
             type="primary",
             disabled=not question and not use_sherlock_ai,
+            key=f"ask_question_{submission}",
         ):
-            handle_question_submission(character, question, use_sherlock_ai)
+            handle_question_submission(character, question, use_sherlock_ai, submission)
 
     if st.button("🚪 End Interview", type="secondary"):
         st.session_state.selected_character = None
@@ -226,59 +406,289 @@ def display_character_interview():
         st.rerun()
 
 
-def handle_question_submission(character, question, use_sherlock_ai):
-    """Handle question submission and response generation"""
-    char_name = character.name
+@polling
+def display_pending_turn(char_name):
+    """Show the answer being generated and any questions queued after it"""
+    entry = st.session_state.interview_jobs.get(char_name)
+    if entry is None:
+        return
 
-    # Create conversation state
-    messages = []
-    for msg in st.session_state.conversation_history[char_name]:
-        if msg["type"] == "character":
-            messages.append(HumanMessage(content=msg["content"]))
+    job = get_job_runner().get(entry["job_id"])
+    if job is None or job.done:
+        # Redraw the page so the finished turn is committed to the transcript
+        st.rerun()
+
+    question = job.progress.get("question")
+    if question:
+        st.markdown(
+            bubble_html("sherlock-bubble", "🤖 Sherlock AI:", question),
+            unsafe_allow_html=True,
+        )
+    answer = job.progress.get("answer")
+    if answer:
+        st.markdown(
+            bubble_html("conversation-bubble", f"{char_name}:", answer + "▌"),
+            unsafe_allow_html=True,
+        )
+    else:
+        st.caption(f"⏳ {char_name} is thinking...")
+
+    for request in st.session_state.interview_queue.get(char_name, []):
+        st.caption(f"🕒 Queued: {request['question'] or 'Sherlock AI question'}")
+
+
+def poll_interview_jobs():
+    """Without fragments, rerun the page shortly while interview jobs run.
+
+    Called as the last statement of the script run, so the whole page has
+    been drawn and nothing else is held up by the wait.
+    """
+    if _fragment is None and st.session_state.interview_jobs:
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+
+def interview_snapshot(char_name):
+    """A copy of an interview for a background job to build the next turn from.
+
+    The job may summarize the interview notes, so it gets its own transcript
+    and summaries; the new summary is stored when the turn is committed.
+    """
+    session = current_session()
+    return GameSession(
+        session.game,
+        {char_name: list(session.transcript(char_name))},
+        dict(session.summaries),
+    )
+
+
+def record_speculation(outcome, tokens=None):
+    """Record a hit, miss or wasted speculative Sherlock AI question"""
+    if METRICS_ENABLED:
+        tokens = tokens or {}
+        get_metrics_recorder().record(
+            "speculation",
+            outcome,
+            0.0,
+            tags=current_tags(),
+            prompt_tokens=tokens.get("prompt"),
+            completion_tokens=tokens.get("completion"),
+        )
+
+
+def speculate_question(job, llm, session, char_name):
+    """Background job: Sherlock AI's next question for the current transcript.
+
+    Returns the question with the conversation state it was asked in, which
+    a turn using the question answers from, or None if cancelled first.
+    """
+    conv_state = interview_state(llm, session, char_name)
+    if job.cancelled:
+        return None
+    prompt_tokens = sum(
+        estimate_tokens(str(message.content))
+        for message in sherlock_messages(conv_state)
+    )
+    job.progress["tokens"] = {"prompt": prompt_tokens, "completion": 0}
+    question = next_question(llm, conv_state, call_site="speculative_question")
+    job.progress["tokens"]["completion"] = estimate_tokens(question)
+    return {
+        "question": question,
+        "conv_state": conv_state,
+        "summary": session.summaries[char_name],
+    }
+
+
+def run_interview_turn(job, llm, session, char_name, use_sherlock_ai, speculation=None):
+    """Background job: generate Sherlock's question if asked, then the answer.
+
+    ``session`` is a snapshot from interview_snapshot; the interview notes
+    are summarized here when due, off the script thread. A speculative
+    question job for the same transcript version is used instead of a new
+    get_question call if it has finished. An unfinished one is cancelled
+    rather than waited for: it shares this job's worker pool and runs at
+    background priority, so waiting could starve or deadlock the turn.
+    """
+    question = None
+    if speculation is not None:
+        if use_sherlock_ai and speculation.status == "done":
+            question = speculation.result["question"]
+            conv_state = speculation.result["conv_state"]
+            summary = speculation.result["summary"]
+            record_speculation("hit", tokens=speculation.progress.get("tokens"))
         else:
-            messages.append(HumanMessage(content=msg["content"]))
+            speculation.cancel()
+            record_speculation("wasted", tokens=speculation.progress.get("tokens"))
+
+    if question is None:
+        conv_state = interview_state(llm, session, char_name)
+        summary = session.summaries[char_name]
+        if use_sherlock_ai:
+            record_speculation("miss")
+            question = next_question(llm, conv_state)
+
+    if question is not None:
+        job.progress["question"] = question
+        conv_state = with_question(conv_state, question)
+
+    def publish(text):
+        job.progress["answer"] = text
+
+    reply = answer(llm, conv_state, on_text=publish if STREAM_RESPONSES else None)
+    return {"question": question, "answer": reply, "summary": summary}
+
+
+def take_speculation(char_name):
+    """Pop the speculative question job if it matches the current transcript.
+
+    The transcript is append-only, so its length identifies its version. A
+    speculation made for an older version is cancelled and counted as wasted.
+    """
+    entry = st.session_state.sherlock_speculation.pop(char_name, None)
+    if entry is None:
+        return None
+
+    runner = get_job_runner()
+    job = runner.pop(entry["job_id"])
+    if job is None:
+        return None
+    if entry["version"] == len(st.session_state.conversation_history[char_name]):
+        return job
+
+    job.cancel()
+    record_speculation("wasted", tokens=job.progress.get("tokens"))
+    return None
+
+
+def start_speculative_question(character):
+    """Start generating Sherlock AI's next question for the current transcript"""
+    char_name = character.name
+    if (
+        not SPECULATIVE_SHERLOCK_QUESTIONS
+        or char_name in st.session_state.interview_jobs
+    ):
+        return
 
-    conv_state = {
+    version = len(st.session_state.conversation_history[char_name])
+    entry = st.session_state.sherlock_speculation.get(char_name)
+    if entry is not None and entry["version"] == version:
+        return
+    take_speculation(char_name)
+
+    # Speculation only uses spare workers: with turns or other speculative
+    # questions waiting for one, this one would only add to the wait
+    runner = get_job_runner()
+    if runner.queued("interview_turn", "speculative_question"):
+        return
+
+    job_id = runner.submit(
+        speculate_question,
+        get_shared_llm(),
+        interview_snapshot(char_name),
+        char_name,
+        kind="speculative_question",
+    )
+    st.session_state.sherlock_speculation[char_name] = {
+        "job_id": job_id,
+        "version": version,
+    }
+
+
+def unanswered_question(char_name, question):
+    """Whether the transcript ends with this question from the player.
+
+    That happens when a rerun interrupted the submission after the question
+    was recorded; resubmitting it must not record it twice.
+    """
+    transcript = st.session_state.conversation_history.get(char_name)
+    return bool(transcript) and (
+        transcript[-1].type == "player" and transcript[-1].content == question
+    )
+
+
+def start_interview_turn(character, request):
+    """Record the player's question and answer it in a background job"""
+    char_name = character.name
+    question = request["question"]
+    if question and not unanswered_question(char_name, question):
+        current_session().record(char_name, "player", question)
+
+    # A player question moves the transcript on, discarding any speculation
+    speculation = take_speculation(char_name)
+
+    # The same turn submitted again gets the job already answering it
+    key = (
+        st.session_state.session_id,
+        "interview_turn",
+        char_name,
+        len(st.session_state.conversation_history[char_name]),
+        request["use_sherlock_ai"],
+    )
+
+    # The job builds the conversation state from the summary and recent turns
+    job_id = get_job_runner().submit(
+        run_interview_turn,
+        get_shared_llm(),
+        interview_snapshot(char_name),
+        char_name,
+        request["use_sherlock_ai"],
+        speculation,
+        kind="interview_turn",
+        key=key,
+    )
+    st.session_state.interview_jobs[char_name] = {
+        "job_id": job_id,
         "character": character,
-        "story_details": st.session_state.game_state["story_details"],
-        "messages": messages,
     }
 
-    if use_sherlock_ai:
-        # Generate AI question
-        ai_question = get_question(conv_state)
-        st.session_state.conversation_history[char_name].append(
-            {
-                "type": "sherlock_ai",
-                "content": ai_question,
-                "timestamp": time.time(),
-            }
-        )
 
-        # Generate character response
-        messages.append(HumanMessage(content=ai_question))
-        conv_state["messages"] = messages
-        response_result = answer_question(conv_state)
-        response = response_result["messages"][0].content
+def commit_finished_turns():
+    """Append finished answers to the transcripts and start queued questions"""
+    runner = get_job_runner()
+    for char_name, entry in list(st.session_state.interview_jobs.items()):
+        job = runner.get(entry["job_id"])
+        if job is not None and not job.done:
+            continue
 
-        st.session_state.conversation_history[char_name].append(
-            {"type": "character", "content": response, "timestamp": time.time()}
-        )
+        runner.pop(entry["job_id"])
+        del st.session_state.interview_jobs[char_name]
+        if job is None or job.error is not None:
+            st.toast(f"⚠️ {char_name} did not answer. Please ask again.")
+        else:
+            session = current_session()
+            session.summaries[char_name] = job.result["summary"]
+            if job.result["question"]:
+                session.record(char_name, "sherlock_ai", job.result["question"])
+            session.record(char_name, "character", job.result["answer"])
+
+        queue = st.session_state.interview_queue.get(char_name)
+        if queue:
+            start_interview_turn(entry["character"], queue.pop(0))
+        else:
+            start_speculative_question(entry["character"])
 
-    elif question:
-        st.session_state.conversation_history[char_name].append(
-            {"type": "player", "content": question, "timestamp": time.time()}
-        )
 
-        # Generate character response
-        messages.append(HumanMessage(content=question))
-        conv_state["messages"] = messages
-        response_result = answer_question(conv_state)
-        response = response_result["messages"][0].content
+def handle_question_submission(character, question, use_sherlock_ai, submission):
+    """Answer the question in the background, queueing it behind a pending one.
 
-        st.session_state.conversation_history[char_name].append(
-            {"type": "character", "content": response, "timestamp": time.time()}
-        )
+    ``submission`` is the number of the form the question was asked from.
+    Each number is accepted once, so a double click or a rerun repeating a
+    submission is dropped while the same question asked again is queued.
+    """
+    if submission != st.session_state.question_submissions:
+        st.rerun()
+    st.session_state.question_submissions += 1
+
+    char_name = character.name
+    request = {
+        "question": None if use_sherlock_ai else question,
+        "use_sherlock_ai": use_sherlock_ai,
+    }
+
+    if char_name in st.session_state.interview_jobs:
+        st.session_state.interview_queue.setdefault(char_name, []).append(request)
+    else:
+        start_interview_turn(character, request)
 
     st.rerun()
 
@@ -322,49 +732,33 @@ def display_guessing_phase():
 
 def make_accusation(accused_character):
     """Handle player accusation"""
-    game_state = st.session_state.game_state
-    killer = next(
-        (c for c in game_state["characters"] if c.role.lower() == KILLER_ROLE), None
-    )
+    session = current_session()
+    accusation = accuse(session, accused_character.name)
+    save_session(session)
 
-    is_correct = accused_character.name == killer.name
-
-    st.session_state.guesses_made.append(
-        {
-            "character": accused_character.name,
-            "correct": is_correct,
-            "timestamp": time.time(),
-        }
-    )
-
-    if is_correct:
-        st.session_state.game_result = "win"
+    if session.result is not None:
         st.session_state.current_phase = "ended"
-        game_state["result"] = "end"
+
+    if accusation.correct:
         st.success(
-            f"🎉 Congratulations! You correctly identified {accused_character.name} as the killer!"
+            f"🎉 Congratulations! You correctly identified {accusation.accused} as the killer!"
         )
         st.balloons()
+    elif accusation.result == "lose":
+        st.error(
+            f"💀 Game Over! The killer was {accusation.killer}. Better luck next time!"
+        )
     else:
-        game_state["num_guesses_left"] -= 1
-        if game_state["num_guesses_left"] <= 0:
-            st.session_state.game_result = "lose"
-            st.session_state.current_phase = "ended"
-            game_state["result"] = "end"
-            st.error(
-                f"💀 Game Over! The killer was {killer.name}. Better luck next time!"
-            )
-        else:
-            st.error(
-                f"❌ Wrong! {accused_character.name} is not the killer. You have {game_state['num_guesses_left']} guesses left."
-            )
-            game_state["result"] = "sherlock"
+        st.error(
+            f"❌ Wrong! {accusation.accused} is not the killer. You have {accusation.guesses_left} guesses left."
+        )
 
     st.rerun()
 
 
 def display_investigation_phase():
     """Main investigation phase coordinator"""
+    commit_finished_turns()
     display_game_status()
 
     # Sidebar navigation